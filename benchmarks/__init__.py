@@ -0,0 +1 @@
+"""This package contains the benchmarks for the social networking application."""
@@ -0,0 +1,81 @@
+"""
+Benchmarks wall reads with and without the render cache.
+
+Users read their walls far more often than their followees post, so the
+workload mixes one post for every `--reads-per-post` wall reads. A cache hit
+only recomputes the elapsed-time labels of the cached wall.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_cache --reads-per-post 20
+```
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def run(
+    social_network: SocialNetwork,
+    n_users: int,
+    n_operations: int,
+    reads_per_post: int,
+    seed: int,
+) -> float:
+    """Runs a read-heavy workload, returning the elapsed seconds."""
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(n_users)]
+    for name in names:
+        social_network.add_user(name)
+    for name in names:
+        for following in rng.sample(names, 20):
+            social_network.follows(name, following)
+    for i in range(n_users * 5):
+        social_network.add_post(rng.choice(names), f"post number {i}")
+
+    start = time.perf_counter()
+    for i in range(n_operations):
+        name = rng.choice(names)
+        if rng.random() < 1 / (reads_per_post + 1):
+            social_network.add_post(name, f"post number {i}")
+        else:
+            social_network.get_user_wall(name, 20)
+
+    return time.perf_counter() - start
+
+
+def main():
+    """Parses the command line and prints the operation throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=200_000)
+    parser.add_argument("--reads-per-post", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the reads, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    cache = RenderCache()
+    results = {
+        "uncached": SocialNetwork(),
+        "cached": SocialNetwork(cache=cache),
+    }
+
+    print(f"{'mode':<12}{'operations/s':>14}")
+    for mode, social_network in results.items():
+        elapsed = run(
+            social_network, args.users, args.operations, args.reads_per_post, args.seed
+        )
+        print(f"{mode:<12}{args.operations / elapsed:>14,.0f}")
+
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmarks the throughput of concurrent readers and writers from 1 to 32 threads.
+
+It compares a social network behind one global lock, which serializes every
+reader behind every writer, against the concurrent social network, whose
+readers never lock and whose writers only lock the users they change. Both
+run the same mix of wall reads and posts.
+
+Note that CPython's global interpreter lock still runs one thread at a time,
+so throughput cannot scale past one core. This benchmark measures how much the
+locking costs and how it holds up as threads are added, not parallel speedup.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_concurrency --operations 200000
+```
+"""
+
+import argparse
+import logging
+import random
+import threading
+import time
+
+from src.sr_sw_dev.concurrency import ConcurrentSocialNetwork
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+class GloballyLockedSocialNetwork(SocialNetwork):
+    """A social network whose reads and writes all share one lock."""
+
+    def __init__(self):
+        """Initializes a social network with a global lock."""
+        self.lock = threading.Lock()
+        super().__init__()
+
+    def add_post(self, name: str, post: str):
+        """Adds a post while holding the global lock."""
+        with self.lock:
+            super().add_post(name, post)
+
+    def get_user_wall(self, name: str, limit: int | None = None) -> list[str]:
+        """Reads a wall while holding the global lock."""
+        with self.lock:
+            return super().get_user_wall(name, limit)
+
+
+def populate(social_network: SocialNetwork, names: list[str], seed: int):
+    """Adds users, follows and some history to a social network."""
+    rng = random.Random(seed)
+    for name in names:
+        social_network.add_user(name)
+    for name in names:
+        for following in rng.sample(names, 20):
+            social_network.follows(name, following)
+    for i in range(len(names) * 5):
+        social_network.add_post(rng.choice(names), f"post number {i}")
+
+
+def run(
+    social_network: SocialNetwork,
+    names: list[str],
+    n_threads: int,
+    n_operations: int,
+    write_ratio: float,
+) -> float:
+    """Runs the workload from several threads, returning the elapsed seconds."""
+
+    def work(seed: int):
+        rng = random.Random(seed)
+        for i in range(n_operations // n_threads):
+            name = rng.choice(names)
+            if rng.random() < write_ratio:
+                social_network.add_post(name, f"post {seed}-{i}")
+            else:
+                social_network.get_user_wall(name, 10)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return time.perf_counter() - start
+
+
+def main():
+    """Parses the command line and prints the throughput per thread count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=200_000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the locking, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    names = [f"user{i}" for i in range(args.users)]
+    modes = {
+        "global lock": GloballyLockedSocialNetwork,
+        "striped": ConcurrentSocialNetwork,
+    }
+
+    print(f"{'threads':<10}" + "".join(f"{mode + ' ops/s':>22}" for mode in modes))
+    for n_threads in (1, 2, 4, 8, 16, 32):
+        row = f"{n_threads:<10}"
+        for factory in modes.values():
+            social_network = factory()
+            populate(social_network, names, args.seed)
+            elapsed = run(
+                social_network, names, n_threads, args.operations, args.write_ratio
+            )
+            row += f"{args.operations / elapsed:>22,.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmarks ingest throughput and recovery time with durability on and off.
+
+Ingest is measured in memory only, with a write-ahead log that is never
+fsynced, with a group commit fsynced once per group and with an fsync per
+record. Recovery is measured by replaying the full log, and by loading a
+snapshot of the same social network.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_durability --posts 200000
+```
+"""
+
+import argparse
+import logging
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from src.sr_sw_dev.persistence import Persistence
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def ingest(
+    social_network: SocialNetwork, n_users: int, n_posts: int, seed: int
+) -> float:
+    """Adds users, follows and posts, returning the elapsed seconds."""
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(n_users)]
+
+    start = time.perf_counter()
+    for name in names:
+        social_network.add_user(name)
+    for name in names:
+        for following in rng.sample(names, 10):
+            social_network.follows(name, following)
+    for i in range(n_posts):
+        social_network.add_post(rng.choice(names), f"post number {i}")
+    if social_network.persistence is not None:
+        social_network.persistence.commit()
+
+    return time.perf_counter() - start
+
+
+def recover(directory: Path) -> float:
+    """Recovers a social network from a directory, returning the elapsed seconds."""
+    start = time.perf_counter()
+    persistence = Persistence(directory, snapshot_interval=0)
+    SocialNetwork(persistence=persistence)
+    elapsed = time.perf_counter() - start
+
+    persistence.close()
+    return elapsed
+
+
+def main():
+    """Parses the command line and prints ingest and recovery timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--group-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the storage, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    n_records = args.users * 11 + args.posts
+    modes = {
+        "in memory": None,
+        "wal, no fsync": (args.group_size, 0),
+        "wal, group fsync": (args.group_size, 1),
+        "wal, fsync each": (1, 1),
+    }
+
+    print(f"{'ingest':<20}{'records/s':>14}")
+    with tempfile.TemporaryDirectory() as root:
+        for mode, options in modes.items():
+            n_posts = args.posts if options != (1, 1) else args.posts // 100
+            persistence = None
+            if options is not None:
+                group_size, fsync_interval = options
+                persistence = Persistence(
+                    Path(root) / mode,
+                    group_size=group_size,
+                    fsync_interval=fsync_interval,
+                    snapshot_interval=0,
+                )
+
+            social_network = SocialNetwork(persistence=persistence)
+            elapsed = ingest(social_network, args.users, n_posts, args.seed)
+            if persistence is not None:
+                persistence.close()
+            print(f"{mode:<20}{(args.users * 11 + n_posts) / elapsed:>14,.0f}")
+
+        directory = Path(root) / "wal, no fsync"
+        print(f"\n{'recovery':<20}{'seconds':>14}")
+        print(f"{'from log':<20}{recover(directory):>14.3f}")
+
+        persistence = Persistence(directory, snapshot_interval=0)
+        SocialNetwork(persistence=persistence)
+        persistence.snapshot()
+        persistence.close()
+        print(f"{'from snapshot':<20}{recover(directory):>14.3f}")
+        print(f"({n_records:,} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmarks the suggestions of users to follow on a large follow graph.
+
+A power-law follow graph (see `benchmarks.workload`) is exported in compressed
+sparse row form, then users to follow are suggested to random users, from the
+graph and by chasing the references between the users for comparison. The
+suggestions from the graph are also timed with a new follow edge before each
+of them, which only exports the graph again once enough edges changed.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_graph --users 100000 --follows 1000000
+```
+"""
+
+import argparse
+from collections import Counter
+import logging
+import random
+import time
+
+from benchmarks.workload import generate
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def suggest_by_reference(social_network: SocialNetwork, name: str, k: int) -> list:
+    """Suggests users to follow by chasing the references between the users."""
+    user = social_network.users[name]
+    counts = Counter(
+        candidate
+        for followee in user.following.values()
+        for candidate in followee.following
+        if candidate != name and candidate not in user.following
+    )
+    return counts.most_common(k)
+
+
+def main():
+    """Parses the command line and prints the time per suggestion."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--follows", type=int, default=1_000_000)
+    parser.add_argument("--suggestions", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the graph, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    workload = generate(args.users, args.follows, 0, 0, seed=args.seed)
+    social_network = SocialNetwork()
+    for name in workload.names:
+        social_network.add_user(name)
+    for name, following in workload.follows:
+        social_network.follows(name, following)
+
+    start = time.perf_counter()
+    graph = social_network.get_follow_graph()
+    print(
+        f"export of {graph.count_follows():,} edges: "
+        f"{(time.perf_counter() - start) * 1e3:,.0f} ms"
+    )
+
+    rng = random.Random(args.seed)
+    names = rng.choices(workload.names, k=args.suggestions)
+
+    def suggest_after_follow(name: str) -> list[str]:
+        social_network.follows(name, rng.choice(workload.names))
+        return social_network.suggest_follows(name, args.k)
+
+    methods = {
+        "csr": lambda name: social_network.suggest_follows(name, args.k),
+        "references": lambda name: suggest_by_reference(social_network, name, args.k),
+        "csr+follow": suggest_after_follow,
+    }
+    for label, suggest in methods.items():
+        start = time.perf_counter()
+        for name in names:
+            suggest(name)
+        elapsed = (time.perf_counter() - start) / len(names)
+        print(f"{label:<12}{elapsed * 1e3:>10,.3f} ms/suggestion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmarks the import time and the per-operation cost of logging.
+
+Importing the application must not configure logging, and debug records that
+are filtered out must not cost more than a level check. This benchmark reports
+the import time of the application module against an eager baseline, which
+also imports the modules the application only imports on demand (see
+`DEFERRED_MODULES`), as it did when they were imported at its top. It then
+reports the cost of `add_post` when
+logging is not configured, configured with debug records filtered out, and
+configured to write debug records to a file either from a background thread
+(the default) or synchronously.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_logging
+```
+"""
+
+import argparse
+import logging
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.sr_sw_dev import paths
+from src.sr_sw_dev.log_config import configure_logging
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+# The modules the application only imports on demand: its optional subsystems,
+# and the ones only needed to parse the command line, to read the logging
+# configuration or to label posts older than four weeks
+DEFERRED_MODULES = (
+    "argparse",
+    "configparser",
+    "logging.config",
+    "dateutil.relativedelta",
+    "src.sr_sw_dev.cache",
+    "src.sr_sw_dev.graph",
+    "src.sr_sw_dev.log_config",
+    "src.sr_sw_dev.metrics",
+    "src.sr_sw_dev.persistence",
+    "src.sr_sw_dev.retention",
+    "src.sr_sw_dev.search",
+)
+
+
+def measure_import(n_runs: int, modules: tuple[str, ...] = ()) -> float:
+    """
+    Returns the median import time of the application module, in ms.
+
+    Args:
+        n_runs:
+            The number of fresh interpreters to import it in.
+        modules:
+            The modules to import along with it, e.g. `DEFERRED_MODULES`.
+    """
+    imports = "".join(f"import {module}\n" for module in modules)
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import src.sr_sw_dev.social_networking\n"
+        f"{imports}"
+        "print(time.perf_counter() - start)\n"
+    )
+    timings = []
+    for _ in range(n_runs):
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            cwd=paths.root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(result.stdout))
+
+    return statistics.median(timings) * 1e3
+
+
+def measure_add_post(n_posts: int) -> float:
+    """Returns the mean latency of `add_post`, in µs."""
+    social_network = SocialNetwork()
+    social_network.add_user("Alice")
+
+    start = time.perf_counter()
+    for i in range(n_posts):
+        social_network.add_post("Alice", f"post number {i}")
+
+    return (time.perf_counter() - start) / n_posts * 1e6
+
+
+def main():
+    """Parses the command line and prints the cost of logging."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=200_000)
+    args = parser.parse_args()
+
+    imported = measure_import(args.runs)
+    baseline = measure_import(args.runs, DEFERRED_MODULES)
+    print(f"{'import':<16}{'ms':>12}")
+    print(f"{'application':<16}{imported:>12.1f}")
+    print(f"{'eager baseline':<16}{baseline:>12.1f}")
+    print()
+
+    results = {"unconfigured": measure_add_post(args.posts)}
+    with tempfile.TemporaryDirectory() as log_dir:
+        log_dir = Path(log_dir)
+        configure_logging(log_dir=log_dir)
+
+        # The records of the application are handled by its own logger, which
+        # does not propagate them to the root logger
+        logger = logging.getLogger("src.sr_sw_dev")
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        results["debug filtered"] = measure_add_post(args.posts)
+
+        logger.setLevel(level)
+        results["async file"] = measure_add_post(args.posts)
+
+        # Same configuration, but writing to the file from the calling thread
+        config = (paths.config_dir / "logger.ini").read_text()
+        sync_config_file = log_dir / "logger.ini"
+        sync_config_file.write_text(
+            config.replace(
+                "class=src.sr_sw_dev.log_config.AsyncFileHandler", "class=FileHandler"
+            )
+        )
+        configure_logging(sync_config_file, log_dir, force=True)
+        results["sync file"] = measure_add_post(args.posts)
+        logging.shutdown()
+
+    print(f"{'logging':<16}{'add_post µs':>12}")
+    for name, latency in results.items():
+        print(f"{name:<16}{latency:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmarks the memory used per post by the social network.
+
+It compares the columnar post store against the original representation, in
+which every post was an object with an instance `__dict__` holding its content
+and a full `datetime`, kept in a plain list per user. It also measures a tiered
+post store, which seals all but its newest posts into memory-mapped segments
+and only keeps the row ids of the cold posts in memory.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_memory --posts 1000000
+```
+"""
+
+import argparse
+from datetime import datetime
+import logging
+import tempfile
+import tracemalloc
+
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.store import PostStore
+
+
+class LegacyPost:
+    """A post as it was stored before the columnar post store."""
+
+    def __init__(self, content: str, timestamp: datetime):
+        """Initializes a legacy post."""
+        self.content = content
+        self.timestamp = timestamp
+
+
+def measure_legacy(n_users: int, n_posts: int) -> int:
+    """Returns the bytes allocated to hold the posts as legacy objects."""
+    tracemalloc.start()
+    timelines = {f"user{i}": [] for i in range(n_users)}
+    names = list(timelines)
+    before = tracemalloc.get_traced_memory()[0]
+
+    for i in range(n_posts):
+        timelines[names[i % n_users]].append(
+            LegacyPost(f"post number {i}", datetime.now().replace(microsecond=0))
+        )
+
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return allocated
+
+
+def measure_store(n_users: int, n_posts: int, store: PostStore | None = None) -> int:
+    """Returns the bytes allocated to hold the posts in the post store."""
+    tracemalloc.start()
+    social_network = SocialNetwork(store=store)
+    names = [f"user{i}" for i in range(n_users)]
+    for name in names:
+        social_network.add_user(name)
+    before = tracemalloc.get_traced_memory()[0]
+
+    for i in range(n_posts):
+        social_network.add_post(names[i % n_users], f"post number {i}")
+
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return allocated
+
+
+def main():
+    """Parses the command line and prints the bytes used per post."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--hot-posts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Measure the data structures, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    legacy = measure_legacy(args.users, args.posts)
+    store = measure_store(args.users, args.posts)
+    with tempfile.TemporaryDirectory() as segment_dir:
+        tiered_store = PostStore(segment_dir, args.hot_posts, args.hot_posts)
+        tiered = measure_store(args.users, args.posts, tiered_store)
+        tiered_store.close()
+
+    print(f"{'representation':<16}{'bytes/post':>12}")
+    print(f"{'objects':<16}{legacy / args.posts:>12.1f}")
+    print(f"{'post store':<16}{store / args.posts:>12.1f}")
+    print(f"{'tiered store':<16}{tiered / args.posts:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
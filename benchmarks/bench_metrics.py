@@ -0,0 +1,98 @@
+"""
+Benchmarks the overhead of measuring the operations of a social network.
+
+The same commands are run by an application without metrics, with metrics, and
+with metrics and the sampling profiler. The modes take turns, so that they are
+equally affected by the noise of the machine, and each is timed on its best
+run. Without metrics, the methods of the social network are not wrapped at
+all, so the first mode is the baseline.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_metrics --users 1000 --commands 100000
+```
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from src.sr_sw_dev.metrics import Metrics, SamplingProfiler
+from src.sr_sw_dev.social_networking import Application, SocialNetwork
+
+
+def generate(n_users: int, n_commands: int, seed: int) -> list[str]:
+    """Returns random posting, following and wall commands."""
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(n_users)]
+    commands = [f"{name} -> hello" for name in names]
+    for i in range(n_commands):
+        name, action = rng.choice(names), rng.random()
+        if action < 0.1:
+            commands.append(f"{name} follows {rng.choice(names)}")
+        elif action < 0.4:
+            commands.append(f"{name} -> post number {i}")
+        elif action < 0.7:
+            commands.append(name)
+        else:
+            commands.append(f"{name} wall")
+
+    return commands
+
+
+MODES = {
+    "disabled": (False, False),
+    "metrics": (True, False),
+    "metrics + profiler": (True, True),
+}
+
+
+def run(commands: list[str], metrics: bool, profile: bool) -> float:
+    """Returns the time to run the commands against a new application."""
+    registry = Metrics() if metrics else None
+    app = Application(SocialNetwork(metrics=registry), registry)
+    profiler = SamplingProfiler() if profile else None
+    if profiler is not None:
+        profiler.start()
+
+    start = time.perf_counter()
+    for command in commands:
+        app.parse_command(command)
+    elapsed = time.perf_counter() - start
+
+    if profiler is not None:
+        profiler.stop()
+
+    return elapsed
+
+
+def main():
+    """Parses the command line and prints the overhead of each mode."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the metrics, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    commands = generate(args.users, args.commands, args.seed)
+    best = dict.fromkeys(MODES, float("inf"))
+    for _ in range(args.repeat):
+        for label, (metrics, profile) in MODES.items():
+            best[label] = min(best[label], run(commands, metrics, profile))
+
+    baseline = best["disabled"]
+    print(f"{'mode':<22}{'ops/s':>12}{'overhead':>12}")
+    for label, elapsed in best.items():
+        print(
+            f"{label:<22}{len(commands) / elapsed:>12,.0f}"
+            f"{(elapsed / baseline - 1) * 100:>11.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmarks the throughput of the command parser of the application.
+
+It compares the original parser, which looked for every verb with a substring
+check and then split the command, against the single-pass tokenizer. Handlers
+are replaced with no-ops so that only parsing and dispatching are measured.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_parse --commands 1000000
+```
+"""
+
+import argparse
+import contextlib
+import logging
+import random
+import time
+
+from src.sr_sw_dev.social_networking import Application
+
+LEGACY_COMMANDS = {"->": "posting", "follows": "following", "wall": "wall"}
+
+
+def legacy_tokenize(command: str) -> tuple[str, str, str] | None:
+    """Splits a command as the original substring-based parser did."""
+    command = command.strip()
+    for cmd in LEGACY_COMMANDS:
+        if cmd in command:
+            username, predicate = command.split(cmd)
+            return LEGACY_COMMANDS[cmd], username.strip(), predicate.strip()
+
+    return None
+
+
+def build_commands(n_commands: int, seed: int) -> list[str]:
+    """Builds a mix of posting, following, wall and reading commands."""
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(1000)]
+    words = [
+        "the",
+        "weather",
+        "game",
+        "coffee",
+        "today",
+        "lost",
+        "good",
+        "New",
+        "York",
+        "anyone",
+    ]
+
+    commands = []
+    for _ in range(n_commands):
+        name, kind = rng.choice(names), rng.random()
+        if kind < 0.6:
+            message = " ".join(rng.choices(words, k=rng.randint(3, 12)))
+            commands.append(f"{name} -> {message}")
+        elif kind < 0.7:
+            commands.append(f"{name} follows {rng.choice(names)}")
+        elif kind < 0.85:
+            commands.append(f"{name} wall")
+        else:
+            commands.append(name)
+
+    return commands
+
+
+def main():
+    """Parses the command line and prints the parsing throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the parser, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    commands = build_commands(args.commands, args.seed)
+
+    application = Application()
+    for verb, action in list(application.commands.items()):
+        application.register_command(verb, action, lambda *_: None)
+    application.social_network.add_user("user0")
+
+    results = {}
+
+    start = time.perf_counter()
+    for command in commands:
+        legacy_tokenize(command)
+    results["legacy split"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for command in commands:
+        application.tokenize(command)
+    results["tokenize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for command in commands:
+        with contextlib.suppress(ValueError):
+            application.parse_command(command)
+    results["parse_command"] = time.perf_counter() - start
+
+    print(f"{'parser':<16}{'commands/s':>14}")
+    for name, elapsed in results.items():
+        print(f"{name:<16}{args.commands / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmarks a long ingest of posts with and without a retention policy.
+
+Posts are made in rounds, each a minute apart, by users following a handful of
+others. With a retention policy keeping the posts of the last few minutes, or
+ring buffers keeping the newest posts of each timeline, the social network is
+compacted after every round, so the memory of the post store and the latency of
+walls stay flat instead of growing with the ingest. Ring buffers bound the
+store even though some users (`--idle`) only ever post once.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_retention --rounds 20 --posts 50000 --max-age 5 --ring 10
+```
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import logging
+import random
+import time
+
+from src.sr_sw_dev.retention import Retention
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def run(args: argparse.Namespace, retention: Retention | None):
+    """Ingests the posts round after round and prints the cost of each round."""
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1)
+    social_network = SocialNetwork(retention=retention)
+    names = [f"user{i}" for i in range(args.users)]
+    for name in names:
+        social_network.add_user(name)
+    idle, names = names[: args.idle], names[args.idle :]
+    for name in idle:
+        social_network.add_post(name, "Hello", start)
+    for name in names:
+        for followee in rng.sample(names, args.following):
+            if followee != name:
+                social_network.follows(name, followee)
+    readers = rng.choices(names, k=args.walls)
+    store = social_network.store
+
+    print(f"{'round':>5}{'posts':>12}{'store MB':>10}{'compact ms':>12}{'wall ms':>10}")
+    for round_ in range(args.rounds):
+        now = start + timedelta(minutes=round_)
+        for i in range(args.posts):
+            social_network.add_post(rng.choice(names), f"post {round_} {i}", now)
+
+        elapsed = 0.0
+        if retention is not None:
+            begin = time.perf_counter()
+            social_network.compact(now)
+            elapsed = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for name in readers:
+            social_network.get_user_wall(name)
+        wall = (time.perf_counter() - begin) / len(readers)
+
+        print(
+            f"{round_:>5}{store.count_stored_posts():>12,}"
+            f"{store.nbytes() / 2**20:>10,.1f}"
+            f"{elapsed * 1e3:>12,.1f}{wall * 1e3:>10,.2f}"
+        )
+
+
+def main():
+    """Parses the command line and prints the cost of every round."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--following", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=50_000)
+    parser.add_argument("--walls", type=int, default=100)
+    parser.add_argument("--max-age", type=int, default=5)
+    parser.add_argument("--ring", type=int, default=10)
+    parser.add_argument("--idle", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the compactions, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    print("without retention")
+    run(args, None)
+    print(f"\nwith a retention of {args.max_age} minutes")
+    run(args, Retention(max_age=timedelta(minutes=args.max_age)))
+    print(f"\nwith ring buffers of {args.ring} posts")
+    run(args, Retention(max_posts=args.ring, ring=True))
+
+
+if __name__ == "__main__":
+    main()
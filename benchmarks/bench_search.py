@@ -0,0 +1,99 @@
+"""
+Benchmarks the latency of searching posts with an inverted index or a scan.
+
+Posts are made of words drawn from a Zipf-distributed vocabulary, like natural
+text, so some terms are in most posts and others in a handful. The index walks
+the posting list of the rarest term of a query, while the linear scan tokenizes
+posts newest-first until enough of them matched, which takes the whole store
+for rare terms.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_search --posts 1000000 --scan-repeat 1
+```
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from itertools import accumulate
+import logging
+import random
+import time
+
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+QUERIES = {
+    "common term": "w0",
+    "rare term": "w20000",
+    "common AND": "w0 w1",
+    "rare AND": "w2 w5000",
+    "prefix": "w12*",
+    "no match": "w3 w19999 w49999",
+}
+
+
+def populate(social_network: SocialNetwork, n_posts: int, n_words: int, seed: int):
+    """Adds users and random posts to a social network."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{rank}" for rank in range(n_words)]
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(n_words)))
+    names = [f"user{i}" for i in range(1000)]
+    for name in names:
+        social_network.add_user(name)
+
+    start = datetime.now() - timedelta(seconds=n_posts)
+    for i in range(n_posts):
+        name = rng.choice(names)
+        post = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=8))
+        timestamp = start + timedelta(seconds=i)
+        social_network.add_post(name, post, timestamp)
+
+
+def measure(social_network: SocialNetwork, query: str, repeat: int) -> float:
+    """Returns the best time to search for the newest matches, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        social_network.search(query, limit=20)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    """Parses the command line and prints the query latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--scan-repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the searches, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    # Both social networks share the posts, only one of them indexing them
+    indexed = SocialNetwork(index=InvertedIndex())
+    scanned = SocialNetwork(store=indexed.store)
+    start = time.perf_counter()
+    populate(indexed, args.posts, args.words, args.seed)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.posts:,} posts, {indexed.index.count_terms():,} terms "
+        f"indexed in {elapsed:.1f} s"
+    )
+
+    print(f"{'query':<14}{'index (us)':>14}{'scan (ms)':>14}{'speedup':>12}")
+    for label, query in QUERIES.items():
+        index_time = measure(indexed, query, args.repeat)
+        scan_time = measure(scanned, query, args.scan_repeat)
+        print(
+            f"{label:<14}{index_time * 1e6:>14,.1f}{scan_time * 1e3:>14,.1f}"
+            f"{scan_time / index_time:>11,.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
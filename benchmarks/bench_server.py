@@ -0,0 +1,143 @@
+"""
+Generates load against the command server and reports latency percentiles.
+
+Each client keeps up to `--pipeline` commands in flight over its connection,
+mixing wall reads, posts and follows. The latency of a command spans from when
+it is sent to when its response is read, so it includes the time it waited
+behind the commands pipelined before it.
+
+Unless the address of a running server is given, a server is started in a
+background thread of this process.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_server --clients 32 --pipeline 8
+python -m benchmarks.bench_server --port 8023 --requests 100000
+```
+"""
+
+import argparse
+import asyncio
+from collections import deque
+import contextlib
+import logging
+import random
+import statistics
+import threading
+import time
+
+from src.sr_sw_dev.server import CommandClient, CommandServer
+from src.sr_sw_dev.social_networking import Application
+
+
+def build_commands(n_commands: int, n_users: int, rng: random.Random) -> list[str]:
+    """Builds a mix of wall reads, posts and follows."""
+    commands = []
+    for i in range(n_commands):
+        name, kind = f"user{rng.randrange(n_users)}", rng.random()
+        if kind < 0.2:
+            commands.append(f"{name} -> post number {i}")
+        elif kind < 0.3:
+            commands.append(f"{name} follows user{rng.randrange(n_users)}")
+        else:
+            commands.append(f"{name} wall")
+
+    return commands
+
+
+async def run_client(
+    host: str, port: int, commands: list[str], pipeline: int
+) -> list[float]:
+    """Sends commands with up to `pipeline` in flight, returning their latencies."""
+    client = await CommandClient.connect(host, port)
+    latencies, sent = [], deque()
+    i = 0
+    while i < len(commands) or sent:
+        while i < len(commands) and len(sent) < pipeline:
+            client.send([commands[i]])
+            sent.append(time.perf_counter())
+            i += 1
+        await client.writer.drain()
+
+        # Unknown users and self-follows are expected to fail
+        with contextlib.suppress(ValueError):
+            await client.receive()
+        latencies.append(time.perf_counter() - sent.popleft())
+
+    await client.close()
+    return latencies
+
+
+async def generate_load(
+    host: str, port: int, n_clients: int, n_requests: int, pipeline: int, seed: int
+) -> tuple[list[float], float]:
+    """Runs the clients concurrently, returning the latencies and elapsed seconds."""
+    rng = random.Random(seed)
+    n_users = 1000
+
+    # Create the users first so that reads are not dominated by errors
+    setup = await CommandClient.connect(host, port)
+    for i in range(n_users):
+        await setup.request(f"user{i} -> hello from user{i}")
+    await setup.close()
+
+    workloads = [
+        build_commands(n_requests // n_clients, n_users, rng) for _ in range(n_clients)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_client(host, port, commands, pipeline) for commands in workloads)
+    )
+
+    return [latency for latencies in results for latency in latencies], (
+        time.perf_counter() - start
+    )
+
+
+def start_server_thread() -> int:
+    """Starts a server in a background thread, returning its port."""
+    started = threading.Event()
+    port = 0
+
+    async def serve():
+        nonlocal port
+        server = CommandServer(Application())
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+    return port
+
+
+def main():
+    """Parses the command line and prints the throughput and latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--pipeline", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the server, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    port = args.port if args.port is not None else start_server_thread()
+    latencies, elapsed = asyncio.run(
+        generate_load(
+            args.host, port, args.clients, args.requests, args.pipeline, args.seed
+        )
+    )
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"requests/s  {len(latencies) / elapsed:>12,.0f}")
+    print(f"p50 (ms)    {percentiles[49] * 1000:>12.2f}")
+    print(f"p99 (ms)    {percentiles[98] * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmarks the throughput of a sharded social network from 1 to 8 shards.
+
+Users are partitioned across worker processes, which serve batches of wall
+reads (`get_user_walls`) and posts (`add_posts`) in parallel while the
+coordinator routes requests and merges the partial walls. The in-process
+social network is shown as a baseline, without the cost of sending requests
+and results between processes.
+
+The throughput is reported for several batch sizes, since every batch costs a
+pipe round trip to each shard it involves (two for walls: the following
+lists, then the partial walls). With small batches these round trips
+dominate, and throughput falls as shards are added, as it does for
+single-user calls. Sharding only pays off for batches of a few hundred
+operations or more, once the work of each shard outweighs its round trips.
+
+Even then, throughput can only scale up to the number of cores of the
+machine, as each shard is a process that needs a core of its own, and up to
+the share of the work left to the coordinator, which merges and renders every
+wall. With fewer cores than shards, the shards and the coordinator share the
+cores while every operation also pays for pickling its request and result, so
+throughput falls as shards are added whatever the batch size.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_sharding --users 10000 --batches 10 100 1000
+```
+"""
+
+import argparse
+from datetime import datetime
+import logging
+import os
+import random
+import time
+
+from src.sr_sw_dev.sharding import ShardedSocialNetwork
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def populate(
+    social_network: SocialNetwork | ShardedSocialNetwork, names: list[str], seed: int
+):
+    """Adds users, follows and some history to a social network."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    for name in names:
+        social_network.add_user(name)
+    for name in names:
+        for following in rng.sample(names, 20):
+            social_network.follows(name, following)
+    posts = [
+        (rng.choice(names), f"post number {i}", now) for i in range(len(names) * 5)
+    ]
+    if isinstance(social_network, ShardedSocialNetwork):
+        social_network.add_posts(posts)
+    else:
+        for name, post, timestamp in posts:
+            social_network.add_post(name, post, timestamp)
+
+
+def run(
+    social_network: SocialNetwork | ShardedSocialNetwork,
+    names: list[str],
+    n_operations: int,
+    batch_size: int,
+    write_ratio: float,
+    seed: int,
+) -> float:
+    """Runs batches of wall reads and posts, returning the elapsed seconds."""
+    rng = random.Random(seed)
+    batches = []
+    for i in range(n_operations // batch_size):
+        batch = [rng.choice(names) for _ in range(batch_size)]
+        batches.append((rng.random() < write_ratio, i, batch))
+
+    start = time.perf_counter()
+    for is_write, i, batch in batches:
+        if isinstance(social_network, ShardedSocialNetwork):
+            if is_write:
+                social_network.add_posts((name, f"post {i}", None) for name in batch)
+            else:
+                social_network.get_user_walls(batch, 10)
+        else:
+            for name in batch:
+                if is_write:
+                    social_network.add_post(name, f"post {i}")
+                else:
+                    social_network.get_user_wall(name, 10)
+
+    return time.perf_counter() - start
+
+
+def report(
+    label: str,
+    social_network: SocialNetwork | ShardedSocialNetwork,
+    names: list[str],
+    args: argparse.Namespace,
+):
+    """Populates a social network and prints its throughput per batch size."""
+    populate(social_network, names, args.seed)
+    row = f"{label:<12}"
+    for batch_size in args.batches:
+        elapsed = run(
+            social_network,
+            names,
+            args.operations,
+            batch_size,
+            args.write_ratio,
+            args.seed,
+        )
+        row += f"{args.operations / elapsed:>12,.0f}"
+    print(row)
+
+
+def main():
+    """Parses the command line and prints the throughput per shard count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--operations", type=int, default=20_000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the sharding, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    names = [f"user{i}" for i in range(args.users)]
+    print(f"cores: {os.cpu_count()}")
+    print("ops/s per batch size")
+    print(f"{'shards':<12}" + "".join(f"{size:>12,}" for size in args.batches))
+
+    report("in-process", SocialNetwork(), names, args)
+    for n_shards in (1, 2, 4, 8):
+        with ShardedSocialNetwork(n_shards) as social_network:
+            report(str(n_shards), social_network, names, args)
+
+
+if __name__ == "__main__":
+    main()
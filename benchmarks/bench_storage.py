@@ -0,0 +1,96 @@
+"""
+Benchmarks the storage backends of a social network.
+
+The same users, follows and posts are written to the in-memory backend and to
+SQLite databases with several post batch sizes, then the walls of random users
+are read. Batching amortizes the cost of a SQLite transaction over many posts,
+while walls are read with a single indexed query.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_storage --users 10000 --posts 200000
+```
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import logging
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.storage import SqliteBackend
+
+
+def ingest(
+    social_network: SocialNetwork, names: list[str], n_posts: int, seed: int
+) -> float:
+    """Adds users, follows and posts, returning the seconds spent on the posts."""
+    rng = random.Random(seed)
+    for name in names:
+        social_network.add_user(name)
+    for name in names:
+        for following in rng.sample(names, 20):
+            social_network.follows(name, following)
+
+    start = datetime.now() - timedelta(seconds=n_posts)
+    posts = [
+        (rng.choice(names), f"post number {i}", start + timedelta(seconds=i))
+        for i in range(n_posts)
+    ]
+    begin = time.perf_counter()
+    for name, post, timestamp in posts:
+        social_network.add_post(name, post, timestamp)
+
+    return time.perf_counter() - begin
+
+
+def read_walls(
+    social_network: SocialNetwork, names: list[str], n_reads: int, seed: int
+) -> float:
+    """Reads the walls of random users, returning the elapsed seconds."""
+    rng = random.Random(seed)
+    readers = [rng.choice(names) for _ in range(n_reads)]
+    begin = time.perf_counter()
+    for name in readers:
+        social_network.get_user_wall(name, 20)
+
+    return time.perf_counter() - begin
+
+
+def main():
+    """Parses the command line and prints the throughput of each backend."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--reads", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the backends, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    names = [f"user{i}" for i in range(args.users)]
+    print(f"{'backend':<20}{'posts/s':>12}{'wall µs':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {"memory": None}
+        for batch_size in (1, 256, 4096):
+            path = Path(directory) / f"batch{batch_size}.db"
+            backends[f"sqlite batch={batch_size}"] = (path, batch_size)
+
+        for label, options in backends.items():
+            backend = None if options is None else SqliteBackend(*options)
+            social_network = SocialNetwork(backend=backend)
+            writing = ingest(social_network, names, args.posts, args.seed)
+            reading = read_walls(social_network, names, args.reads, args.seed)
+            social_network.backend.close()
+            print(
+                f"{label:<20}{args.posts / writing:>12,.0f}"
+                f"{reading / args.reads * 1e6:>12,.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
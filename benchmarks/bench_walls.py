@@ -0,0 +1,132 @@
+"""
+Benchmarks the read and write latency of the wall modes of a social network.
+
+Three modes are compared on the same synthetic workload:
+- pull: walls are merged from the timelines on every read.
+- push: every post is fanned out to the wall buffers of all the followers.
+- hybrid: authors with many followers are pulled, everyone else is pushed.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.bench_walls --users 100000
+```
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.walls import FanoutWalls
+
+
+def build_workload(
+    n_users: int, n_follows: int, n_posts: int, seed: int
+) -> tuple[list[str], list[tuple[str, str]], list[str]]:
+    """
+    Builds a skewed follow graph and the authors of a sequence of posts.
+
+    A few users attract most of the followers, which is what makes the pure
+    fan-out-on-write mode expensive for them.
+    """
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(n_users)]
+
+    follows = set()
+    while len(follows) < n_follows:
+        name = rng.choice(names)
+        following = names[int(n_users * rng.random() ** 3)]
+        if name != following:
+            follows.add((name, following))
+
+    authors = [rng.choice(names) for _ in range(n_posts)]
+
+    return names, sorted(follows), authors
+
+
+def run(
+    mode: str,
+    names: list[str],
+    follows: list[tuple[str, str]],
+    authors: list[str],
+    n_reads: int,
+    seed: int,
+    capacity: int,
+    celebrity_threshold: int,
+) -> dict[str, float]:
+    """Runs the workload in the given mode and returns latencies in µs."""
+    if mode == "pull":
+        fanout = None
+    elif mode == "push":
+        fanout = FanoutWalls(capacity, celebrity_threshold=len(names) + 1)
+    else:
+        fanout = FanoutWalls(capacity, celebrity_threshold=celebrity_threshold)
+
+    social_network = SocialNetwork(fanout=fanout)
+    for name in names:
+        social_network.add_user(name)
+
+    start = time.perf_counter()
+    for name, following in follows:
+        social_network.follows(name, following)
+    follow_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, author in enumerate(authors):
+        social_network.add_post(author, f"post {i}")
+    write_time = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    readers = [rng.choice(names) for _ in range(n_reads)]
+    start = time.perf_counter()
+    for name in readers:
+        social_network.get_user_wall(name, limit=20)
+    read_time = time.perf_counter() - start
+
+    return {
+        "follow_us": follow_time / len(follows) * 1e6,
+        "write_us": write_time / len(authors) * 1e6,
+        "read_us": read_time / n_reads * 1e6,
+    }
+
+
+def main():
+    """Parses the command line and prints a comparison of the wall modes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--follows", type=int, default=1_000_000)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--reads", type=int, default=10_000)
+    parser.add_argument("--capacity", type=int, default=200)
+    parser.add_argument("--celebrity-threshold", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Measure the data structures, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    names, follows, authors = build_workload(
+        args.users, args.follows, args.posts, args.seed
+    )
+
+    print(f"{'mode':<8}{'follow µs':>12}{'write µs':>12}{'read µs':>12}")
+    for mode in ("pull", "push", "hybrid"):
+        result = run(
+            mode,
+            names,
+            follows,
+            authors,
+            args.reads,
+            args.seed,
+            args.capacity,
+            args.celebrity_threshold,
+        )
+        print(
+            f"{mode:<8}{result['follow_us']:>12.1f}"
+            f"{result['write_us']:>12.1f}{result['read_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Runs the benchmark suite of the social network and compares it between runs.
+
+Every benchmark runs against a social network populated from the same seeded
+workload (see `benchmarks.workload`):
+- micro: each method of the social network and each command verb of the
+  application, called on arguments drawn from the workload. Reads share one
+  social network, which they never change. Writes run on a freshly populated
+  one every round, so that their results neither depend on the other
+  benchmarks nor on which ones `--filter` selects.
+- replay: the commands of read-heavy, mixed and write-heavy workloads, run
+  end to end through the application.
+
+Each benchmark runs several rounds and reports the median and minimum time per
+operation in microseconds. The results are written as JSON, and compared to
+the ones of a previous run to flag the benchmarks that got slower (or faster)
+by more than a threshold.
+
+Run it from the root directory of this project:
+```
+python -m benchmarks.suite --output baseline.json
+python -m benchmarks.suite --baseline baseline.json --output results.json
+```
+"""
+
+import argparse
+from collections.abc import Callable
+from datetime import datetime
+import json
+import logging
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.workload import Workload, generate, to_commands
+from src.sr_sw_dev.retention import Retention
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import Application, SocialNetwork
+
+# A benchmark returns the calls of one round, each a function and its arguments
+Calls = list[tuple[Callable, tuple]]
+Benchmark = Callable[[Application, Workload, random.Random, int], Calls]
+
+REPLAY_MIXES = {"read-heavy": 0.9, "mixed": 0.5, "write-heavy": 0.1}
+
+# The micro-benchmarks changing the social network, which are run on a freshly
+# populated one every round
+WRITES = frozenset(
+    {
+        "add_user",
+        "add_post",
+        "follows",
+        "unfollows",
+        "parse_command.post",
+        "parse_command.follows",
+        "parse_command.unfollows",
+    }
+)
+
+
+def populate(workload: Workload, retention: Retention | None = None) -> Application:
+    """Returns an application whose social network holds the workload."""
+    social_network = SocialNetwork(index=InvertedIndex(), retention=retention)
+    for name in workload.names:
+        social_network.add_user(name)
+    for name, following in workload.follows:
+        social_network.follows(name, following)
+    for name, post, timestamp in workload.posts:
+        social_network.add_post(name, post, timestamp)
+
+    return Application(social_network)
+
+
+def micro_benchmarks() -> dict[str, Benchmark]:
+    """Returns the micro-benchmarks, by name."""
+
+    def method(name: str, arguments: Callable) -> Benchmark:
+        """Returns a benchmark calling a method of the social network."""
+
+        def calls(
+            app: Application, workload: Workload, rng: random.Random, size: int
+        ) -> Calls:
+            function = getattr(app.get_social_network(), name)
+            return [(function, arguments(workload, rng, i)) for i in range(size)]
+
+        return calls
+
+    def command(template: Callable) -> Benchmark:
+        """Returns a benchmark parsing commands of the application."""
+
+        def calls(
+            app: Application, workload: Workload, rng: random.Random, size: int
+        ) -> Calls:
+            return [
+                (app.parse_command, (template(workload, rng, i),)) for i in range(size)
+            ]
+
+        return calls
+
+    def unchanged(kind: str) -> Benchmark:
+        """Returns a benchmark reading unchanged timelines or walls conditionally."""
+
+        def calls(
+            app: Application, workload: Workload, rng: random.Random, size: int
+        ) -> Calls:
+            social_network = app.get_social_network()
+            read = getattr(social_network, f"get_user_{kind}")
+            version = getattr(social_network, f"get_{kind}_version")
+            names = [user(workload, rng) for _ in range(size)]
+            if kind == "wall":
+                return [(read, (name, None, None, version(name))) for name in names]
+            return [(read, (name, version(name))) for name in names]
+
+        return calls
+
+    def unfollows(
+        app: Application, workload: Workload, rng: random.Random, size: int
+    ) -> Calls:
+        """Removes distinct follow edges, so that none of the calls is a no-op."""
+        social_network = app.get_social_network()
+        edges = [
+            (name, following)
+            for name in workload.names
+            for following in social_network.get_following(name)
+        ]
+        return [
+            (social_network.unfollows, edge)
+            for edge in rng.sample(edges, min(size, len(edges)))
+        ]
+
+    def follow_graph(
+        app: Application, workload: Workload, rng: random.Random, size: int
+    ) -> Calls:
+        """Exports the follow graph once, as it is cached until the next follow."""
+        social_network = populate(workload).get_social_network()
+        return [(social_network.get_follow_graph, ())]
+
+    def suggestions(
+        app: Application, workload: Workload, rng: random.Random, size: int
+    ) -> Calls:
+        """Suggests users to follow from the follow graph, exported beforehand."""
+        social_network = app.get_social_network()
+        social_network.get_follow_graph()
+        return [
+            (social_network.suggest_follows, (user(workload, rng),))
+            for _ in range(size)
+        ]
+
+    def compactions(
+        app: Application, workload: Workload, rng: random.Random, size: int
+    ) -> Calls:
+        """
+        Compacts a social network keeping the 10 newest posts of each timeline.
+
+        The three compactions trim the timelines, remove the trimmed posts from
+        the index and drop them from the post store.
+        """
+        retention = Retention(max_posts=10)
+        social_network = populate(workload, retention).get_social_network()
+        return [(social_network.compact, ())] * 3
+
+    def user(workload: Workload, rng: random.Random) -> str:
+        return rng.choice(workload.names)
+
+    def words(workload: Workload, rng: random.Random) -> str:
+        return rng.choice(workload.posts)[1]
+
+    # A counter keeps the names of the new users unique across rounds
+    new_users = iter(range(sys.maxsize))
+
+    return {
+        "add_user": method("add_user", lambda w, rng, i: (f"new{next(new_users)}",)),
+        "add_post": method("add_post", lambda w, rng, i: (user(w, rng), words(w, rng))),
+        "follows": method("follows", lambda w, rng, i: (user(w, rng), user(w, rng))),
+        "unfollows": unfollows,
+        "has_user": method("has_user", lambda w, rng, i: (user(w, rng),)),
+        "count_users": method("count_users", lambda w, rng, i: ()),
+        "count_follows": method("count_follows", lambda w, rng, i: ()),
+        "is_following": method(
+            "is_following", lambda w, rng, i: (user(w, rng), user(w, rng))
+        ),
+        "get_following": method("get_following", lambda w, rng, i: (user(w, rng),)),
+        "get_followers": method("get_followers", lambda w, rng, i: (user(w, rng),)),
+        "get_user_id": method("get_user_id", lambda w, rng, i: (user(w, rng),)),
+        "get_follow_graph": follow_graph,
+        "suggest_follows": suggestions,
+        "get_timeline_version": method(
+            "get_timeline_version", lambda w, rng, i: (user(w, rng),)
+        ),
+        "get_wall_version": method(
+            "get_wall_version", lambda w, rng, i: (user(w, rng),)
+        ),
+        "get_user_timeline": method(
+            "get_user_timeline", lambda w, rng, i: (user(w, rng),)
+        ),
+        "get_user_wall": method("get_user_wall", lambda w, rng, i: (user(w, rng),)),
+        "get_user_wall.limit": method(
+            "get_user_wall", lambda w, rng, i: (user(w, rng), 20)
+        ),
+        "get_user_timeline.unchanged": unchanged("timeline"),
+        "get_user_wall.unchanged": unchanged("wall"),
+        "get_timeline_page": method(
+            "get_timeline_page", lambda w, rng, i: (user(w, rng),)
+        ),
+        "get_wall_page": method("get_wall_page", lambda w, rng, i: (user(w, rng),)),
+        "search": method(
+            "search", lambda w, rng, i: (" ".join(words(w, rng).split()[:2]),)
+        ),
+        "compact": compactions,
+        "parse_command.post": command(
+            lambda w, rng, i: f"{user(w, rng)} -> {words(w, rng)}"
+        ),
+        "parse_command.follows": command(
+            lambda w, rng, i: f"{user(w, rng)} follows {user(w, rng)}"
+        ),
+        "parse_command.unfollows": command(
+            lambda w, rng, i: "{} unfollows {}".format(*rng.choice(w.follows))
+        ),
+        "parse_command.timeline": command(lambda w, rng, i: user(w, rng)),
+        "parse_command.wall": command(lambda w, rng, i: f"{user(w, rng)} wall"),
+        "parse_command.search": command(
+            lambda w, rng, i: f"search {words(w, rng).split()[0]}"
+        ),
+    }
+
+
+def measure(calls: Calls) -> float:
+    """Runs calls and returns the mean time per call, in microseconds."""
+    start = time.perf_counter()
+    for function, arguments in calls:
+        function(*arguments)
+
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def summarize(samples: list[float]) -> dict[str, float | int]:
+    """Returns the statistics of the rounds of a benchmark."""
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "rounds": len(samples),
+    }
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, dict[str, float | int]]:
+    """Runs the benchmarks matching the filter and returns their statistics."""
+    pattern = re.compile(args.filter)
+    results = {}
+
+    workload = generate(
+        args.users, args.follows, args.posts, 0, exponent=args.exponent, seed=args.seed
+    )
+    app = populate(workload)
+    for name, benchmark in micro_benchmarks().items():
+        if not pattern.search(f"micro.{name}"):
+            continue
+
+        rng = random.Random(args.seed)
+        samples = []
+        for _ in range(args.rounds):
+            target = populate(workload) if name in WRITES else app
+            samples.append(measure(benchmark(target, workload, rng, args.calls)))
+        results[f"micro.{name}"] = summarize(samples)
+        print(f"micro.{name:<30}{results[f'micro.{name}']['median_us']:>12,.2f} us")
+
+    for name, read_ratio in REPLAY_MIXES.items():
+        if not pattern.search(f"replay.{name}"):
+            continue
+
+        workload = generate(
+            args.users,
+            args.follows,
+            args.posts,
+            args.operations,
+            read_ratio,
+            args.exponent,
+            args.seed,
+        )
+        commands = to_commands(workload.operations)
+        samples = []
+        for _ in range(args.rounds):
+            replayed = populate(workload)
+            samples.append(measure([(replayed.parse_command, (c,)) for c in commands]))
+        results[f"replay.{name}"] = summarize(samples)
+        print(f"replay.{name:<29}{results[f'replay.{name}']['median_us']:>12,.2f} us")
+
+    return results
+
+
+def compare(
+    baseline: dict[str, dict], results: dict[str, dict], threshold: float
+) -> list[str]:
+    """
+    Compares the results of two runs.
+
+    Args:
+        baseline:
+            The results of the previous run.
+        results:
+            The results of the current run.
+        threshold:
+            The relative change of the median beyond which a benchmark is
+            flagged (e.g. 0.1 for 10%).
+
+    Returns:
+        The names of the benchmarks that got slower.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before, after = baseline[name]["median_us"], result["median_us"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improvement"
+        print(f"{name:<36}{before:>12,.2f}{after:>12,.2f}{change:>+10.1%}{flag}")
+
+    return regressions
+
+
+def main():
+    """Parses the command line, runs the suite and compares it to a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--follows", type=int, default=20_000)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--exponent", type=float, default=1.0)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--filter", default="", help="only run the benchmarks matching a regex"
+    )
+    parser.add_argument("--output", metavar="FILE", help="write the results to FILE")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="compare the results to the ones in FILE"
+    )
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Measure the social network, not the cost of writing debug logs
+    logging.disable(logging.CRITICAL)
+
+    results = run_suite(args)
+    if args.output is not None:
+        document = {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "parameters": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "baseline", "threshold")
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(document, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
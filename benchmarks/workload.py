@@ -0,0 +1,156 @@
+"""
+A seeded generator of realistic social network workloads.
+
+Real social networks are skewed: a few users attract most of the followers,
+and a few users write most of the posts, both following power laws. A
+workload draws the followees and the authors from Zipf distributions over
+the users (each over its own random ranking, so that prolific authors are not
+necessarily popular), the words of the posts from a Zipf vocabulary, and
+interleaves reads and writes in a configurable mix.
+
+The same parameters and seed always generate the same workload, so that
+benchmark runs can be compared.
+"""
+
+from datetime import datetime, timedelta
+from itertools import accumulate
+import random
+from typing import NamedTuple
+
+EPOCH = datetime(2024, 1, 1)
+
+
+class Workload(NamedTuple):
+    """
+    A synthetic social network and a sequence of operations to run against it.
+
+    Attributes:
+        names:
+            The names of the users.
+        follows:
+            The follow edges, as (follower, followee) pairs.
+        posts:
+            The posts written before the operations, as (author, content,
+            timestamp) triples in chronological order.
+        operations:
+            The operations, as (action, name, argument) triples: "post" (with
+            the content), "follow" (with the followee), "timeline" or "wall".
+    """
+
+    names: list[str]
+    follows: list[tuple[str, str]]
+    posts: list[tuple[str, str, datetime]]
+    operations: list[tuple[str, str, str]]
+
+
+class ZipfSampler:
+    """
+    Draws items with probabilities inversely proportional to a power of their rank.
+
+    Attributes:
+        rng:
+            The random number generator.
+        ranking:
+            The items, most frequent first.
+        cum_weights:
+            The cumulative weights of the items.
+    """
+
+    def __init__(self, rng: random.Random, items: list[str], exponent: float):
+        """
+        Ranks the items randomly.
+
+        Args:
+            rng:
+                The random number generator.
+            items:
+                The items to draw.
+            exponent:
+                The exponent of the Zipf law (the larger, the more skewed).
+        """
+        self.rng = rng
+        self.ranking = rng.sample(items, len(items))
+        self.cum_weights = list(
+            accumulate(1 / (rank + 1) ** exponent for rank in range(len(items)))
+        )
+
+    def sample(self, k: int = 1) -> list[str]:
+        """Returns k items, drawn with replacement."""
+        return self.rng.choices(self.ranking, cum_weights=self.cum_weights, k=k)
+
+
+def generate(
+    n_users: int = 1000,
+    n_follows: int = 20_000,
+    n_posts: int = 20_000,
+    n_operations: int = 10_000,
+    read_ratio: float = 0.8,
+    exponent: float = 1.0,
+    seed: int = 42,
+) -> Workload:
+    """
+    Generates a workload.
+
+    Args:
+        n_users:
+            The number of users.
+        n_follows:
+            The number of follow edges, whose followees follow a Zipf law.
+        n_posts:
+            The number of posts written before the operations, whose authors
+            follow a Zipf law.
+        n_operations:
+            The number of operations.
+        read_ratio:
+            The share of the operations that read a wall (70%) or a timeline
+            (30%). The others write a post (90%) or follow a user (10%).
+        exponent:
+            The exponent of the Zipf laws (the larger, the more skewed).
+        seed:
+            The seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    names = [f"user{i}" for i in range(n_users)]
+    followees = ZipfSampler(rng, names, exponent)
+    authors = ZipfSampler(rng, names, exponent)
+    words = ZipfSampler(rng, [f"w{i}" for i in range(10_000)], exponent)
+
+    follows = set()
+    while len(follows) < min(n_follows, n_users * (n_users - 1)):
+        follower, (followee,) = rng.choice(names), followees.sample()
+        if follower != followee:
+            follows.add((follower, followee))
+
+    posts = [
+        (author, " ".join(words.sample(8)), EPOCH + timedelta(seconds=i))
+        for i, author in enumerate(authors.sample(n_posts))
+    ]
+
+    operations = []
+    for _ in range(n_operations):
+        if rng.random() < read_ratio:
+            action = "wall" if rng.random() < 0.7 else "timeline"
+            operations.append((action, rng.choice(names), ""))
+        elif rng.random() < 0.9:
+            (author,) = authors.sample()
+            operations.append(("post", author, " ".join(words.sample(8))))
+        else:
+            operations.append(("follow", rng.choice(names), followees.sample()[0]))
+
+    return Workload(names, sorted(follows), posts, operations)
+
+
+def to_commands(operations: list[tuple[str, str, str]]) -> list[str]:
+    """Returns the commands of the application running the operations."""
+    commands = []
+    for action, name, argument in operations:
+        if action == "post":
+            commands.append(f"{name} -> {argument}")
+        elif action == "follow":
+            commands.append(f"{name} follows {argument}")
+        elif action == "wall":
+            commands.append(f"{name} wall")
+        else:
+            commands.append(name)
+
+    return commands
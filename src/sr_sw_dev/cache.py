@@ -0,0 +1,241 @@
+"""A cache of the timelines and walls read from a social network."""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from datetime import datetime
+import threading
+import time
+from typing import NamedTuple
+
+from src.sr_sw_dev.elapsed import format_elapsed_times
+
+
+class CachedView(NamedTuple):
+    """
+    A timeline or wall whose elapsed-time labels are left to render.
+
+    Attributes:
+        prefixes:
+            The rendered posts without their labels (e.g. "Alice - Hello").
+        timestamps:
+            The timestamps of the posts, to compute their labels against.
+        expires:
+            The monotonic time after which the view is stale (None if never).
+    """
+
+    prefixes: list[str]
+    timestamps: list[datetime]
+    expires: float | None
+
+
+class RenderCache:
+    """
+    A bounded LRU cache of timelines and walls, keyed by user.
+
+    A cached view keeps the ordering and the text of the posts, so a hit only
+    computes the elapsed-time labels again, which go stale as time passes. The
+    social network invalidates views precisely when they change: a new post
+    invalidates the timeline and wall of its author and the walls of their
+    followers, and a follow or unfollow invalidates the follower's wall.
+
+    The cache is thread-safe. Each user has a generation, bumped whenever their
+    views are invalidated, so that a view computed while a write invalidated it
+    is not cached.
+
+    Attributes:
+        capacity:
+            The maximum number of cached views.
+        ttl:
+            The number of seconds after which a view expires (None if never).
+        views:
+            The cached views, from least to most recently used.
+        keys:
+            The keys of the cached views of each user.
+        generations:
+            The number of invalidations of the views of each user.
+        hits:
+            The number of reads served from the cache.
+        misses:
+            The number of reads that were not cached.
+        evictions:
+            The number of views evicted to respect the capacity.
+        invalidations:
+            The number of views invalidated by writes or expired.
+    """
+
+    def __init__(self, capacity: int = 10_000, ttl: float | None = None):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity:
+                The maximum number of cached views.
+            ttl:
+                The number of seconds after which a view expires (None if
+                never), as a safety net on top of the invalidations.
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.views: OrderedDict[tuple, CachedView] = OrderedDict()
+        self.keys: dict[str, set[tuple]] = {}
+        self.generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, kind: str, name: str, *args: Hashable) -> CachedView | None:
+        """
+        Returns a cached view, marking it as recently used.
+
+        Args:
+            kind:
+                The kind of view (e.g. "wall" or "timeline").
+            name:
+                The name of the user the view belongs to.
+            args:
+                The other arguments the view depends on (e.g. its limit).
+
+        Returns:
+            The cached view, or None if it is not cached or expired.
+        """
+        key = (kind, name, *args)
+        with self._lock:
+            view = self.views.get(key)
+            if (
+                view is not None
+                and view.expires is not None
+                and view.expires < time.monotonic()
+            ):
+                self._discard(key)
+                self.invalidations += 1
+                view = None
+
+            if view is None:
+                self.misses += 1
+                return None
+
+            self.views.move_to_end(key)
+            self.hits += 1
+            return view
+
+    def generation(self, name: str) -> int:
+        """Returns the generation of a user's views, to read before a miss."""
+        return self.generations.get(name, 0)
+
+    def put(
+        self,
+        kind: str,
+        name: str,
+        *args: Hashable,
+        prefixes: list[str],
+        timestamps: list[datetime],
+        generation: int | None = None,
+    ) -> CachedView:
+        """
+        Caches a view, evicting the least recently used ones if full.
+
+        Args:
+            kind:
+                The kind of view (e.g. "wall" or "timeline").
+            name:
+                The name of the user the view belongs to.
+            args:
+                The other arguments the view depends on (e.g. its limit).
+            prefixes:
+                The rendered posts without their labels.
+            timestamps:
+                The timestamps of the posts.
+            generation:
+                The generation of the user's views before the view was computed.
+                The view is not cached if they were invalidated since.
+
+        Returns:
+            The view.
+        """
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        view = CachedView(prefixes, timestamps, expires)
+        if self.capacity <= 0:
+            return view
+
+        key = (kind, name, *args)
+        with self._lock:
+            if generation is not None and generation != self.generation(name):
+                return view
+
+            self.views[key] = view
+            self.views.move_to_end(key)
+            self.keys.setdefault(name, set()).add(key)
+
+            while len(self.views) > self.capacity:
+                self._discard(next(iter(self.views)))
+                self.evictions += 1
+
+        return view
+
+    def invalidate(self, name: str, kind: str | None = None):
+        """
+        Invalidates the cached views of a user.
+
+        Args:
+            name:
+                The name of the user.
+            kind:
+                The kind of views to invalidate (all of them if None).
+        """
+        with self._lock:
+            self.generations[name] = self.generations.get(name, 0) + 1
+            for key in list(self.keys.get(name, ())):
+                if kind is None or key[0] == kind:
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Invalidates every cached view."""
+        with self._lock:
+            for name in self.keys:
+                self.generations[name] = self.generations.get(name, 0) + 1
+            self.invalidations += len(self.views)
+            self.views.clear()
+            self.keys.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters of the cache, along with its size."""
+        with self._lock:
+            return {
+                "size": len(self.views),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def render(view: CachedView, now: datetime | None = None) -> list[str]:
+        """
+        Renders a cached view with fresh elapsed-time labels.
+
+        Args:
+            view:
+                The cached view.
+            now:
+                The timestamp to compute elapsed times against (the current one
+                if None).
+        """
+        now = datetime.now() if now is None else now
+        labels = format_elapsed_times(view.timestamps, now)
+
+        return [
+            f"{prefix} ({label})"
+            for prefix, label in zip(view.prefixes, labels, strict=True)
+        ]
+
+    def _discard(self, key: tuple):
+        """Removes a view from the cache and from the index of its user."""
+        del self.views[key]
+        keys = self.keys[key[1]]
+        keys.discard(key)
+        if not keys:
+            del self.keys[key[1]]
@@ -0,0 +1,244 @@
+"""A social network that can be served from several threads at once."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.metrics import Metrics
+from src.sr_sw_dev.persistence import Persistence
+from src.sr_sw_dev.retention import Compaction, Retention
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import SocialNetwork, User
+from src.sr_sw_dev.storage import StorageBackend
+from src.sr_sw_dev.store import PostStore
+from src.sr_sw_dev.walls import FanoutWalls
+
+
+class LockStripes:
+    """
+    A fixed set of locks shared by users, each user hashing to one stripe.
+
+    Striping bounds the number of locks regardless of the number of users,
+    while unrelated users rarely share a stripe. Several stripes are always
+    acquired in index order, so that two writers cannot deadlock.
+
+    Attributes:
+        locks:
+            The lock of each stripe.
+    """
+
+    def __init__(self, n_stripes: int = 1024):
+        """
+        Initializes the stripes.
+
+        Args:
+            n_stripes:
+                The number of stripes.
+        """
+        self.locks = [threading.Lock() for _ in range(n_stripes)]
+
+    def stripe(self, name: str) -> int:
+        """Returns the index of the stripe of a user."""
+        return hash(name) % len(self.locks)
+
+    @contextmanager
+    def hold(self, *names: str) -> Iterator[None]:
+        """Holds the stripes of the given users."""
+        locks = [self.locks[i] for i in sorted({self.stripe(name) for name in names})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class ReadWriteLock:
+    """
+    A lock that is either held by any number of sharers or by one owner.
+
+    Waiting owners take precedence over new sharers, so that they are not
+    starved by a steady stream of sharers. Neither side is reentrant.
+    """
+
+    def __init__(self):
+        """Initializes an unheld lock."""
+        self._condition = threading.Condition()
+        self._n_sharers = 0
+        self._n_waiting_owners = 0
+        self._owned = False
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Holds the lock along with other sharers."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._owned and not self._n_waiting_owners
+            )
+            self._n_sharers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._n_sharers -= 1
+                if not self._n_sharers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Holds the lock alone."""
+        with self._condition:
+            self._n_waiting_owners += 1
+            self._condition.wait_for(lambda: not self._owned and not self._n_sharers)
+            self._n_waiting_owners -= 1
+            self._owned = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._owned = False
+                self._condition.notify_all()
+
+
+class ConcurrentSocialNetwork(SocialNetwork):
+    """
+    A social network whose methods can be called from several threads.
+
+    Reads never take a lock of the social network. Posts are only ever
+    appended to the post store and to the post ids of their author, and the
+    followees of a user are copied atomically before their walls are merged,
+    so readers see a consistent prefix of every timeline.
+
+    Writes lock the stripes of the users they change: a post locks its author,
+    and a follow or unfollow locks both users. Thus writes to unrelated users
+    proceed concurrently. The post store, the fan-out buffers, the render cache,
+    the full-text index and the write-ahead log guard their own state with
+    short internal locks.
+
+    Writes also share a read-write lock, which snapshots hold exclusively, so
+    that a snapshot never captures a write that is only half applied.
+
+    Compactions lock the stripe of one user at a time while trimming their
+    timeline, so they can run in a background thread (see `Compactor`)
+    without stalling the writers of other users. Only one compaction runs at
+    a time.
+
+    Attributes:
+        stripes:
+            The locks of the users.
+        writers:
+            The lock shared by writes and held exclusively by snapshots.
+    """
+
+    def __init__(
+        self,
+        fanout: FanoutWalls | None = None,
+        persistence: Persistence | None = None,
+        store: PostStore | None = None,
+        cache: RenderCache | None = None,
+        index: InvertedIndex | None = None,
+        metrics: Metrics | None = None,
+        backend: StorageBackend | None = None,
+        retention: Retention | None = None,
+        n_stripes: int = 1024,
+    ):
+        """
+        Initializes a concurrent social network.
+
+        Args:
+            fanout:
+                The materialized walls to update on write (pull-only if None).
+            persistence:
+                The durable storage to recover the social network from and to
+                log its changes to (in-memory only if None).
+            store:
+                The post store to keep the posts in (a new in-memory one if
+                None).
+            cache:
+                The cache of rendered timelines and walls (uncached if None).
+            index:
+                The full-text index to update on write (searches scan every
+                post if None).
+            metrics:
+                The metrics to measure the operations in (unmeasured if None).
+            backend:
+                The storage backend to keep the users, posts and follows in (a
+                new in-memory one using the post store if None), which must be
+                thread-safe.
+            retention:
+                The retention policy bounding the timelines (posts are kept
+                forever if None), enforced by `compact`.
+            n_stripes:
+                The number of locks shared by the users.
+        """
+        self.stripes = LockStripes(n_stripes)
+        self.writers = ReadWriteLock()
+        self._compacting = threading.Lock()
+
+        super().__init__(
+            fanout, persistence, store, cache, index, metrics, backend, retention
+        )
+
+    def add_user(self, name: str):
+        """Adds a user to the social network."""
+        with self.writers.shared(), self.stripes.hold(name):
+            super().add_user(name)
+
+        self._snapshot_when_quiescent()
+
+    def add_post(self, name: str, post: str, timestamp: datetime | None = None):
+        """Adds a post to the user's timeline."""
+        with self.writers.shared(), self.stripes.hold(name):
+            super().add_post(name, post, timestamp)
+
+        self._snapshot_when_quiescent()
+
+    def follows(self, name: str, following: str):
+        """Adds a user to the user's following list."""
+        with self.writers.shared(), self.stripes.hold(name, following):
+            super().follows(name, following)
+
+        self._snapshot_when_quiescent()
+
+    def unfollows(self, name: str, following: str):
+        """Removes a user from the user's following list."""
+        with self.writers.shared(), self.stripes.hold(name, following):
+            super().unfollows(name, following)
+
+        self._snapshot_when_quiescent()
+
+    def compact(self, now: datetime | None = None) -> Compaction:
+        """Enforces the retention policy, waiting for the compaction in progress."""
+        with self._compacting:
+            return super().compact(now)
+
+    def _compact_timeline(self, user: User, cutoff: int | None) -> int:
+        """Trims a timeline during a compaction, holding off its writers."""
+        with self.stripes.hold(user.name):
+            return super()._compact_timeline(user, cutoff)
+
+    def snapshot(self):
+        """
+        Writes a snapshot once the writes in progress are complete.
+
+        Raises:
+            ValueError:
+                If the social network is not persistent.
+        """
+        if self.persistence is None:
+            raise ValueError("Social network is not persistent")
+
+        with self.writers.exclusive():
+            self.persistence.snapshot()
+
+    def _snapshot_if_due(self):
+        """Defers snapshots until the write in progress released its locks."""
+
+    def _snapshot_when_quiescent(self):
+        """Writes a snapshot if it is due, once the writes in progress are done."""
+        if self.persistence is not None and self.persistence.snapshot_due():
+            with self.writers.exclusive():
+                super()._snapshot_if_due()
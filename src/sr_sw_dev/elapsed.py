@@ -0,0 +1,132 @@
+"""Formatting of the time elapsed since posts were created (e.g. "5 minutes ago")."""
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from functools import cache
+from typing import TYPE_CHECKING
+
+from src.sr_sw_dev.store import from_nanoseconds, to_nanoseconds
+
+if TYPE_CHECKING:
+    from dateutil.relativedelta import relativedelta
+
+SECOND = timedelta(seconds=1)
+NANOSECONDS = 1_000_000_000
+
+# Below four weeks a relativedelta never spans a month, so its days, hours,
+# minutes and seconds can be derived from the elapsed seconds alone
+CALENDAR_FREE_SECONDS = 28 * 24 * 60 * 60
+
+UNITS = (("day", 24 * 60 * 60), ("hour", 60 * 60), ("minute", 60), ("second", 1))
+
+
+@cache
+def _label(count: int, unit: str) -> str:
+    """Returns the label of a number of time units (e.g. "5 minutes ago")."""
+    return f"{count} {unit}{'s' if count != 1 else ''} ago"
+
+
+def _format_calendar(timestamp: datetime, now: datetime) -> str:
+    """
+    Returns the label of an elapsed time spanning months, with calendar arithmetic.
+
+    `dateutil` is only imported here, since most posts are younger than four
+    weeks and importing it is the bulk of the cost of importing the application.
+    """
+    from dateutil.relativedelta import relativedelta
+
+    return _format_delta(relativedelta(now, timestamp))
+
+
+def _format_delta(delta: "relativedelta") -> str:
+    """Returns the label of the most meaningful time unit of a relativedelta."""
+    for unit in ("year", "month", "day", "hour", "minute", "second"):
+        count = getattr(delta, f"{unit}s")
+        if count > 0:
+            return _label(count, unit)
+
+    return "just now"
+
+
+def _format_seconds(seconds: int) -> str:
+    """Returns the label of a calendar-free number of elapsed seconds."""
+    for unit, length in UNITS:
+        if seconds >= length:
+            return _label(seconds // length, unit)
+
+    return "just now"
+
+
+def format_elapsed_time(timestamp: datetime, now: datetime) -> str:
+    """
+    Returns the elapsed time between a timestamp and now.
+
+    Both timestamps are truncated to whole seconds and only the most meaningful
+    time unit is shown (e.g. "5 minutes ago" rather than "5 minutes and 3
+    seconds ago").
+
+    Args:
+        timestamp:
+            The timestamp to format.
+        now:
+            The current timestamp.
+    """
+    return format_elapsed_times([timestamp], now)[0]
+
+
+def format_elapsed_times(timestamps: Iterable[datetime], now: datetime) -> list[str]:
+    """
+    Returns the elapsed times between several timestamps and a single now.
+
+    This is equivalent to calling `format_elapsed_time` for each timestamp, but
+    it reads the clock only once and reuses the labels of each time unit. Only
+    timestamps older than four weeks need calendar arithmetic.
+
+    Args:
+        timestamps:
+            The timestamps to format.
+        now:
+            The current timestamp.
+    """
+    now = now.replace(microsecond=0)
+
+    labels = []
+    for timestamp in timestamps:
+        if timestamp.microsecond:
+            timestamp = timestamp.replace(microsecond=0)
+        seconds = (now - timestamp) // SECOND
+        if seconds < CALENDAR_FREE_SECONDS:
+            labels.append(_format_seconds(seconds))
+        else:
+            labels.append(_format_calendar(timestamp, now))
+
+    return labels
+
+
+def format_elapsed_nanoseconds(timestamps: Iterable[int], now: datetime) -> list[str]:
+    """
+    Returns the elapsed times between several epoch timestamps and a single now.
+
+    This is equivalent to `format_elapsed_times`, but takes timestamps in
+    nanoseconds since the epoch, which are truncated to whole seconds with
+    integer arithmetic instead of being converted to datetimes.
+
+    Args:
+        timestamps:
+            The timestamps to format, in nanoseconds since the epoch.
+        now:
+            The current timestamp.
+    """
+    now = now.replace(microsecond=0)
+    now_seconds = to_nanoseconds(now) // NANOSECONDS
+
+    labels = []
+    for timestamp in timestamps:
+        seconds = now_seconds - timestamp // NANOSECONDS
+        if seconds < CALENDAR_FREE_SECONDS:
+            labels.append(_format_seconds(seconds))
+        else:
+            timestamp = from_nanoseconds(timestamp).replace(microsecond=0)
+            labels.append(_format_calendar(timestamp, now))
+
+    return labels
@@ -0,0 +1,153 @@
+"""The follow graph of a social network, in compressed sparse row form."""
+
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+import heapq
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class FollowGraph:
+    """
+    A snapshot of the follow graph of a social network.
+
+    The graph is in compressed sparse row (CSR) form: users are numbered by
+    their dense integer ids, and the ids of the users followed by user `i` are
+    the sorted `indices[indptr[i]:indptr[i + 1]]`. Both columns are flat
+    arrays of 64-bit integers rather than objects, so a row is copied with a
+    single slice instead of chasing references, and they convert to NumPy
+    arrays without copying (see `to_numpy`).
+
+    Attributes:
+        names:
+            The name of each user, indexed by id.
+        indptr:
+            The offset of the followees of each user in `indices`, followed by
+            the number of follow edges.
+        indices:
+            The ids of the followees of every user, one sorted row per user.
+    """
+
+    __slots__ = ("indices", "indptr", "names")
+
+    def __init__(self, names: list[str], indptr: array, indices: array):
+        """
+        Initializes a follow graph from its CSR columns.
+
+        Args:
+            names:
+                The name of each user, indexed by id.
+            indptr:
+                The offset of the followees of each user in `indices`, followed
+                by the number of follow edges.
+            indices:
+                The ids of the followees of every user, one sorted row per user.
+        """
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_adjacency(
+        cls, names: list[str], following: Iterable[Iterable[int]]
+    ) -> "FollowGraph":
+        """
+        Builds a follow graph from the followees of each user.
+
+        Args:
+            names:
+                The name of each user, indexed by id.
+            following:
+                The ids of the followees of each user, in id order.
+        """
+        indptr, indices = array("q", [0]), array("q")
+        for followees in following:
+            indices.extend(sorted(followees))
+            indptr.append(len(indices))
+
+        return cls(names, indptr, indices)
+
+    def count_users(self) -> int:
+        """Returns the number of users."""
+        return len(self.names)
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges."""
+        return len(self.indices)
+
+    def get_following(self, user_id: int) -> array:
+        """Returns the sorted ids of the users a user is following."""
+        return self.indices[self.indptr[user_id] : self.indptr[user_id + 1]]
+
+    def suggest_follows(
+        self, user_id: int, k: int, following: Iterable[int] | None = None
+    ) -> list[tuple[int, int]]:
+        """
+        Suggests users to follow among the followees of one's followees.
+
+        The row of each followee is appended with one slice, and the candidates
+        are counted with a `Counter`, so the cost only depends on the edges two
+        hops away from the user, not on the size of the graph.
+
+        Args:
+            user_id:
+                The id of the user.
+            k:
+                The maximum number of suggestions.
+            following:
+                The ids of the users the user follows, if the graph may be
+                older than them (their row in the graph if None). Users added
+                after the graph are ignored.
+
+        Returns:
+            Up to k (id, count) pairs of users not followed yet, where count is
+            the number of the user's followees following them, the most
+            followed first and ties broken by id.
+        """
+        indptr, indices = self.indptr, self.indices
+        n_users = len(self.names)
+        following = (
+            self.get_following(user_id) if following is None else list(following)
+        )
+        candidates = array("q")
+        for followee in following:
+            if followee < n_users:
+                candidates += indices[indptr[followee] : indptr[followee + 1]]
+
+        counts = Counter(candidates)
+        for followed in (user_id, *following):
+            counts.pop(followed, None)
+        if not counts:
+            return []
+
+        # Ranking by the counts alone compares ints in C. Only the candidates
+        # tied with the k-th count need their ids compared
+        threshold = heapq.nlargest(k, counts.values())[-1]
+        above = sorted((-n, i) for i, n in counts.items() if n > threshold)
+        ties = heapq.nsmallest(
+            k - len(above), [i for i, n in counts.items() if n == threshold]
+        )
+        return [(i, -n) for n, i in above] + [(i, threshold) for i in ties]
+
+    def to_numpy(self) -> "tuple[np.ndarray, np.ndarray]":
+        """
+        Returns the `indptr` and `indices` columns as NumPy arrays.
+
+        The arrays share the memory of the columns instead of copying them,
+        e.g. to build a `scipy.sparse.csr_array((data, indices, indptr))`.
+        NumPy is imported on demand, since the social network does not depend
+        on it.
+
+        Raises:
+            ModuleNotFoundError:
+                If NumPy is not installed.
+        """
+        import numpy as np
+
+        return (
+            np.frombuffer(self.indptr, dtype=np.int64),
+            np.frombuffer(self.indices, dtype=np.int64),
+        )
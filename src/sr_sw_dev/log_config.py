@@ -0,0 +1,186 @@
+"""Logging configuration of the social networking application."""
+
+import logging
+import logging.handlers
+import os
+from pathlib import Path
+from queue import Empty, SimpleQueue
+import threading
+
+from src.sr_sw_dev import paths
+
+_configured = False
+
+
+class AsyncFileHandler(logging.handlers.QueueHandler):
+    """
+    A file handler that writes records from a background thread, in batches.
+
+    Emitting a record only puts it in a queue, so logging does not block the
+    calling thread on file I/O. A background thread drains the queue, formats
+    the records and writes up to `batch_size` of them with a single write.
+    Flushing waits until every record emitted so far has been written.
+
+    Attributes:
+        sink:
+            The file handler writing the records.
+        batch_size:
+            The maximum number of records written at once.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        encoding: str | None = None,
+        batch_size: int = 1024,
+    ):
+        """
+        Initializes the handler and starts its background thread.
+
+        Args:
+            filename:
+                The file to write the records to.
+            mode:
+                The mode to open the file with.
+            encoding:
+                The encoding of the file.
+            batch_size:
+                The maximum number of records written at once.
+        """
+        # The sink is created first so that `logging.shutdown`, which closes
+        # handlers in reverse creation order, flushes this handler before it
+        # closes the sink
+        self.sink = logging.FileHandler(filename, mode, encoding)
+        super().__init__(SimpleQueue())
+        self.batch_size = batch_size
+
+        self._thread = threading.Thread(
+            target=self._write_batches, name="AsyncFileHandler", daemon=True
+        )
+        self._thread.start()
+
+    def setFormatter(self, fmt: logging.Formatter | None):
+        """Sets the formatter applied by the background thread."""
+        self.sink.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merges the arguments of a record so that it can be queued."""
+        # Other handlers render the same message, so the record is updated in
+        # place rather than copied
+        if record.args:
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info and not record.exc_text:
+            formatter = self.sink.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+
+        return record
+
+    def flush(self):
+        """Waits until every record emitted so far has been written."""
+        if self._thread.is_alive():
+            written = threading.Event()
+            self.queue.put(written)
+            written.wait()
+
+    def close(self):
+        """Writes the pending records, stops the background thread and closes."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+        self.sink.close()
+        super().close()
+
+    def _write_batches(self):
+        """Drains the queue, writing its records in batches."""
+        while True:
+            items = [self.queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            records, lines = [], []
+            for item in items:
+                if isinstance(item, logging.LogRecord):
+                    try:
+                        lines.append(self.sink.format(item) + self.sink.terminator)
+                        records.append(item)
+                    except Exception:
+                        self.sink.handleError(item)
+
+            if lines:
+                with self.sink.lock:
+                    try:
+                        if self.sink.stream is None:
+                            self.sink.stream = self.sink._open()
+                        self.sink.stream.write("".join(lines))
+                        self.sink.flush()
+                    except Exception:
+                        # Every record of the batch may have been lost
+                        for record in records:
+                            self.sink.handleError(record)
+
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+            if any(item is None for item in items):
+                return
+
+
+def configure_logging(
+    config_file: Path | None = None,
+    log_dir: Path | None = None,
+    force: bool = False,
+):
+    """
+    Applies the logging configuration of the application.
+
+    Importing the application has no logging side effects: nothing is logged
+    (besides errors) until an entry point calls this function, which creates
+    the log directory and installs the handlers described in the configuration
+    file. Calling it again is a no-op unless `force` is set. The configuration
+    parsers are only imported here, so that importing the application does not
+    pay for them.
+
+    Args:
+        config_file:
+            The logging configuration file (`config/logger.ini` if None).
+        log_dir:
+            The directory to write the log files to (`logs/` if None).
+        force:
+            Whether to apply the configuration even if it was already applied.
+    """
+    global _configured
+    if _configured and not force:
+        return
+
+    import configparser
+    from logging.config import fileConfig
+
+    config_file = (
+        paths.config_dir / "logger.ini" if config_file is None else config_file
+    )
+    log_dir = paths.log_dir if log_dir is None else log_dir
+
+    # Create log directory if it doesn't exist
+    os.makedirs(log_dir, exist_ok=True)
+
+    # Read and format the logging configuration
+    config = configparser.ConfigParser()
+    config.read(config_file)
+
+    # Format the log directory in the handler args
+    for section in config.sections():
+        if section.startswith("handler_") and config.has_option(section, "args"):
+            args = config.get(section, "args")
+            args = args.format(log_dir=log_dir)
+            config.set(section, "args", args)
+
+    # Apply the logging configuration
+    fileConfig(config, defaults={"log_dir": log_dir}, disable_existing_loggers=False)
+
+    _configured = True
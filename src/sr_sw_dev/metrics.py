@@ -0,0 +1,306 @@
+"""Counters, latency histograms, gauges and a sampling profiler."""
+
+from collections import Counter
+from collections.abc import Callable
+import functools
+import json
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import CodeType
+
+# Latencies are bucketed by the bit length of their nanoseconds, i.e. bucket i
+# holds the latencies below 2**i ns, so no 64-bit latency is out of range
+N_BUCKETS = 65
+
+
+class Histogram:
+    """
+    A latency histogram with power-of-two buckets.
+
+    Finding the bucket of a latency is a single `int.bit_length` call, so that
+    observing it costs about as much as incrementing a counter, and the number
+    of latencies is only summed when exported. Quantiles are only known up to a
+    factor of two, which is enough to see tail latencies.
+
+    Updates take no lock: increments from concurrent threads may rarely be
+    lost, which is cheaper than serializing every operation being measured.
+
+    Attributes:
+        buckets:
+            The number of latencies in each bucket.
+        total:
+            The sum of the latencies observed, in nanoseconds.
+    """
+
+    __slots__ = ("buckets", "total")
+
+    def __init__(self):
+        """Initializes an empty histogram."""
+        self.buckets = [0] * N_BUCKETS
+        self.total = 0
+
+    @property
+    def count(self) -> int:
+        """The number of latencies observed."""
+        return sum(self.buckets)
+
+    def observe(self, nanoseconds: int):
+        """Records a latency, in nanoseconds."""
+        self.buckets[nanoseconds.bit_length()] += 1
+        self.total += nanoseconds
+
+    def quantile(self, q: float) -> int:
+        """
+        Returns an upper bound of a quantile of the latencies, in nanoseconds.
+
+        Args:
+            q:
+                The quantile, between 0 and 1 (e.g. 0.99 for the 99th
+                percentile).
+        """
+        rank, seen = q * sum(self.buckets), 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return 1 << i
+
+        return 0
+
+
+class Metrics:
+    """
+    A registry of operation latencies, error counters and gauges.
+
+    Operations are measured by wrapping the methods of an object (see
+    `instrument`), so that an object without metrics runs its methods
+    unchanged, with no overhead at all. A wrapped call reads the monotonic
+    clock twice and observes the latency in the histogram of its operation,
+    which costs well under a microsecond.
+
+    Gauges are functions, only called when the metrics are exported, so that
+    counting users or posts costs nothing on the hot path.
+
+    Attributes:
+        histograms:
+            The latency histogram of each operation.
+        errors:
+            The number of calls of each operation that raised a ValueError.
+        gauges:
+            The function returning the current value of each gauge.
+    """
+
+    def __init__(self):
+        """Initializes an empty registry."""
+        self.histograms: dict[str, Histogram] = {}
+        self.errors: dict[str, int] = {}
+        self.gauges: dict[str, Callable[[], int]] = {}
+
+    def instrument(self, target: object, *names: str):
+        """
+        Measures the calls of some methods of an object.
+
+        Each method is replaced on the object itself by a wrapper measuring it,
+        so that calls from inside the object are measured too.
+
+        Args:
+            target:
+                The object whose methods to measure.
+            names:
+                The names of the methods, which are the names of the operations.
+        """
+        for name in names:
+            setattr(target, name, self.timed(name, getattr(target, name)))
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Returns a wrapper measuring the calls of a function as an operation."""
+        histogram = self.histograms.setdefault(name, Histogram())
+        self.errors.setdefault(name, 0)
+        buckets, errors, clock = histogram.buckets, self.errors, time.perf_counter_ns
+
+        # The histogram is updated inline, as a method call would about double
+        # the cost of the wrapper
+        @functools.wraps(function)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            except ValueError:
+                errors[name] += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                buckets[elapsed.bit_length()] += 1
+                histogram.total += elapsed
+
+        return wrapper
+
+    def register_gauge(self, name: str, function: Callable[[], int]):
+        """Registers a gauge, whose value is returned by a function."""
+        self.gauges[name] = function
+
+    def snapshot(self) -> dict[str, dict]:
+        """
+        Returns the current values of the metrics.
+
+        Returns:
+            The gauges, and for each operation its number of calls and errors,
+            its total latency and its median, 90th and 99th percentile
+            latencies (in seconds), and its non-empty histogram buckets, keyed
+            by their upper bound in seconds.
+        """
+        operations = {}
+        for name, histogram in self.histograms.items():
+            operations[name] = {
+                "calls": histogram.count,
+                "errors": self.errors[name],
+                "seconds": histogram.total / 1e9,
+                "p50": histogram.quantile(0.5) / 1e9,
+                "p90": histogram.quantile(0.9) / 1e9,
+                "p99": histogram.quantile(0.99) / 1e9,
+                "buckets": {
+                    f"{(1 << i) / 1e9:g}": count
+                    for i, count in enumerate(histogram.buckets)
+                    if count
+                },
+            }
+
+        return {
+            "operations": operations,
+            "gauges": {name: function() for name, function in self.gauges.items()},
+        }
+
+    def to_json(self) -> str:
+        """Returns the current values of the metrics as a JSON document."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_text(self) -> str:
+        """
+        Returns the current values of the metrics in the Prometheus text format.
+
+        Histogram buckets are cumulative, from the first non-empty one up to
+        the last one, followed by the `+Inf` bucket.
+        """
+        lines = ["# TYPE operation_seconds histogram"]
+        for name, histogram in self.histograms.items():
+            label = f'operation="{name}"'
+            used = [i for i, count in enumerate(histogram.buckets) if count]
+            seen = 0
+            if used:
+                for i in range(used[0], used[-1] + 1):
+                    seen += histogram.buckets[i]
+                    le = f"{(1 << i) / 1e9:g}"
+                    lines.append(
+                        f'operation_seconds_bucket{{{label},le="{le}"}} {seen}'
+                    )
+            lines.append(
+                f'operation_seconds_bucket{{{label},le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f"operation_seconds_sum{{{label}}} {histogram.total / 1e9}")
+            lines.append(f"operation_seconds_count{{{label}}} {histogram.count}")
+
+        lines.append("# TYPE operation_errors_total counter")
+        for name, count in self.errors.items():
+            lines.append(f'operation_errors_total{{operation="{name}"}} {count}')
+
+        for name, function in self.gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {function()}")
+
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """
+    A profiler sampling the call stacks of the other threads periodically.
+
+    Unlike a deterministic profiler, the profiled code runs unchanged: a
+    background thread wakes up every `interval` seconds and records the stack
+    of every other thread. A function shows up in a share of the samples
+    proportional to the time spent in it, so the overhead only depends on the
+    sampling rate. The samples are reported as collapsed stacks, which flame
+    graph tools read.
+
+    Attributes:
+        interval:
+            The number of seconds between two samples.
+        stacks:
+            The number of samples of each collapsed stack, from the outermost
+            frame to the innermost, separated by semicolons.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Initializes a stopped profiler.
+
+        Args:
+            interval:
+                The number of seconds between two samples.
+        """
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        """Starts sampling."""
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info):
+        """Stops sampling."""
+        self.stop()
+
+    def start(self):
+        """Starts sampling in a background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling, keeping the samples taken so far."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sample(self):
+        """Records the current stack of every thread but the profiler's."""
+        current = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current:
+                continue
+
+            labels = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = f"{Path(code.co_filename).stem}:{code.co_qualname}"
+                    self._labels[code] = label
+                labels.append(label)
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def report(self, limit: int | None = None) -> list[str]:
+        """
+        Returns the collapsed stacks with their number of samples.
+
+        Args:
+            limit:
+                The maximum number of stacks, the most sampled first (all of
+                them if None).
+        """
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common(limit)]
+
+    def _run(self):
+        """Samples the threads until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.sample()
@@ -0,0 +1,60 @@
+"""Cursors and pages to read timelines and walls a page at a time."""
+
+import base64
+import struct
+from typing import NamedTuple
+
+CURSOR = struct.Struct("<qq")
+
+
+class Cursor(NamedTuple):
+    """
+    The position of the last post of a page, to resume reading after it.
+
+    Posts are read newest-first by (timestamp, sequence id), so the next page
+    starts with the posts that come before the cursor in that order.
+
+    Attributes:
+        nanoseconds:
+            The timestamp of the post, in nanoseconds since the epoch.
+        post_id:
+            The row id of the post in the post store, i.e. its sequence id.
+    """
+
+    nanoseconds: int
+    post_id: int
+
+    def encode(self) -> str:
+        """Returns the cursor as an opaque, URL-safe token."""
+        return base64.urlsafe_b64encode(CURSOR.pack(*self)).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """
+        Returns the cursor encoded in a token.
+
+        Raises:
+            ValueError:
+                If the token is not a cursor.
+        """
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            return cls(*CURSOR.unpack(data))
+        except (ValueError, struct.error):
+            raise ValueError(f"Invalid cursor: {token}") from None
+
+
+class Page(NamedTuple):
+    """
+    A page of a timeline or a wall.
+
+    Attributes:
+        lines:
+            The rendered posts of the page, newest-first.
+        cursor:
+            The token to read the next page with, or None if this page is the
+            last one.
+    """
+
+    lines: list[str]
+    cursor: str | None
@@ -0,0 +1,492 @@
+"""Durable storage of a social network: a write-ahead log plus snapshots."""
+
+from array import array
+from collections.abc import Iterator
+import logging
+import os
+from pathlib import Path
+import struct
+import sys
+import threading
+from typing import TYPE_CHECKING, BinaryIO
+import zlib
+
+from src.sr_sw_dev.store import from_nanoseconds
+
+if TYPE_CHECKING:
+    from src.sr_sw_dev.social_networking import SocialNetwork
+
+log = logging.getLogger(__name__)
+
+ADD_USER, ADD_POST, FOLLOW, UNFOLLOW = range(4)
+
+WAL_MAGIC = b"SNWAL002"
+SNAPSHOT_MAGIC = b"SNSNAP02"
+
+# Each record is prefixed by the length and the CRC32 of its payload, and its
+# payload starts with the operation code
+RECORD_HEADER = struct.Struct("<II")
+STRING_LENGTH = struct.Struct("<I")
+TIMESTAMP = struct.Struct("<q")
+COUNT = struct.Struct("<Q")
+
+
+def _encode_string(value: str) -> bytes:
+    """Encodes a string as its UTF-8 length followed by its UTF-8 bytes."""
+    encoded = value.encode()
+    return STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _decode_string(payload: bytes, offset: int) -> tuple[str, int]:
+    """Decodes a string, returning it along with the offset following it."""
+    (length,) = STRING_LENGTH.unpack_from(payload, offset)
+    offset += STRING_LENGTH.size
+    return str(payload[offset : offset + length], "utf-8"), offset + length
+
+
+class WriteAheadLog:
+    """
+    An append-only log of the operations applied to a social network.
+
+    Records are length-prefixed and checksummed, so a torn write at the end of
+    the log (e.g. after a crash) is detected and discarded on replay. Records
+    are buffered until committed, so that the records of the writes that
+    arrive together are written at once (group commit), or until `group_size`
+    of them are, and the file is fsynced every `fsync_interval` group writes.
+    Buffered records are lost on a crash, so they must be committed before
+    their writes are acknowledged.
+
+    Attributes:
+        path:
+            The path of the log file.
+        group_size:
+            The maximum number of records buffered before they are written.
+        fsync_interval:
+            The number of group writes between fsyncs (0 to never fsync and
+            rely on the operating system to flush its page cache).
+    """
+
+    def __init__(self, path: Path, group_size: int = 256, fsync_interval: int = 1):
+        """
+        Opens a write-ahead log for appending, discarding any torn tail.
+
+        Args:
+            path:
+                The path of the log file. It is created if it does not exist.
+            group_size:
+                The number of records buffered before they are written.
+            fsync_interval:
+                The number of group writes between fsyncs (0 to never fsync).
+        """
+        self.path = Path(path)
+        self.group_size = group_size
+        self.fsync_interval = fsync_interval
+
+        end = self._valid_end()
+        mode = "r+b" if self.path.exists() else "wb"
+        # The log stays open for appending until the persistence is closed
+        self._file: BinaryIO = open(self.path, mode)  # noqa: SIM115
+        if end == 0:
+            self._file.write(WAL_MAGIC)
+        else:
+            self._file.truncate(end)
+            self._file.seek(end)
+
+        self._pending = bytearray()
+        self._n_pending = 0
+        self._n_writes = 0
+
+    def append(self, operation: int, payload: bytes):
+        """Buffers a record, writing the group if it is full."""
+        payload = bytes([operation]) + payload
+        self._pending += RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+        self._pending += payload
+        self._n_pending += 1
+
+        if self._n_pending >= self.group_size:
+            self.commit()
+
+    def commit(self):
+        """Writes the buffered records and fsyncs the file if it is due."""
+        if not self._pending:
+            return
+
+        self._file.write(self._pending)
+        self._file.flush()
+        self._pending.clear()
+        self._n_pending = 0
+
+        self._n_writes += 1
+        if self.fsync_interval and self._n_writes % self.fsync_interval == 0:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Commits the buffered records, fsyncs and closes the log."""
+        self.commit()
+        if self.fsync_interval:
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+    @staticmethod
+    def replay(path: Path) -> Iterator[tuple[int, bytes]]:
+        """
+        Yields the (operation, payload) pairs of the valid records of a log.
+
+        Replaying stops at the first torn or corrupted record.
+        """
+        path = Path(path)
+        if not path.exists():
+            return
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        WriteAheadLog._check_version(path, data)
+        for start, end in WriteAheadLog._scan(data):
+            yield data[start], data[start + 1 : end]
+
+    @staticmethod
+    def _check_version(path: Path, data: bytes):
+        """Raises a ValueError if the log was written in another format version."""
+        if data[:5] == WAL_MAGIC[:5] and not data.startswith(WAL_MAGIC):
+            raise ValueError(f"Unsupported write-ahead log version: {path}")
+
+    @staticmethod
+    def _scan(data: bytes) -> Iterator[tuple[int, int]]:
+        """Yields the (start, end) offsets of the payloads of valid records."""
+        if not data.startswith(WAL_MAGIC):
+            return
+
+        offset = len(WAL_MAGIC)
+        while offset + RECORD_HEADER.size <= len(data):
+            length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if (
+                length == 0
+                or end > len(data)
+                or zlib.crc32(data[start:end]) != checksum
+            ):
+                return
+
+            yield start, end
+            offset = end
+
+    def _valid_end(self) -> int:
+        """Returns the offset following the last valid record (0 if none)."""
+        if not self.path.exists():
+            return 0
+
+        data = self.path.read_bytes()
+        self._check_version(self.path, data)
+        if not data.startswith(WAL_MAGIC):
+            return 0
+
+        return max((end for _, end in self._scan(data)), default=len(WAL_MAGIC))
+
+
+class Persistence:
+    """
+    Durable storage of a social network in a directory.
+
+    The directory holds the latest snapshot of the social network, which is a
+    compact columnar dump of its post store, users and follows, and the write-
+    ahead log of the operations applied since that snapshot. Recovering a
+    social network loads the snapshot in bulk and only replays the log tail.
+
+    Snapshots have a generation number, and the log following snapshot `g` is
+    `wal-g.log`. The social network writes a new snapshot between two writes
+    once `snapshot_interval` records were logged, after which the previous log
+    is deleted. Logging is thread-safe.
+
+    Changes are durable once committed: records are buffered in memory until
+    `commit` is called (which the application does before acknowledging each
+    command or batch of commands), or until `group_size` of them are. With
+    `fsync_interval` above 1, committed records may still be lost on a power
+    failure, though not when the process crashes.
+
+    Attributes:
+        directory:
+            The directory holding the snapshot and the write-ahead log.
+        group_size:
+            The number of log records buffered before they are written.
+        fsync_interval:
+            The number of group writes between fsyncs (0 to never fsync).
+        snapshot_interval:
+            The number of log records after which a new snapshot is written
+            (0 to only write snapshots on demand).
+        generation:
+            The generation of the latest snapshot (0 if there is none).
+        wal:
+            The write-ahead log following the latest snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        group_size: int = 256,
+        fsync_interval: int = 1,
+        snapshot_interval: int = 1_000_000,
+    ):
+        """
+        Initializes the durable storage of a social network.
+
+        Args:
+            directory:
+                The directory holding the snapshot and the write-ahead log. It
+                is created if it does not exist.
+            group_size:
+                The number of log records buffered before they are written.
+            fsync_interval:
+                The number of group writes between fsyncs (0 to never fsync).
+            snapshot_interval:
+                The number of log records after which a new snapshot is written
+                (0 to only write snapshots on demand).
+        """
+        self.directory = Path(directory)
+        self.group_size = group_size
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.generation = 0
+        self.wal: WriteAheadLog | None = None
+        self._lock = threading.RLock()
+
+        self._social_network: SocialNetwork | None = None
+        self._n_records = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def snapshot_path(self) -> Path:
+        """Returns the path of the latest snapshot."""
+        return self.directory / "snapshot"
+
+    def wal_path(self, generation: int) -> Path:
+        """Returns the path of the write-ahead log following a snapshot."""
+        return self.directory / f"wal-{generation}.log"
+
+    def recover(self, social_network: "SocialNetwork"):
+        """
+        Loads the latest snapshot and log tail into an empty social network.
+
+        The social network must not log its operations while recovering.
+        Afterwards, its new operations are appended to the log.
+        """
+        if self.snapshot_path.exists():
+            self.generation = self._read_snapshot(social_network)
+
+        n_records = 0
+        for operation, payload in WriteAheadLog.replay(self.wal_path(self.generation)):
+            self._apply(social_network, operation, payload)
+            n_records += 1
+
+        log.debug(
+            "Recovered %d users (snapshot %d, %d log records)",
+            social_network.count_users(),
+            self.generation,
+            n_records,
+        )
+
+        self._social_network = social_network
+        self._n_records = n_records
+        self.wal = WriteAheadLog(
+            self.wal_path(self.generation), self.group_size, self.fsync_interval
+        )
+
+    def log_add_user(self, name: str):
+        """Logs the addition of a user."""
+        self._append(ADD_USER, _encode_string(name))
+
+    def log_add_post(self, name: str, post: str, timestamp: int):
+        """Logs the addition of a post, with its timestamp in epoch nanoseconds."""
+        self._append(
+            ADD_POST,
+            _encode_string(name) + TIMESTAMP.pack(timestamp) + _encode_string(post),
+        )
+
+    def log_follows(self, name: str, following: str):
+        """Logs a follow."""
+        self._append(FOLLOW, _encode_string(name) + _encode_string(following))
+
+    def log_unfollows(self, name: str, following: str):
+        """Logs an unfollow."""
+        self._append(UNFOLLOW, _encode_string(name) + _encode_string(following))
+
+    def commit(self):
+        """Writes the buffered log records."""
+        with self._lock:
+            if self.wal is not None:
+                self.wal.commit()
+
+    def snapshot(self):
+        """
+        Writes a new snapshot of the social network and starts a new log.
+
+        The snapshot is written to a temporary file and atomically renamed, so
+        a crash while snapshotting leaves the previous snapshot and log intact.
+        """
+        if self._social_network is None or self.wal is None:
+            raise ValueError("Persistence has not recovered a social network")
+
+        with self._lock:
+            self.wal.commit()
+            generation = self.generation + 1
+
+            temporary_path = self.snapshot_path.with_suffix(".tmp")
+            with open(temporary_path, "wb") as file:
+                self._write_snapshot(file, self._social_network, generation)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.snapshot_path)
+
+            self.wal.close()
+            os.remove(self.wal_path(self.generation))
+            self.generation = generation
+            self.wal = WriteAheadLog(
+                self.wal_path(generation), self.group_size, self.fsync_interval
+            )
+            self._n_records = 0
+
+        log.debug("Snapshot %d written", generation)
+
+    def snapshot_due(self) -> bool:
+        """Checks if enough records were logged since the latest snapshot."""
+        return bool(self.snapshot_interval) and (
+            self._n_records >= self.snapshot_interval
+        )
+
+    def close(self):
+        """Writes the buffered log records and closes the log."""
+        with self._lock:
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+
+    def _append(self, operation: int, payload: bytes):
+        """Appends a record to the log."""
+        with self._lock:
+            self.wal.append(operation, payload)
+            self._n_records += 1
+
+    @staticmethod
+    def _apply(social_network: "SocialNetwork", operation: int, payload: bytes):
+        """Applies a log record to a social network."""
+        name, offset = _decode_string(payload, 0)
+        if operation == ADD_USER:
+            social_network.add_user(name)
+        elif operation == ADD_POST:
+            (timestamp,) = TIMESTAMP.unpack_from(payload, offset)
+            post, _ = _decode_string(payload, offset + TIMESTAMP.size)
+            social_network.add_post(name, post, from_nanoseconds(timestamp))
+        elif operation == FOLLOW:
+            social_network.follows(name, _decode_string(payload, offset)[0])
+        elif operation == UNFOLLOW:
+            social_network.unfollows(name, _decode_string(payload, offset)[0])
+        else:
+            raise ValueError(f"Unknown log operation: {operation}")
+
+    @staticmethod
+    def _write_snapshot(
+        file: BinaryIO, social_network: "SocialNetwork", generation: int
+    ):
+        """Writes a columnar dump of a social network."""
+
+        def write_array(values: array):
+            file.write(COUNT.pack(len(values)))
+            file.write(values.tobytes())
+
+        def write_strings(values: list[str]):
+            file.write(COUNT.pack(len(values)))
+            file.write(b"".join(_encode_string(value) for value in values))
+
+        store = social_network.store
+        file.write(SNAPSHOT_MAGIC)
+        file.write(COUNT.pack(generation))
+        file.write(b"\x00" if sys.byteorder == "little" else b"\x01")
+        write_strings(store.names)
+
+        # The columns of a tiered store are concatenated across its segments,
+        # keeping only the last end offset
+        authors, timestamps, offsets, arenas = zip(*store.chunks(), strict=True)
+        n_posts = store.count_posts()
+        file.write(COUNT.pack(n_posts))
+        file.writelines(authors)
+        file.write(COUNT.pack(n_posts))
+        file.writelines(timestamps)
+        file.write(COUNT.pack(n_posts + 1))
+        file.writelines(chunk[:-1] for chunk in offsets)
+        file.write(offsets[-1][-1:])
+        file.write(COUNT.pack(sum(len(arena) for arena in arenas)))
+        file.writelines(arenas)
+
+        users = list(social_network.users.values())
+        write_strings([user.name for user in users])
+        for user in users:
+            write_array(user.post_ids)
+            write_strings(list(user.following))
+            write_strings(list(user.followers))
+
+    def _read_snapshot(self, social_network: "SocialNetwork") -> int:
+        """Loads the latest snapshot into a social network, returning its generation."""
+        with open(self.snapshot_path, "rb") as file:
+            data = memoryview(file.read())
+
+        if bytes(data[: len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"Invalid snapshot: {self.snapshot_path}")
+
+        offset = len(SNAPSHOT_MAGIC)
+        (generation,) = COUNT.unpack_from(data, offset)
+        swap = (data[offset + COUNT.size] == 0) != (sys.byteorder == "little")
+        offset += COUNT.size + 1
+
+        def read_count() -> int:
+            nonlocal offset
+            (count,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            return count
+
+        def read_array(typecode: str) -> array:
+            nonlocal offset
+            values = array(typecode)
+            size = read_count() * values.itemsize
+            values.frombytes(data[offset : offset + size])
+            if swap:
+                values.byteswap()
+            offset += size
+            return values
+
+        def read_strings() -> list[str]:
+            nonlocal offset
+            values = []
+            for _ in range(read_count()):
+                value, offset = _decode_string(data, offset)
+                values.append(value)
+            return values
+
+        author_names = read_strings()
+        authors = read_array("i")
+        timestamps = read_array("q")
+        offsets = read_array("q")
+        size = read_count()
+        arena = bytearray(data[offset : offset + size])
+        social_network.store.load(author_names, authors, timestamps, offsets, arena)
+        offset += size
+
+        names = read_strings()
+        edges = []
+        for name in names:
+            social_network.add_user(name)
+            social_network.users[name].post_ids = read_array("q")
+            edges.append((read_strings(), read_strings()))
+
+        users = social_network.users
+        for name, (following, followers) in zip(names, edges, strict=True):
+            users[name].following = {other: users[other] for other in following}
+            users[name].followers = {other: users[other] for other in followers}
+
+        if social_network.fanout is not None:
+            social_network.fanout.load(users.values())
+        if social_network.index is not None:
+            social_network.index.load(social_network.store)
+
+        return generation
@@ -0,0 +1,278 @@
+"""Retention policies bounding the post history of a social network."""
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import functools
+from itertools import count
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from src.sr_sw_dev.social_networking import SocialNetwork
+
+log = logging.getLogger(__name__)
+
+
+class Retention:
+    """
+    A retention policy, bounding the posts kept on each timeline.
+
+    Posts falling out of the policy are trimmed from the timelines by a
+    compaction of the social network, and later ones remove them from the
+    full-text index and drop them from the post store. With ring buffers,
+    timelines are also capped on write, so that they never exceed twice the
+    maximum number of posts, even between compactions: a timeline reaching
+    twice the maximum is trimmed back to it in one slice, so that each post
+    only costs O(1) amortized, whatever the maximum.
+
+    Attributes:
+        max_posts:
+            The maximum number of posts kept on each timeline (unbounded if
+            None).
+        max_age:
+            The maximum age of the posts kept (unbounded if None).
+        ring:
+            Whether timelines are capped on write, like ring buffers, e.g. for
+            purely ephemeral deployments.
+    """
+
+    __slots__ = ("max_age", "max_posts", "ring")
+
+    def __init__(
+        self,
+        max_posts: int | None = None,
+        max_age: timedelta | None = None,
+        ring: bool = False,
+    ):
+        """
+        Initializes a retention policy.
+
+        Args:
+            max_posts:
+                The maximum number of posts kept on each timeline (unbounded if
+                None).
+            max_age:
+                The maximum age of the posts kept (unbounded if None).
+            ring:
+                Whether timelines are capped on write, like ring buffers.
+
+        Raises:
+            ValueError:
+                If a limit is not positive, or ring buffers have no maximum
+                number of posts.
+        """
+        if (max_posts is not None and max_posts < 1) or (
+            max_age is not None and max_age <= timedelta(0)
+        ):
+            raise ValueError("The retention limits must be positive")
+        if ring and max_posts is None:
+            raise ValueError("Ring buffers require a maximum number of posts")
+
+        self.max_posts = max_posts
+        self.max_age = max_age
+        self.ring = ring
+
+    def cutoff(self, now: datetime | None = None) -> datetime | None:
+        """Returns the timestamp older posts fall out of the policy at, if any."""
+        if self.max_age is None:
+            return None
+
+        return (datetime.now() if now is None else now) - self.max_age
+
+
+class Readers:
+    """
+    Tracks the reads in flight, so that compactions only drop unreachable posts.
+
+    Each read is tagged with the epoch it started in, which every compaction
+    advances once done trimming. A read started after the posts were trimmed
+    from the timelines can no longer reach them from a timeline, and one
+    started after they were removed from the index can no longer reach them
+    at all. Thus posts are only dropped once all the reads in flight started
+    after that, however slow the reads are.
+
+    Attributes:
+        epoch:
+            The current epoch.
+    """
+
+    def __init__(self):
+        """Initializes a tracker with no reads in flight."""
+        self.epoch = 0
+        self._reads: dict[int, int] = {}
+        self._ids = count()
+
+    def instrument(self, target: object, *names: str):
+        """
+        Tracks the calls of some methods of an object as reads.
+
+        Each method is replaced on the object itself by a wrapper tracking it,
+        so that calls from inside the object are tracked too.
+
+        Args:
+            target:
+                The object whose methods to track.
+            names:
+                The names of the methods.
+        """
+        for name in names:
+            setattr(target, name, self.tracked(getattr(target, name)))
+
+    def tracked(self, function: Callable) -> Callable:
+        """Returns a wrapper tracking the calls of a function as reads."""
+        reads, ids = self._reads, self._ids
+
+        # Inserting into and deleting from a dict are atomic, so reads never lock
+        @functools.wraps(function)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            read = next(ids)
+            reads[read] = self.epoch
+            try:
+                return function(*args, **kwargs)
+            finally:
+                del reads[read]
+
+        return wrapper
+
+    def advance(self):
+        """Starts a new epoch."""
+        self.epoch += 1
+
+    def oldest(self) -> int:
+        """Returns the epoch the oldest read in flight started in, if any."""
+        return min(list(self._reads.values()), default=self.epoch)
+
+
+class Compaction(NamedTuple):
+    """
+    The outcome of a compaction of a social network.
+
+    Attributes:
+        trimmed:
+            The number of posts trimmed from the timelines.
+        reclaimed:
+            The number of posts reclaimed from the post store.
+        reclaimed_bytes:
+            The number of bytes of columns and content reclaimed from the post
+            store, in memory or in segments.
+    """
+
+    trimmed: int
+    reclaimed: int
+    reclaimed_bytes: int
+
+
+class Compactor:
+    """
+    Compacts a social network periodically in a background thread.
+
+    Each compaction trims the timelines one user at a time, so it only holds
+    off the writers of one user at a time (see `ConcurrentSocialNetwork`),
+    and swaps in trimmed copies of the timelines and store columns, so that
+    readers are never blocked.
+
+    Attributes:
+        social_network:
+            The social network to compact, which must have a retention policy.
+        interval:
+            The number of seconds between two compactions.
+        runs:
+            The number of compactions run.
+        trimmed:
+            The number of posts trimmed from the timelines.
+        reclaimed:
+            The number of posts reclaimed from the post store.
+        reclaimed_bytes:
+            The number of bytes reclaimed from the post store.
+        last_seconds:
+            The duration of the latest compaction.
+        total_seconds:
+            The duration of all the compactions.
+    """
+
+    def __init__(self, social_network: "SocialNetwork", interval: float = 1.0):
+        """
+        Initializes a stopped compactor.
+
+        Args:
+            social_network:
+                The social network to compact, which must have a retention
+                policy.
+            interval:
+                The number of seconds between two compactions.
+
+        Raises:
+            ValueError:
+                If the social network has no retention policy.
+        """
+        if social_network.retention is None:
+            raise ValueError("Social network has no retention policy")
+
+        self.social_network = social_network
+        self.interval = interval
+        self.runs = 0
+        self.trimmed = 0
+        self.reclaimed = 0
+        self.reclaimed_bytes = 0
+        self.last_seconds = 0.0
+        self.total_seconds = 0.0
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "Compactor":
+        """Starts compacting."""
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info):
+        """Stops compacting."""
+        self.stop()
+
+    def start(self):
+        """Starts compacting in a background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops compacting, waiting for the compaction in progress if any."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def compact(self) -> Compaction:
+        """Compacts the social network once, updating the counters."""
+        start = time.perf_counter()
+        compaction = self.social_network.compact()
+        self.last_seconds = time.perf_counter() - start
+
+        self.runs += 1
+        self.trimmed += compaction.trimmed
+        self.reclaimed += compaction.reclaimed
+        self.reclaimed_bytes += compaction.reclaimed_bytes
+        self.total_seconds += self.last_seconds
+
+        log.debug("Compaction done in %.3f s: %s", self.last_seconds, compaction)
+        return compaction
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the counters of the compactions."""
+        return {
+            "runs": self.runs,
+            "trimmed": self.trimmed,
+            "reclaimed": self.reclaimed,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "last_seconds": self.last_seconds,
+            "total_seconds": self.total_seconds,
+        }
+
+    def _run(self):
+        """Compacts the social network every interval until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.compact()
+            except Exception:
+                log.exception("Compaction failed")
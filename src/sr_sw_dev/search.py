@@ -0,0 +1,251 @@
+"""An inverted index to search the content of the posts of a social network."""
+
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+import heapq
+import re
+import threading
+
+from src.sr_sw_dev.store import PostStore
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns the distinct lowercase words of a text, in order of appearance."""
+    return list(dict.fromkeys(TOKEN.findall(text.lower())))
+
+
+def parse_query(query: str) -> list[tuple[str, bool]]:
+    """
+    Parses a search query into the terms all matching posts must contain.
+
+    Words ending with "*" match any term they are a prefix of (e.g. "weath*"
+    matches "weather").
+
+    Returns:
+        The (term, is_prefix) pairs of the query.
+
+    Raises:
+        ValueError:
+            If the query has no terms.
+    """
+    terms = {}
+    for word in query.split():
+        tokens = tokenize(word)
+        for token in tokens:
+            terms.setdefault((token, False), None)
+        if word.endswith("*") and tokens:
+            # Only the last token of a word such as "don't*" is a prefix
+            del terms[tokens[-1], False]
+            terms[tokens[-1], True] = None
+
+    if not terms:
+        raise ValueError(f"Invalid search query: {query!r}")
+
+    return list(terms)
+
+
+def scan(store: PostStore, query: str) -> Iterator[int]:
+    """
+    Lazily yields the row ids of the posts matching a query, newest-first.
+
+    This is a linear scan of the store, tokenizing every post, for social
+    networks without an index.
+    """
+    terms = parse_query(query)
+    for post_id in store.iter_post_ids(reverse=True):
+        tokens = tokenize(store.get_content(post_id))
+        if all(
+            any(token.startswith(term) for token in tokens)
+            if is_prefix
+            else term in tokens
+            for term, is_prefix in terms
+        ):
+            yield post_id
+
+
+class InvertedIndex:
+    """
+    An in-memory inverted index of the content of posts.
+
+    Each term maps to a posting list of the row ids of the posts containing it.
+    Posts are indexed in the order they are appended to the post store, so
+    posting lists are sorted chronologically, like timelines.
+
+    A query is answered by walking the posting list of its rarest term
+    newest-first and keeping the posts that are in the posting lists of all
+    the other terms, which is checked by binary search. Thus a query costs
+    O(m log n) for m candidates, and stops as soon as enough posts matched.
+
+    Prefix terms are matched against a sorted vocabulary. New terms are only
+    merged into it by the next prefix query, so that indexing a post never
+    pays for keeping it sorted.
+
+    The index is thread-safe: indexing takes a short internal lock, while
+    queries only read posting lists, which are only ever appended to. Removing
+    posts replaces the posting lists rather than editing them in place, a batch
+    of terms at a time, so that it never holds the lock for long.
+
+    Attributes:
+        postings:
+            The posting list of each term.
+        terms:
+            The sorted vocabulary, as of the latest prefix query.
+    """
+
+    def __init__(self):
+        """Initializes an empty index."""
+        self.postings: dict[str, array] = {}
+        self.terms: list[str] = []
+        self._new_terms: list[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, post_id: int, content: str):
+        """
+        Indexes a post.
+
+        Posts are usually indexed in the order they were appended to the store,
+        but concurrent writers may index them slightly out of order, in which
+        case they are inserted in place to keep the posting lists sorted.
+        """
+        with self._lock:
+            postings = self.postings
+            for term in tokenize(content):
+                posting = postings.get(term)
+                if posting is None:
+                    postings[term] = array("q", [post_id])
+                    self._new_terms.append(term)
+                elif posting[-1] < post_id:
+                    posting.append(post_id)
+                else:
+                    insort(posting, post_id)
+
+    def load(self, store: PostStore):
+        """Indexes every post of a store, e.g. after it was loaded in bulk."""
+        for post_id in store.iter_post_ids():
+            self.add(post_id, store.get_content(post_id))
+
+    def remove(self, posts: Iterable[tuple[int, str]], batch_size: int = 1024):
+        """
+        Removes posts, e.g. once they are dropped from the store.
+
+        Only the posting lists of the terms of the posts are rewritten, so the
+        cost does not depend on the size of the rest of the index.
+
+        Args:
+            posts:
+                The (row id, content) pairs of the posts to remove.
+            batch_size:
+                The number of terms rewritten per acquisition of the lock.
+        """
+        removed: dict[str, list[int]] = {}
+        for post_id, content in posts:
+            for term in tokenize(content):
+                removed.setdefault(term, []).append(post_id)
+
+        terms = list(removed)
+        emptied = False
+        for i in range(0, len(terms), batch_size):
+            with self._lock:
+                postings = self.postings
+                for term in terms[i : i + batch_size]:
+                    posting = postings.get(term)
+                    if posting is None:
+                        continue
+
+                    # The runs between the removed posts are copied in C
+                    kept, previous = array("q"), 0
+                    for post_id in sorted(removed[term]):
+                        j = bisect_left(posting, post_id, previous)
+                        if j < len(posting) and posting[j] == post_id:
+                            kept.extend(posting[previous:j])
+                            previous = j + 1
+                    kept.extend(posting[previous:])
+                    if kept:
+                        postings[term] = kept
+                    else:
+                        del postings[term]
+                        emptied = True
+
+        if emptied:
+            with self._lock:
+                self.terms = [term for term in self.terms if term in self.postings]
+
+    def count_terms(self) -> int:
+        """Returns the number of distinct terms in the index."""
+        return len(self.postings)
+
+    def search(self, query: str) -> Iterator[int]:
+        """
+        Lazily yields the row ids of the posts matching a query, newest-first.
+
+        Args:
+            query:
+                The words all matching posts must contain (see `parse_query`).
+
+        Raises:
+            ValueError:
+                If the query has no terms.
+        """
+        groups = [
+            self._expand(term, is_prefix) for term, is_prefix in parse_query(query)
+        ]
+        if not all(groups):
+            return iter(())
+
+        # Candidates come from the rarest term, and are checked against the others
+        groups.sort(key=lambda group: sum(len(posting) for posting in group))
+        candidates = heapq.merge(
+            *(reversed(posting) for posting in groups[0]), reverse=True
+        )
+        others = groups[1:]
+
+        return (
+            post_id
+            for post_id in _dedupe(candidates)
+            if all(_contains(group, post_id) for group in others)
+        )
+
+    def _expand(self, term: str, is_prefix: bool) -> list[array]:
+        """Returns the posting lists of the terms matching a query term."""
+        if not is_prefix:
+            posting = self.postings.get(term)
+            return [] if posting is None else [posting]
+
+        if self._new_terms:
+            with self._lock:
+                self.terms = list(heapq.merge(self.terms, sorted(self._new_terms)))
+                self._new_terms = []
+
+        terms = self.terms
+        matches = []
+        for i in range(bisect_left(terms, term), len(terms)):
+            if not terms[i].startswith(term):
+                break
+            # The term may have been emptied since the vocabulary was sorted
+            posting = self.postings.get(terms[i])
+            if posting is not None:
+                matches.append(posting)
+
+        return matches
+
+
+def _contains(postings: list[array], post_id: int) -> bool:
+    """Checks if any of several sorted posting lists contains a post."""
+    for posting in postings:
+        i = bisect_left(posting, post_id)
+        if i < len(posting) and posting[i] == post_id:
+            return True
+
+    return False
+
+
+def _dedupe(post_ids: Iterable[int]) -> Iterator[int]:
+    """Skips the consecutive repeats of a sorted stream of row ids."""
+    previous = None
+    for post_id in post_ids:
+        if post_id != previous:
+            yield post_id
+            previous = post_id
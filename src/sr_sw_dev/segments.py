@@ -0,0 +1,143 @@
+"""Immutable on-disk segments holding the cold history of a post store."""
+
+from array import array
+import mmap
+import os
+from pathlib import Path
+import struct
+
+SEGMENT_MAGIC = b"SNSEG002"
+
+# The header holds the row id of the first post, the number of posts and the
+# arena offset of the first post. The columns follow it, 8-byte aligned, in
+# native byte order, and the arena comes last.
+SEGMENT_HEADER = struct.Struct("=8sqqq")
+
+
+class Segment:
+    """
+    An immutable, memory-mapped range of rows of a post store.
+
+    A segment holds the same columns as the post store for a contiguous range
+    of row ids, which are in append order and thus sorted by time. The columns
+    are read through zero-copy views over the mapped file, so only the pages
+    that are read are brought into memory, and the operating system can evict
+    them again under memory pressure.
+
+    Attributes:
+        path:
+            The path of the segment file.
+        start:
+            The row id of the first post of the segment.
+        stop:
+            The row id following the last post of the segment.
+        timestamps:
+            The timestamp of each post, in nanoseconds since the epoch.
+        offsets:
+            The offset of the content of each post in the store's arena. There
+            is one more offset than posts, marking the end of the last one.
+        authors:
+            The author id of each post.
+        arena:
+            The UTF-8 encoded content of the posts of the segment.
+        arena_start:
+            The offset of the segment's arena in the store's arena.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Maps a segment file into memory.
+
+        Args:
+            path:
+                The path of the segment file.
+
+        Raises:
+            ValueError:
+                If the file is not a segment.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        magic, self.start, n_posts, self.arena_start = SEGMENT_HEADER.unpack_from(view)
+        if magic != SEGMENT_MAGIC:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"Invalid segment: {self.path}")
+
+        self.stop = self.start + n_posts
+        offset = SEGMENT_HEADER.size
+        self.timestamps = view[offset : offset + 8 * n_posts].cast("q")
+        offset += 8 * n_posts
+        self.offsets = view[offset : offset + 8 * (n_posts + 1)].cast("q")
+        offset += 8 * (n_posts + 1)
+        self.authors = view[offset : offset + 4 * n_posts].cast("i")
+        offset += 4 * n_posts
+        self.arena = view[offset:]
+        self._view = view
+
+    @classmethod
+    def write(
+        cls,
+        path: Path,
+        start: int,
+        authors: array,
+        timestamps: array,
+        offsets: array,
+        arena: bytes,
+    ) -> "Segment":
+        """
+        Writes the columns of a range of posts to a segment file and maps it.
+
+        The file is written under a temporary name and renamed into place, so a
+        segment file is either complete or absent.
+
+        Args:
+            path:
+                The path of the segment file.
+            start:
+                The row id of the first post.
+            authors:
+                The author id of each post.
+            timestamps:
+                The timestamp of each post, in nanoseconds since the epoch.
+            offsets:
+                The offset of the content of each post in the store's arena,
+                plus the offset following the last one.
+            arena:
+                The UTF-8 encoded content of the posts.
+        """
+        path = Path(path)
+        temporary_path = path.with_suffix(".tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(
+                SEGMENT_HEADER.pack(SEGMENT_MAGIC, start, len(timestamps), offsets[0])
+            )
+            file.write(timestamps)
+            file.write(offsets)
+            file.write(authors)
+            file.write(arena)
+        os.replace(temporary_path, path)
+
+        return cls(path)
+
+    def __len__(self) -> int:
+        """Returns the number of posts in the segment."""
+        return self.stop - self.start
+
+    def get_content(self, post_id: int) -> str:
+        """Returns the content of a post of the segment."""
+        i = post_id - self.start
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return str(
+            self.arena[start - self.arena_start : stop - self.arena_start], "utf-8"
+        )
+
+    def close(self):
+        """Releases the views over the mapped file and unmaps it."""
+        for view in (self.timestamps, self.offsets, self.authors, self.arena):
+            view.release()
+        self._view.release()
+        self._mmap.close()
@@ -0,0 +1,320 @@
+"""
+An asyncio server speaking the command language of the application.
+
+Clients send one command per line, exactly as typed at the console prompt
+(e.g. "Alice -> Hello!" or "Bob wall"). Every command gets one response, in
+the order the commands were sent, so clients can pipeline them:
+
+- `OK <n>` followed by the `n` lines of the result of the command.
+- `ERR <message>` if the command is invalid.
+
+Sending "exit" closes the connection.
+"""
+
+import asyncio
+from collections.abc import Iterable
+import contextlib
+import logging
+from pathlib import Path
+
+from src.sr_sw_dev.social_networking import Application
+
+log = logging.getLogger(__name__)
+
+LINE_LIMIT = 64 * 1024
+
+
+def format_response(result: list[str] | None) -> bytes:
+    """Returns the response to a command that succeeded."""
+    lines = result or []
+    return "".join([f"OK {len(lines)}\n", *(f"{line}\n" for line in lines)]).encode()
+
+
+def format_error(error: Exception) -> bytes:
+    """Returns the response to a command that failed."""
+    message = " ".join(str(error).splitlines())
+    return f"ERR {message}\n".encode()
+
+
+class CommandServer:
+    """
+    A TCP or Unix-socket server executing the commands of an application.
+
+    Each connection reads its commands into a bounded queue, from which they
+    are executed and answered in order. When a client pipelines more than
+    `max_pipeline` commands ahead of the responses, the server stops reading
+    from it, and TCP flow control pushes back on the client. Likewise, the
+    server waits for slow clients to drain their responses before executing
+    more of their commands. At most `max_connections` clients are served at
+    once; others are answered with an error and disconnected.
+
+    Commands are executed on the event loop, which serializes them, so the
+    application does not have to be thread-safe.
+
+    Attributes:
+        application:
+            The application executing the commands.
+        max_connections:
+            The maximum number of clients served at once.
+        max_pipeline:
+            The maximum number of commands read ahead of their responses, per
+            connection.
+        n_connections:
+            The number of clients being served.
+        n_requests:
+            The number of commands executed.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        max_connections: int = 1024,
+        max_pipeline: int = 64,
+    ):
+        """
+        Initializes a server.
+
+        Args:
+            application:
+                The application executing the commands.
+            max_connections:
+                The maximum number of clients served at once.
+            max_pipeline:
+                The maximum number of commands read ahead of their responses,
+                per connection.
+        """
+        self.application = application
+        self.max_connections = max_connections
+        self.max_pipeline = max_pipeline
+        self.n_connections = 0
+        self.n_requests = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(
+        self, host: str | None = "127.0.0.1", port: int = 0, path: Path | None = None
+    ) -> asyncio.AbstractServer:
+        """
+        Starts listening for clients.
+
+        Args:
+            host:
+                The host to listen on over TCP.
+            port:
+                The port to listen on over TCP (any free port if 0).
+            path:
+                The path of a Unix socket to listen on instead of TCP.
+
+        Returns:
+            The underlying asyncio server, e.g. to read the port it listens on.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self.handle, path, limit=LINE_LIMIT
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self.handle, host, port, limit=LINE_LIMIT
+            )
+
+        log.debug("Server listening on %s", self.addresses())
+        return self._server
+
+    def addresses(self) -> list[str]:
+        """Returns the addresses the server listens on."""
+        if self._server is None:
+            return []
+
+        return [str(socket.getsockname()) for socket in self._server.sockets]
+
+    async def close(self):
+        """Stops listening and waits for the server to close."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves a client until it disconnects or sends "exit"."""
+        if self.n_connections >= self.max_connections:
+            writer.write(format_error(ValueError("Too many connections")))
+            await self._close_writer(writer)
+            return
+
+        self.n_connections += 1
+        commands: asyncio.Queue[str | None] = asyncio.Queue(self.max_pipeline)
+        receiving = asyncio.create_task(self._receive(reader, commands))
+        try:
+            while (command := await commands.get()) is not None:
+                writer.write(self.execute(command))
+                # Only waits if the client does not read its responses
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            log.debug("Client disconnected")
+        finally:
+            receiving.cancel()
+            self.n_connections -= 1
+            await self._close_writer(writer)
+
+    def execute(self, command: str) -> bytes:
+        """Executes a command and returns its response."""
+        self.n_requests += 1
+        try:
+            return format_response(self.application.parse_command(command))
+        except ValueError as error:
+            return format_error(error)
+        except Exception:
+            # Keep serving the client, whose other commands may well succeed
+            log.exception("Command failed: %s", command)
+            return format_error(RuntimeError("Internal error"))
+
+    async def _receive(
+        self, reader: asyncio.StreamReader, commands: "asyncio.Queue[str | None]"
+    ):
+        """
+        Reads commands into a bounded queue, which pauses reading when full.
+
+        The end of the commands is marked with None, unless reading is
+        cancelled: the connection is then being closed, nothing consumes the
+        queue anymore, and waiting for room in it would never end.
+        """
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip()
+                if command.lower() == "exit":
+                    break
+                if command:
+                    await commands.put(command)
+        except (ConnectionError, ValueError):
+            # ValueError is raised for lines longer than the stream limit
+            log.debug("Connection closed while reading")
+
+        await commands.put(None)
+
+    @staticmethod
+    async def _close_writer(writer: asyncio.StreamWriter):
+        """Closes a connection, ignoring clients that already disconnected."""
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+class CommandClient:
+    """
+    An asyncio client of a command server.
+
+    Commands can be pipelined by sending several of them before reading their
+    responses, which come back in the same order.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Initializes a client over an open connection."""
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(
+        cls, host: str = "127.0.0.1", port: int = 0, path: Path | None = None
+    ) -> "CommandClient":
+        """Connects to a server over TCP, or over a Unix socket if a path is given."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+        return cls(reader, writer)
+
+    def send(self, commands: Iterable[str]):
+        """Buffers commands to send, without waiting for their responses."""
+        self.writer.write("".join(f"{command}\n" for command in commands).encode())
+
+    async def receive(self) -> list[str]:
+        """
+        Reads the response to the oldest command awaiting one.
+
+        Raises:
+            ValueError:
+                If the command failed.
+            ConnectionError:
+                If the server closed the connection.
+        """
+        status = await self._readline()
+        if status.startswith("ERR "):
+            raise ValueError(status[4:])
+
+        return [await self._readline() for _ in range(int(status[3:]))]
+
+    async def request(self, command: str) -> list[str]:
+        """Sends a command and returns its result."""
+        self.send([command])
+        await self.writer.drain()
+        return await self.receive()
+
+    async def close(self):
+        """Closes the connection."""
+        self.writer.write(b"exit\n")
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+    async def _readline(self) -> str:
+        """Reads a line of a response."""
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+
+        return line.decode().rstrip("\n")
+
+
+async def serve(
+    host: str,
+    port: int,
+    path: Path | None = None,
+    max_connections: int = 1024,
+    max_pipeline: int = 64,
+):
+    """Serves a new application until cancelled."""
+    server = CommandServer(Application(), max_connections, max_pipeline)
+    await server.start(host, port, path)
+    print(f"Listening on {', '.join(server.addresses())}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: list[str] | None = None):
+    """
+    Runs the server from the command line.
+
+    Args:
+        argv:
+            The command line arguments (the ones of the process if None).
+    """
+    import argparse
+
+    from src.sr_sw_dev.log_config import configure_logging
+
+    parser = argparse.ArgumentParser(
+        description="Serve the social networking application over the network."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument("--max-connections", type=int, default=1024)
+    parser.add_argument("--max-pipeline", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.unix,
+                args.max_connections,
+                args.max_pipeline,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
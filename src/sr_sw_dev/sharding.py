@@ -0,0 +1,982 @@
+"""
+A social network partitioned by username across several worker processes.
+
+Each user is owned by one shard, picked by a stable hash of their name. A shard
+is a worker process holding a social network with the users it owns, their
+posts and their side of the follow graph. A coordinator in the calling process
+routes writes and timeline reads to the owning shard, and answers wall reads
+by scattering them to the shards of the followed users and merging the
+partial, newest-first walls they send back. Searches are scattered to every
+shard, each searching the index of its own posts.
+
+The coordinator sees every write, so it assigns their sequence ids from one
+clock: walls are merged by (timestamp, sequence id) across shards exactly like
+in a single social network, and the same ids version the timelines and
+following lists, so that versions compare across shards. It also assigns the
+dense ids of the users, in the order they are added.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+import heapq
+from itertools import islice
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+import zlib
+
+from src.sr_sw_dev.pagination import Cursor, Page
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import (
+    Post,
+    SocialNetwork,
+    render_posts,
+    render_wall,
+)
+from src.sr_sw_dev.store import to_nanoseconds
+from src.sr_sw_dev.walls import WallEntry
+
+log = logging.getLogger(__name__)
+
+# A post on a partial wall: its timestamp in nanoseconds since the epoch, its
+# global sequence id, its author and its content
+PartialEntry = tuple[int, int, str, str]
+
+# A request for a partial wall: the authors owned by the shard, the maximum
+# number of posts, the timestamps posts must be at or after and strictly older
+# than, and the (nanoseconds, seq) position they must come after newest-first
+WallRequest = tuple[
+    list[str], int | None, datetime | None, datetime | None, Cursor | None
+]
+
+
+def _newest_first(entry: PartialEntry) -> tuple[int, int]:
+    """Returns the sort key of a partial wall entry."""
+    return entry[0], entry[1]
+
+
+def _latest_first(entry: PartialEntry) -> int:
+    """Returns the sort key of a search result, i.e. its sequence id."""
+    return entry[1]
+
+
+class Shard:
+    """
+    The users owned by one worker process.
+
+    The posts of the users are kept in a social network, while the follow graph
+    is kept by name, since the users on the other side of a follow usually live
+    on another shard. The following list of a user is kept on their shard, and
+    their followers list on the shard of the followed user.
+
+    Attributes:
+        social_network:
+            The social network holding the users and their posts.
+        seqs:
+            The global sequence id of each post, indexed by its row id in the
+            post store of the shard.
+        following:
+            The names of the users each user is following.
+        followers:
+            The names of the users following each user.
+        ids:
+            The global id of each user.
+        timeline_versions:
+            The version of the timeline of each user, i.e. the sequence id of
+            their latest post or of their creation.
+        following_versions:
+            The version of the following list of each user, i.e. the sequence
+            id of its latest change or of their creation.
+    """
+
+    def __init__(self):
+        """Initializes an empty shard."""
+        self.social_network = SocialNetwork(index=InvertedIndex())
+        self.seqs = array("q")
+        self.following: dict[str, dict[str, None]] = {}
+        self.followers: dict[str, dict[str, None]] = {}
+        self.ids: dict[str, int] = {}
+        self.timeline_versions: dict[str, int] = {}
+        self.following_versions: dict[str, int] = {}
+
+    def add_user(self, name: str, user_id: int, seq: int) -> bool:
+        """
+        Adds a user to the shard, returning whether they did not exist yet.
+
+        A user added again keeps their id, like in a social network.
+        """
+        added = name not in self.ids
+        self.social_network.add_user(name)
+        self.following[name] = {}
+        self.followers[name] = {}
+        self.ids.setdefault(name, user_id)
+        self.timeline_versions[name] = self.following_versions[name] = seq
+        return added
+
+    def has_user(self, name: str) -> bool:
+        """Checks if the shard owns a user."""
+        return self.social_network.has_user(name)
+
+    def missing(self, names: list[str]) -> list[str]:
+        """Returns the given users that do not exist."""
+        return [name for name in names if not self.social_network.has_user(name)]
+
+    def count_users(self) -> int:
+        """Returns the number of users owned by the shard."""
+        return self.social_network.count_users()
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges from the users owned by the shard."""
+        return sum(len(following) for following in self.following.values())
+
+    def get_user_ids(self, names: list[str]) -> list[int]:
+        """Returns the global id of each user."""
+        self._require(*names)
+        return [self.ids[name] for name in names]
+
+    def add_posts(self, posts: list[tuple[str, str, datetime, int]]):
+        """Adds posts, given as (name, content, timestamp, seq), to their timelines."""
+        for name, post, timestamp, seq in posts:
+            self.social_network.add_post(name, post, timestamp)
+            self.seqs.append(seq)
+            self.timeline_versions[name] = seq
+
+    def get_timeline_versions(self, names: list[str]) -> list[int]:
+        """Returns the version of the timeline of each user."""
+        self._require(*names)
+        return [self.timeline_versions[name] for name in names]
+
+    def get_timeline(
+        self, name: str, if_changed_since: int | None = None
+    ) -> list[tuple[str, int, int]] | None:
+        """
+        Returns the (content, nanoseconds, seq) of the user's posts newest-first.
+
+        None is returned instead if the timeline has not changed since the
+        given version.
+        """
+        self._require(name)
+        if (
+            if_changed_since is not None
+            and self.timeline_versions[name] <= if_changed_since
+        ):
+            return None
+
+        store = self.social_network.store
+        return [
+            (store.get_content(i), store.get_nanoseconds(i), self.seqs[i])
+            for i in self.social_network.users[name].iter_post_ids()
+        ]
+
+    def read_timeline(self, name: str, request: WallRequest) -> list[PartialEntry]:
+        """Reads the posts of a user as a partial wall made of them alone."""
+        self._require(name)
+        return self.read_walls([request])[0]
+
+    def add_following(self, name: str, following: str, seq: int) -> bool:
+        """Adds a user to a following list, returning whether it changed."""
+        self._require(name)
+        if following == name or following in self.following[name]:
+            return False
+
+        self.following[name][following] = None
+        self.following_versions[name] = seq
+        return True
+
+    def remove_following(self, name: str, following: str, seq: int) -> bool:
+        """Removes a user from a following list, returning whether it changed."""
+        self._require(name)
+        if following not in self.following[name]:
+            return False
+
+        del self.following[name][following]
+        self.following_versions[name] = seq
+        return True
+
+    def add_follower(self, name: str, follower: str):
+        """Adds a user to a followers list."""
+        self.followers[name][follower] = None
+
+    def remove_follower(self, name: str, follower: str):
+        """Removes a user from a followers list."""
+        self.followers[name].pop(follower, None)
+
+    def get_following(self, names: list[str]) -> list[list[str]]:
+        """Returns the following list of each user."""
+        self._require(*names)
+        return [list(self.following[name]) for name in names]
+
+    def get_following_version(self, name: str) -> tuple[int, list[str]]:
+        """Returns the version of the following list of a user, and the list."""
+        self._require(name)
+        return self.following_versions[name], list(self.following[name])
+
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the followers list of a user."""
+        self._require(name)
+        return list(self.followers[name])
+
+    def read_walls(self, requests: list[WallRequest]) -> list[list[PartialEntry]]:
+        """
+        Reads partial walls made of the posts of the users owned by the shard.
+
+        Args:
+            requests:
+                For each wall, the names of its authors owned by the shard and
+                the bounds of the posts to read (see `WallRequest`).
+
+        Returns:
+            The entries of each partial wall, newest-first.
+        """
+        walls = []
+        for sources, limit, since, until, after in requests:
+            streams = [
+                self._iter_entries(name, since, until, after) for name in sources
+            ]
+            merged = heapq.merge(*streams, key=_newest_first, reverse=True)
+            walls.append(list(merged if limit is None else islice(merged, limit)))
+
+        return walls
+
+    def search(self, query: str, limit: int, author: str | None) -> list[PartialEntry]:
+        """Returns the posts of the shard matching a query, latest-first."""
+        store = self.social_network.store
+        ids = self.social_network.index.search(query)
+        if author is not None:
+            ids = (i for i in ids if store.get_author(i) == author)
+
+        return [
+            (
+                store.get_nanoseconds(i),
+                self.seqs[i],
+                store.get_author(i),
+                store.get_content(i),
+            )
+            for i in islice(ids, limit)
+        ]
+
+    def _iter_entries(
+        self,
+        name: str,
+        since: datetime | None,
+        until: datetime | None,
+        after: Cursor | None,
+    ) -> Iterator[PartialEntry]:
+        """
+        Lazily yields the posts of a user as partial wall entries newest-first.
+
+        The posts of a shard are appended in the order of their sequence ids,
+        so a timeline is sorted by (timestamp, sequence id) and the cursor is
+        found by binary search, like in `User.iter_post_ids`.
+        """
+        store, seqs = self.social_network.store, self.seqs
+        ids = self.social_network.users[name].post_ids
+        start, end = 0, len(ids)
+        if since is not None:
+            start = bisect_left(ids, to_nanoseconds(since), key=store.get_nanoseconds)
+        if until is not None:
+            end = bisect_left(ids, to_nanoseconds(until), key=store.get_nanoseconds)
+        if after is not None:
+            end = min(
+                end,
+                bisect_left(
+                    ids, after, key=lambda i: (store.get_nanoseconds(i), seqs[i])
+                ),
+            )
+
+        for i in map(ids.__getitem__, range(end - 1, start - 1, -1)):
+            yield store.get_nanoseconds(i), seqs[i], name, store.get_content(i)
+
+    def _require(self, *names: str):
+        """Raises a ValueError if any of the users does not exist."""
+        for name in names:
+            if not self.social_network.has_user(name):
+                raise ValueError(f"User {name} does not exist")
+
+
+def serve_shard(connection: Connection):
+    """
+    Runs a shard, answering the requests of the coordinator until it sends None.
+
+    Each request is a (method, args) pair naming a method of the shard, and is
+    answered with (True, result), or with (False, message) if the method raised
+    a ValueError.
+    """
+    shard = Shard()
+    while (request := connection.recv()) is not None:
+        method, args = request
+        try:
+            reply = (True, getattr(shard, method)(*args))
+        except ValueError as error:
+            reply = (False, str(error))
+        connection.send(reply)
+
+    connection.close()
+
+
+class ShardedSocialNetwork:
+    """
+    A social network whose users are partitioned across worker processes.
+
+    It has the same interface as `SocialNetwork`, so that an `Application` can
+    run on top of it, except for the features that need all the users in one
+    process: there is no `get_follow_graph` snapshot, nor `compact`, since the
+    shards keep every post. Every call is answered by the shards, so the
+    coordinator only routes requests and merges results. Writes and timeline
+    reads go to the shard owning the user, while a wall read first asks the
+    owner for their following list, then scatters to the shards of the
+    followed users at once and merges their partial walls. Since the shards
+    work in parallel, throughput scales with the number of shards when
+    requests are batched with `add_posts` and `get_user_walls`.
+
+    Each shard is driven over a pipe by a single coordinator, so the methods
+    must not be called from several threads at once.
+
+    Attributes:
+        n_shards:
+            The number of shards.
+        processes:
+            The worker process of each shard.
+        connections:
+            The pipe to each shard.
+        seq:
+            The sequence id of the next post or change of a following list.
+        n_users:
+            The number of users added, i.e. the id of the next user.
+    """
+
+    def __init__(self, n_shards: int = 4, start_method: str | None = "spawn"):
+        """
+        Starts the worker processes of a sharded social network.
+
+        Args:
+            n_shards:
+                The number of shards.
+            start_method:
+                The multiprocessing start method of the workers (the default
+                one of the platform if None). Workers are spawned by default,
+                since forked ones would inherit the logging handlers of the
+                parent, e.g. an `AsyncFileHandler` whose writer thread does not
+                survive the fork.
+
+        Raises:
+            ValueError:
+                If the number of shards is not positive.
+        """
+        if n_shards < 1:
+            raise ValueError("The number of shards must be positive")
+
+        context = multiprocessing.get_context(start_method)
+        self.n_shards = n_shards
+        self.seq = 0
+        self.n_users = 0
+        self.processes = []
+        self.connections: list[Connection] = []
+        for _ in range(n_shards):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=serve_shard, args=(worker_connection,), daemon=True
+            )
+            process.start()
+            worker_connection.close()
+            self.processes.append(process)
+            self.connections.append(connection)
+
+        log.debug("Sharded social network initialized with %d shards", n_shards)
+
+    def __enter__(self) -> "ShardedSocialNetwork":
+        """Returns the social network, closing it on exit."""
+        return self
+
+    def __exit__(self, *_exc_info):
+        """Stops the worker processes."""
+        self.close()
+
+    def close(self):
+        """Stops the worker processes, discarding their users."""
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+        self.connections.clear()
+        self.processes.clear()
+
+    def shard_of(self, name: str) -> int:
+        """Returns the shard owning a user, which is stable across processes."""
+        return zlib.crc32(name.encode()) % self.n_shards
+
+    def has_users(self) -> bool:
+        """Checks if the social network has any users."""
+        return self.count_users() > 0
+
+    def add_user(self, name: str):
+        """Adds a user to the social network."""
+        if self._call(
+            self.shard_of(name), "add_user", name, self.n_users, self._next_seq()
+        ):
+            self.n_users += 1
+
+        log.debug("User added to shard %d: %s", self.shard_of(name), name)
+
+    def has_user(self, name: str) -> bool:
+        """Checks if the social network has a user with the given name."""
+        return self._call(self.shard_of(name), "has_user", name)
+
+    def count_users(self) -> int:
+        """Returns the number of users in the social network."""
+        counts = self._scatter(dict.fromkeys(range(self.n_shards), ("count_users", ())))
+        return sum(counts.values())
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges in the social network."""
+        counts = self._scatter(
+            dict.fromkeys(range(self.n_shards), ("count_follows", ()))
+        )
+        return sum(counts.values())
+
+    def add_post(self, name: str, post: str, timestamp: datetime | None = None):
+        """
+        Adds a post to the user's timeline.
+
+        Args:
+            name:
+                The name of the user.
+            post:
+                The post to add.
+            timestamp:
+                The timestamp of the post (now if None), e.g. when replaying it.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        self.add_posts([(name, post, timestamp)])
+
+    def add_posts(self, posts: Iterable[tuple[str, str, datetime | None]]):
+        """
+        Adds a batch of posts, sending each shard its posts at once.
+
+        Args:
+            posts:
+                The (name, content, timestamp) of each post, the timestamp
+                being now if None.
+
+        Raises:
+            ValueError:
+                If a user does not exist, in which case no post is added.
+        """
+        now = datetime.now()
+        batches = defaultdict(list)
+        for seq, (name, post, timestamp) in enumerate(posts, self.seq):
+            batches[self.shard_of(name)].append(
+                (name, post, now if timestamp is None else timestamp, seq)
+            )
+
+        names = [name for batch in batches.values() for name, *_ in batch]
+        self._require(*names)
+        self.seq += len(names)
+        self._scatter(
+            {shard: ("add_posts", (batch,)) for shard, batch in batches.items()}
+        )
+
+    def get_timeline_version(self, name: str) -> int:
+        """
+        Returns the version of the timeline of the user.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        return self._call(self.shard_of(name), "get_timeline_versions", [name])[0]
+
+    def get_user_timeline(
+        self, name: str, if_changed_since: int | None = None
+    ) -> list[str] | None:
+        """
+        Returns the timeline of the user.
+
+        Args:
+            name:
+                The name of the user.
+            if_changed_since:
+                A version of the timeline (see `get_timeline_version`). If the
+                timeline has not changed since, None is returned without
+                reading it.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        timeline = self._call(
+            self.shard_of(name), "get_timeline", name, if_changed_since
+        )
+        if timeline is None:
+            return None
+
+        return render_posts([Post.load(*post) for post in timeline])
+
+    def get_timeline_page(
+        self,
+        name: str,
+        limit: int = 20,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Page:
+        """
+        Returns a page of the timeline of the user newest-first.
+
+        The page is read by the shard of the user, with one more post to know
+        whether there is a next one.
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts in the page.
+            cursor:
+                The cursor of the previous page (the newest posts if None).
+            since:
+                Only return posts at or after this timestamp.
+            until:
+                Only return posts strictly older than this timestamp.
+
+        Raises:
+            ValueError:
+                If the user does not exist, or the limit or cursor is invalid.
+        """
+        after = self._decode_cursor(cursor, limit)
+        entries = self._call(
+            self.shard_of(name),
+            "read_timeline",
+            name,
+            ([name], limit + 1, since, until, after),
+        )
+        entries, next_cursor = self._paginate(entries, limit)
+        return Page(
+            render_posts(
+                [
+                    Post.load(content, nanoseconds, seq)
+                    for nanoseconds, seq, _, content in entries
+                ]
+            ),
+            next_cursor,
+        )
+
+    def follows(self, name: str, following: str):
+        """Adds a user to the user's following list."""
+        self._require(name, following)
+        if self._call(
+            self.shard_of(name), "add_following", name, following, self._next_seq()
+        ):
+            self._call(self.shard_of(following), "add_follower", following, name)
+
+        log.debug("%s follows %s in sharded social network", name, following)
+
+    def unfollows(self, name: str, following: str):
+        """Removes a user from the user's following list."""
+        self._require(name, following)
+        if self._call(
+            self.shard_of(name), "remove_following", name, following, self._next_seq()
+        ):
+            self._call(self.shard_of(following), "remove_follower", following, name)
+
+        log.debug("%s unfollows %s in sharded social network", name, following)
+
+    def is_following(self, name: str, following: str) -> bool:
+        """Checks if a user is following another user."""
+        return following in self.get_following(name)
+
+    def get_following(self, name: str) -> list[str]:
+        """Returns the users that the user is following."""
+        return self._call(self.shard_of(name), "get_following", [name])[0]
+
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the users following the user."""
+        return self._call(self.shard_of(name), "get_followers", name)
+
+    def get_user_id(self, name: str) -> int:
+        """
+        Returns the integer id of a user.
+
+        Users are assigned dense ids in the order they are added, from 0 to the
+        number of users, by the coordinator.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        return self._call(self.shard_of(name), "get_user_ids", [name])[0]
+
+    def suggest_follows(self, name: str, k: int = 10) -> list[str]:
+        """
+        Suggests users to follow, among the ones followed by one's followees.
+
+        Candidates are ranked by the number of the user's followees following
+        them, ties broken by the oldest user first, like in a social network.
+        The following lists of the followees are gathered from their shards at
+        once, then the ids of the best candidates from theirs.
+
+        Args:
+            name:
+                The name of the user.
+            k:
+                The maximum number of suggestions.
+
+        Raises:
+            ValueError:
+                If the user does not exist or k is not positive.
+        """
+        if k < 1:
+            raise ValueError("The number of suggestions must be positive")
+
+        following = self.get_following(name)
+        counts = Counter(
+            candidate
+            for followees in self._gather("get_following", following)
+            for candidate in followees
+        )
+        for followed in (name, *following):
+            counts.pop(followed, None)
+        if not counts:
+            return []
+
+        # Only the candidates at or above the k-th count need their ids, to
+        # break ties
+        threshold = heapq.nlargest(k, counts.values())[-1]
+        candidates = [candidate for candidate, n in counts.items() if n >= threshold]
+        ids = dict(
+            zip(candidates, self._gather("get_user_ids", candidates), strict=True)
+        )
+        return heapq.nsmallest(
+            k, candidates, key=lambda candidate: (-counts[candidate], ids[candidate])
+        )
+
+    def get_wall_version(self, name: str) -> int:
+        """
+        Returns the version of the wall of the user.
+
+        The version is the newest of the versions of the user's following list
+        and of the timelines on their wall, which are read from the shards of
+        their authors at once.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        version, following = self._call(
+            self.shard_of(name), "get_following_version", name
+        )
+        return max(version, *self._gather("get_timeline_versions", [name, *following]))
+
+    def get_user_wall(
+        self,
+        name: str,
+        limit: int | None = None,
+        before: datetime | None = None,
+        if_changed_since: int | None = None,
+    ) -> list[str] | None:
+        """
+        Returns the wall of the user newest-first.
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts to return (all of them if None).
+            before:
+                Only return posts strictly older than this timestamp.
+            if_changed_since:
+                A version of the wall (see `get_wall_version`). If the wall has
+                not changed since, None is returned without reading it.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        if (
+            if_changed_since is not None
+            and self.get_wall_version(name) <= if_changed_since
+        ):
+            return None
+
+        return self.get_user_walls([name], limit, before)[0]
+
+    def get_user_walls(
+        self,
+        names: list[str],
+        limit: int | None = None,
+        before: datetime | None = None,
+    ) -> list[list[str]]:
+        """
+        Returns the walls of several users newest-first, reading them at once.
+
+        The following lists of the users are gathered from their shards, then
+        each shard is sent one request for the partial walls of all the users,
+        made of the posts it owns. A shard sends at most `limit` posts per wall,
+        so the coordinator merges at most `limit` posts from each shard.
+
+        Args:
+            names:
+                The names of the users.
+            limit:
+                The maximum number of posts per wall (all of them if None).
+            before:
+                Only return posts strictly older than this timestamp.
+
+        Raises:
+            ValueError:
+                If a user does not exist.
+        """
+        return [
+            self._render_wall(entries)
+            for entries in self._read_walls(names, limit, None, before, None)
+        ]
+
+    def get_wall_page(
+        self,
+        name: str,
+        limit: int = 20,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Page:
+        """
+        Returns a page of the wall of the user newest-first.
+
+        Each shard resumes the timelines it owns after the cursor and sends
+        back at most one more post than the page, so the coordinator merges
+        O(limit) posts from each shard.
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts in the page.
+            cursor:
+                The cursor of the previous page (the newest posts if None).
+            since:
+                Only return posts at or after this timestamp.
+            until:
+                Only return posts strictly older than this timestamp.
+
+        Raises:
+            ValueError:
+                If the user does not exist, or the limit or cursor is invalid.
+        """
+        after = self._decode_cursor(cursor, limit)
+        (entries,) = self._read_walls([name], limit + 1, since, until, after)
+        entries, next_cursor = self._paginate(entries, limit)
+        return Page(self._render_wall(entries), next_cursor)
+
+    def search(
+        self, query: str, limit: int = 20, author: str | None = None
+    ) -> list[str]:
+        """
+        Returns the posts matching a query newest-first, rendered like a wall.
+
+        Every shard searches its own index, or only the shard of the author if
+        any, and sends back at most `limit` posts. Their results are merged by
+        sequence id, i.e. the most recently posted first.
+
+        Args:
+            query:
+                The words all matching posts must contain, where words ending
+                with "*" are prefixes (e.g. "weath* today").
+            limit:
+                The maximum number of posts to return.
+            author:
+                Only return the posts of this user (everyone's if None).
+
+        Raises:
+            ValueError:
+                If the author does not exist, or the query or limit is invalid.
+        """
+        if limit < 1:
+            raise ValueError("The search limit must be positive")
+        if author is None:
+            shards = range(self.n_shards)
+        else:
+            self._require(author)
+            shards = [self.shard_of(author)]
+
+        replies = self._scatter(
+            dict.fromkeys(shards, ("search", (query, limit, author)))
+        )
+        merged = heapq.merge(*replies.values(), key=_latest_first, reverse=True)
+        return render_wall(
+            [
+                WallEntry(name, Post.load(content, nanoseconds, seq))
+                for nanoseconds, seq, name, content in islice(merged, limit)
+            ]
+        )
+
+    def commit(self):
+        """Does nothing, as the shards are not persistent."""
+
+    def _next_seq(self) -> int:
+        """Returns the next sequence id, to version a write."""
+        seq = self.seq
+        self.seq += 1
+        return seq
+
+    def _read_walls(
+        self,
+        names: list[str],
+        limit: int | None,
+        since: datetime | None,
+        until: datetime | None,
+        after: Cursor | None,
+    ) -> list[list[PartialEntry]]:
+        """
+        Reads the entries of several walls newest-first, reading them at once.
+
+        The following lists of the users are gathered from their shards, then
+        each shard is sent one request for the partial walls of all the users,
+        made of the posts it owns, which are merged by the coordinator.
+
+        Raises:
+            ValueError:
+                If a user does not exist.
+        """
+        following = dict(zip(names, self._gather("get_following", names), strict=True))
+
+        # Each shard is sent the authors it owns on every wall
+        requests = defaultdict(lambda: [[] for _ in names])
+        for i, name in enumerate(names):
+            for author in [name, *following[name]]:
+                requests[self.shard_of(author)][i].append(author)
+
+        replies = self._scatter(
+            {
+                shard: (
+                    "read_walls",
+                    ([(sources, limit, since, until, after) for sources in walls],),
+                )
+                for shard, walls in requests.items()
+            }
+        )
+
+        walls = []
+        for i in range(len(names)):
+            partials = [replies[shard][i] for shard in replies]
+            merged = heapq.merge(*partials, key=_newest_first, reverse=True)
+            walls.append(list(islice(merged, limit)))
+
+        return walls
+
+    def _render_wall(self, entries: list[PartialEntry]) -> list[str]:
+        """Renders the entries of a wall."""
+        return render_wall(
+            [
+                WallEntry(author, Post.load(content, nanoseconds, seq))
+                for nanoseconds, seq, author, content in entries
+            ]
+        )
+
+    def _decode_cursor(self, cursor: str | None, limit: int) -> Cursor | None:
+        """Checks a page limit and decodes a cursor to a (nanoseconds, seq) one."""
+        if limit < 1:
+            raise ValueError("The page limit must be positive")
+        if cursor is None:
+            return None
+
+        after = Cursor.decode(cursor)
+        if not 0 <= after.post_id < self.seq:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+        return after
+
+    def _paginate(
+        self, entries: list[PartialEntry], limit: int
+    ) -> tuple[list[PartialEntry], str | None]:
+        """Cuts a page of entries, along with the cursor of the next page if any."""
+        if len(entries) <= limit:
+            return entries, None
+
+        del entries[limit:]
+        nanoseconds, seq, *_ = entries[-1]
+        return entries, Cursor(nanoseconds, seq).encode()
+
+    def _gather(self, method: str, names: list[str]) -> list:
+        """
+        Calls a method taking a list of users on their shards at once.
+
+        Each shard is sent the users it owns, and their results are put back
+        in the order of the users.
+
+        Raises:
+            ValueError:
+                If a user does not exist.
+        """
+        owners = defaultdict(list)
+        for i, name in enumerate(names):
+            owners[self.shard_of(name)].append(i)
+
+        replies = self._scatter(
+            {
+                shard: (method, ([names[i] for i in positions],))
+                for shard, positions in owners.items()
+            }
+        )
+        results = [None] * len(names)
+        for shard, positions in owners.items():
+            for i, result in zip(positions, replies[shard], strict=True):
+                results[i] = result
+
+        return results
+
+    def _require(self, *names: str):
+        """Raises a ValueError for the first of the users that does not exist."""
+        batches = defaultdict(list)
+        for name in names:
+            batches[self.shard_of(name)].append(name)
+
+        replies = self._scatter(
+            {shard: ("missing", (batch,)) for shard, batch in batches.items()}
+        )
+        missing = {name for reply in replies.values() for name in reply}
+        for name in names:
+            if name in missing:
+                raise ValueError(f"User {name} does not exist")
+
+    def _call(self, shard: int, method: str, *args: object) -> object:
+        """Calls a method of a shard and returns its result."""
+        return self._scatter({shard: (method, args)})[shard]
+
+    def _scatter(self, requests: dict[int, tuple[str, tuple]]) -> dict[int, object]:
+        """
+        Sends requests to several shards at once, then gathers their results.
+
+        Args:
+            requests:
+                The method and arguments to call on each shard.
+
+        Returns:
+            The result of each shard.
+
+        Raises:
+            ValueError:
+                If a shard raised one, once all the shards answered.
+        """
+        for shard, request in requests.items():
+            self.connections[shard].send(request)
+
+        results = {}
+        error = None
+        for shard in requests:
+            succeeded, result = self.connections[shard].recv()
+            if succeeded:
+                results[shard] = result
+            elif error is None:
+                error = ValueError(result)
+
+        if error is not None:
+            raise error
+
+        return results
@@ -6,35 +6,101 @@ The application allows users to:
 - read the timeline of another user (e.g. "Alice").
 - follow other users (e.g. "Alice follows Bob").
 - read the wall of another user (e.g. "Alice wall").
+- read a page of a timeline or wall (e.g. "Alice timeline limit=20" or
+  "Alice wall limit=20 since=2024-01-01T12:00 cursor=...").
+- search the posts of everyone or of a user (e.g. "search weath*" or
+  "Alice search weather today").
 """
 
-import configparser
+from array import array
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from datetime import datetime
 from functools import total_ordering
+import heapq
+from itertools import count, islice, takewhile
 import logging
-import logging.config
-import os
+import re
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, TextIO
+
+from src.sr_sw_dev.elapsed import format_elapsed_nanoseconds, format_elapsed_time
+from src.sr_sw_dev.pagination import Cursor, Page
+from src.sr_sw_dev.store import PostStore, from_nanoseconds, to_nanoseconds
+from src.sr_sw_dev.walls import FanoutWalls, WallEntry, merge_newest_first
+
+# The optional subsystems are only imported where they are built, so that
+# importing the application does not pay for the ones it does not use
+if TYPE_CHECKING:
+    from src.sr_sw_dev.cache import RenderCache
+    from src.sr_sw_dev.graph import FollowGraph
+    from src.sr_sw_dev.metrics import Metrics
+    from src.sr_sw_dev.persistence import Persistence
+    from src.sr_sw_dev.retention import Compaction, Retention
+    from src.sr_sw_dev.search import InvertedIndex
+    from src.sr_sw_dev.storage import StorageBackend
 
-from dateutil.relativedelta import relativedelta
+log = logging.getLogger(__name__)
 
-from src.sr_sw_dev import paths
+# Versions are drawn from a single clock shared by every user, so that the
+# version of a wall can be the newest version of its authors. The clock starts
+# at the current time in nanoseconds, so that the versions handed out before a
+# restart are not handed out again after it
+_versions = count(time.time_ns())
 
-# Create log directory if it doesn't exist
-os.makedirs(paths.log_dir, exist_ok=True)
+# Suggestions are served from a snapshot of the follow graph that may lag
+# behind the graph by up to this fraction of its edges in changes, so that
+# exporting it again only costs O(1) amortized per change
+SUGGESTION_STALENESS = 1 / 16
 
-# Read and format the logging configuration
-config = configparser.ConfigParser()
-config.read(paths.config_dir / "logger.ini")
 
-# Format the log directory in the file handler args
-args = config.get("handler_file", "args")
-args = args.format(log_dir=paths.log_dir)
-config.set("handler_file", "args", args)
+def next_version() -> int:
+    """Returns a version newer than every version returned before."""
+    return next(_versions)
 
-# Apply the logging configuration
-logging.config.fileConfig(config, defaults={"log_dir": paths.log_dir})
 
-log = logging.getLogger(__name__)
+def render_posts(posts: Sequence["Post"], now: datetime | None = None) -> list[str]:
+    """
+    Renders several posts with a single clock read.
+
+    Args:
+        posts:
+            The posts to render.
+        now:
+            The timestamp to compute elapsed times against (the current one if
+            None).
+    """
+    now = datetime.now() if now is None else now
+    labels = format_elapsed_nanoseconds([post.nanoseconds for post in posts], now)
+
+    return [
+        f"{post.content} ({label})" for post, label in zip(posts, labels, strict=True)
+    ]
+
+
+def render_wall(entries: Sequence[WallEntry], now: datetime | None = None) -> list[str]:
+    """
+    Renders several wall entries with a single clock read.
+
+    Args:
+        entries:
+            The wall entries to render.
+        now:
+            The timestamp to compute elapsed times against (the current one if
+            None).
+    """
+    now = datetime.now() if now is None else now
+    labels = format_elapsed_nanoseconds(
+        [entry.post.nanoseconds for entry in entries], now
+    )
+
+    return [
+        f"{entry.author} - {entry.post.content} ({label})"
+        for entry, label in zip(entries, labels, strict=True)
+    ]
 
 
 @total_ordering
@@ -42,13 +108,22 @@ class Post:
     """
     A post on a user's timeline.
 
+    Posts are ordered by timestamp, then by sequence id, which is a strict
+    total order for the posts of a social network: the sequence id of a post
+    is its row id in the post store, which only ever grows. Comparing them
+    only takes integer comparisons.
+
     Attributes:
         content:
             The content of the post.
-        timestamp:
-            The timestamp of the post.
+        nanoseconds:
+            The timestamp of the post, in nanoseconds since the epoch.
+        seq:
+            The sequence id of the post (-1 if it is not in a post store).
     """
 
+    __slots__ = ("content", "nanoseconds", "seq")
+
     def __init__(self, content: str):
         """
         Initializes a post.
@@ -58,28 +133,76 @@ class Post:
                 The content of the post.
         """
         self.content = content
-        self.timestamp = datetime.now().replace(microsecond=0)
+        self.nanoseconds = to_nanoseconds(datetime.now())
+        self.seq = -1
 
-        log.debug(f"Post initialized: {self.content} ({self.timestamp})")
+        log.debug("Post initialized: %s (%s)", self.content, self.timestamp)
+
+    @classmethod
+    def restore(cls, content: str, timestamp: datetime, seq: int = -1) -> "Post":
+        """Returns a post with the given content, timestamp and sequence id."""
+        return cls.load(content, to_nanoseconds(timestamp), seq)
+
+    @classmethod
+    def load(cls, content: str, nanoseconds: int, seq: int) -> "Post":
+        """Returns a post with the given content, epoch timestamp and sequence id."""
+        post = cls.__new__(cls)
+        post.content = content
+        post.nanoseconds = nanoseconds
+        post.seq = seq
+
+        return post
+
+    @property
+    def timestamp(self) -> datetime:
+        """Returns the timestamp of the post."""
+        return from_nanoseconds(self.nanoseconds)
 
     def __eq__(self, other: "Post") -> bool:
-        """Checks if this post is equal to another post."""
-        return self.content == other.content and self.timestamp == other.timestamp
+        """
+        Checks if this post is equal to another post.
+
+        Posts are equal if they have the same timestamp, sequence id and
+        content, so that equality agrees with the order of the posts.
+        """
+        return (self.nanoseconds, self.seq, self.content) == (
+            other.nanoseconds,
+            other.seq,
+            other.content,
+        )
 
     def __lt__(self, other: "Post") -> bool:
-        """Checks if this post is less than another post."""
-        return self.timestamp < other.timestamp
+        """
+        Checks if this post comes before another post.
+
+        Contents only break the ties between posts outside of a post store,
+        which share their sequence id.
+        """
+        return (self.nanoseconds, self.seq, self.content) < (
+            other.nanoseconds,
+            other.seq,
+            other.content,
+        )
 
     def __str__(self) -> str:
         """Returns a string representation of the post."""
         return f"{self.content} ({self._format_elapsed_time()})"
 
+    def displays_like(self, other: "Post") -> bool:
+        """
+        Checks if this post is displayed like another post.
+
+        Like the elapsed times they are displayed with, timestamps are only
+        compared to the second.
+        """
+        return (
+            self.content == other.content
+            and self.nanoseconds // 1_000_000_000 == other.nanoseconds // 1_000_000_000
+        )
+
     def signed_copy(self, author: str) -> "Post":
         """Returns a copy of the post with the author's name."""
-        post = Post(f"{author} - {self.content}")
-        post.timestamp = self.timestamp
-
-        return post
+        return Post.load(f"{author} - {self.content}", self.nanoseconds, self.seq)
 
     def get_content(self) -> str:
         """Returns the content of the post."""
@@ -88,82 +211,180 @@ class Post:
     def is_recent(self) -> bool:
         """Checks if the post is recent."""
         return (
-            datetime.now().replace(microsecond=0) - self.timestamp
+            datetime.now().replace(microsecond=0)
+            - self.timestamp.replace(microsecond=0)
         ).total_seconds() < 1
 
     def _format_elapsed_time(self) -> str:
         """Returns the elapsed time since the post was created."""
-        delta = relativedelta(
-            datetime.now().replace(microsecond=0),
-            self.timestamp,
-        )
+        return format_elapsed_time(self.timestamp, datetime.now())
 
-        # Only show the most meaningful time unit
-        elapsed_time = ""
-        if delta.years > 0:
-            elapsed_time = f"{delta.years} year{'s' if delta.years != 1 else ''} ago"
-        elif delta.months > 0:
-            elapsed_time = f"{delta.months} month{'s' if delta.months != 1 else ''} ago"
-        elif delta.days > 0:
-            elapsed_time = f"{delta.days} day{'s' if delta.days != 1 else ''} ago"
-        elif delta.hours > 0:
-            elapsed_time = f"{delta.hours} hour{'s' if delta.hours != 1 else ''} ago"
-        elif delta.minutes > 0:
-            elapsed_time = (
-                f"{delta.minutes} minute{'s' if delta.minutes != 1 else ''} ago"
-            )
-        elif delta.seconds > 0:
-            elapsed_time = (
-                f"{delta.seconds} second{'s' if delta.seconds != 1 else ''} ago"
-            )
-        else:
-            elapsed_time = "just now"
 
-        return elapsed_time
+class PostList(Sequence[Post]):
+    """
+    A read-only view over some posts of a post store, sorted chronologically.
+
+    Posts are only materialized as `Post` objects when they are accessed.
+
+    Attributes:
+        store:
+            The post store holding the posts.
+        ids:
+            The row ids of the posts in the store.
+    """
+
+    __slots__ = ("ids", "store")
+
+    def __init__(self, store: PostStore, ids: Sequence[int]):
+        """
+        Initializes a view over some posts of a post store.
+
+        Args:
+            store:
+                The post store holding the posts.
+            ids:
+                The row ids of the posts in the store.
+        """
+        self.store = store
+        self.ids = ids
+
+    def __len__(self) -> int:
+        """Returns the number of posts."""
+        return len(self.ids)
+
+    def __getitem__(self, index: int | slice) -> Post | list[Post]:
+        """Returns the post (or list of posts) at the given index (or slice)."""
+        if isinstance(index, slice):
+            return [self._get(post_id) for post_id in self.ids[index]]
+
+        return self._get(self.ids[index])
+
+    def __iter__(self) -> Iterator[Post]:
+        """Yields the posts chronologically."""
+        return map(self._get, self.ids)
+
+    def __reversed__(self) -> Iterator[Post]:
+        """Yields the posts newest-first."""
+        return map(self._get, reversed(self.ids))
+
+    def __eq__(self, other: object) -> bool:
+        """Checks if two sequences of posts are equal."""
+        if not isinstance(other, Sequence):
+            return NotImplemented
+
+        return len(self) == len(other) and all(
+            post == other_post for post, other_post in zip(self, other, strict=True)
+        )
+
+    def _get(self, post_id: int) -> Post:
+        """Materializes the post with the given row id."""
+        store = self.store
+        return Post.load(
+            store.get_content(post_id), store.get_nanoseconds(post_id), post_id
+        )
 
 
 class User:
     """
     A user of a social network.
 
+    The posts of the user are kept in a (possibly shared) columnar post store,
+    so that a user only owns the row ids of their posts.
+
     Attributes:
         name:
             The name of the user.
-        posts:
-            The posts of the user.
+        store:
+            The post store holding the posts of the user.
+        author_id:
+            The interned id of the user in the post store.
+        post_ids:
+            The row ids of the posts of the user, chronologically sorted.
         following:
-            The users that the user is following.
+            The users that the user is following, by name.
+        followers:
+            The users following the user, by name.
+        timeline_version:
+            The version of the timeline of the user, bumped on post.
+        following_version:
+            The version of the following list of the user, bumped on follow
+            and unfollow.
     """
 
-    def __init__(self, name: str):
+    __slots__ = (
+        "author_id",
+        "followers",
+        "following",
+        "following_version",
+        "name",
+        "post_ids",
+        "store",
+        "timeline_version",
+    )
+
+    def __init__(self, name: str, store: PostStore | None = None):
         """
         Initializes a user.
 
         Args:
             name:
                 The name of the user.
+            store:
+                The post store to keep the posts in (a private one if None).
         """
         self.name = name
-        self.posts = []
-        self.following = []
+        self.store = store if store is not None else PostStore()
+        self.author_id = self.store.intern(name)
+        self.post_ids = array("q")
+        self.following: dict[str, User] = {}
+        self.followers: dict[str, User] = {}
+        self.timeline_version = self.following_version = next_version()
 
-        log.debug(f"User initialized: {self.name}")
+        log.debug("User initialized: %s", self.name)
 
     def __eq__(self, other: "User") -> bool:
-        """Checks if two users are equal."""
-        return (self.name == other.name) and (self.posts == other.posts)
+        """Checks if two users have the same name and display the same posts."""
+        return (
+            self.name == other.name
+            and len(self.post_ids) == len(other.post_ids)
+            and all(
+                post.displays_like(other_post)
+                for post, other_post in zip(self.posts, other.posts, strict=True)
+            )
+        )
+
+    @property
+    def posts(self) -> PostList:
+        """Returns a view over the posts of the user, chronologically sorted."""
+        return PostList(self.store, self.post_ids)
 
     def get_name(self) -> str:
         """Returns the name of the user."""
         return self.name
 
+    @property
+    def wall_version(self) -> int:
+        """
+        Returns the version of the wall of the user.
+
+        A wall changes when its owner or one of their followees posts, or when
+        its owner follows or unfollows someone, so its version is the newest of
+        their versions. Versions come from a shared clock, so the version of a
+        wall changes whenever the wall does, without reading it.
+        """
+        return max(
+            self.timeline_version,
+            self.following_version,
+            *(user.timeline_version for user in list(self.following.values())),
+        )
+
     def has_posts(self) -> bool:
         """Checks if the user has any posts."""
-        return bool(self.posts)
+        return bool(self.post_ids)
 
     def count_posts(self) -> int:
         """Returns the number of posts the user has."""
-        return len(self.posts)
+        return len(self.post_ids)
 
     def get_posts(self, signed: bool = False) -> list[Post]:
         """
@@ -180,70 +401,476 @@ class User:
 
         return posts
 
-    def add_post(self, post: str):
-        """Adds a post to the user's timeline."""
-        self.posts.append(Post(post))
+    def iter_posts(self, before: datetime | None = None) -> Iterator[Post]:
+        """
+        Lazily yields the posts of the user newest-first.
+
+        Args:
+            before:
+                Only yield posts strictly older than this timestamp.
+        """
+        ids = self.post_ids
+        end = len(ids)
+        if before is not None:
+            end = bisect_left(
+                ids, to_nanoseconds(before), key=self.store.get_nanoseconds
+            )
+
+        posts = self.posts
+        return (posts[i] for i in range(end - 1, -1, -1))
+
+    def iter_post_ids(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: Cursor | None = None,
+    ) -> Iterator[int]:
+        """
+        Lazily yields the row ids of the posts of the user newest-first.
+
+        The bounds are found by binary search, so skipping to a page costs
+        O(log n) and reading it O(page).
+
+        Args:
+            since:
+                Only yield posts at or after this timestamp.
+            until:
+                Only yield posts strictly older than this timestamp.
+            after:
+                Only yield posts that come after this cursor, newest-first.
+        """
+        ids, nanoseconds = self.post_ids, self.store.get_nanoseconds
+        start, end = 0, len(ids)
+        if since is not None:
+            start = bisect_left(ids, to_nanoseconds(since), key=nanoseconds)
+        if until is not None:
+            end = bisect_left(ids, to_nanoseconds(until), key=nanoseconds)
+        if after is not None:
+            end = min(
+                end,
+                bisect_left(
+                    ids,
+                    after,
+                    key=lambda post_id: (nanoseconds(post_id), post_id),
+                ),
+            )
+
+        return (ids[i] for i in range(end - 1, start - 1, -1))
+
+    def _iter_wall_entries(self, before: datetime | None = None) -> Iterator[WallEntry]:
+        """Lazily yields the user's posts as wall entries newest-first."""
+        name = self.name
+        return (WallEntry(name, post) for post in self.iter_posts(before))
+
+    def add_post(self, post: str, timestamp: datetime | None = None):
+        """
+        Adds a post to the user's timeline.
+
+        Args:
+            post:
+                The post to add.
+            timestamp:
+                The timestamp of the post (now if None), e.g. when replaying it.
+        """
+        timestamp = to_nanoseconds(datetime.now() if timestamp is None else timestamp)
+        self.post_ids.append(self.store.append(self.author_id, post, timestamp))
+        self.timeline_version = next_version()
 
-        log.debug(f"Post added to {self.name}'s timeline: {post}")
+        log.debug("Post added to %s's timeline: %s", self.name, post)
 
     def get_timeline(self) -> list[str]:
         """Returns the timeline of the user."""
-        return [str(post) for post in self.get_posts(signed=False)]
+        return render_posts(self.get_posts(signed=False))
 
-    def follows(self, user: "User"):
-        """Adds a user to the user's following list."""
-        self.following.append(user)
+    def follows(self, user: "User") -> bool:
+        """
+        Adds a user to the user's following list.
+
+        Following is idempotent, and following oneself is a no-op because one's
+        own posts are always on one's wall.
+
+        Returns:
+            Whether the user was not already following the given user.
+        """
+        if user is self or user.name in self.following:
+            return False
+
+        self.following[user.name] = user
+        user.followers[self.name] = self
+        self.following_version = next_version()
+
+        log.debug("%s follows %s", self.name, user.name)
+        return True
+
+    def unfollows(self, user: "User") -> bool:
+        """
+        Removes a user from the user's following list.
+
+        Returns:
+            Whether the user was following the given user.
+        """
+        if self.following.pop(user.name, None) is None:
+            return False
 
-        log.debug(f"{self.name} follows {user.name}")
+        del user.followers[self.name]
+        self.following_version = next_version()
+
+        log.debug("%s unfollows %s", self.name, user.name)
+        return True
+
+    def is_following(self, user: "User") -> bool:
+        """Checks if the user is following the given user."""
+        return user.name in self.following
 
     def get_following(self) -> list["User"]:
         """Returns the users that the user is following."""
-        return self.following
+        return list(self.following.values())
+
+    def get_followers(self) -> list["User"]:
+        """Returns the users following the user."""
+        return list(self.followers.values())
+
+    def iter_wall(
+        self,
+        limit: int | None = None,
+        before: datetime | None = None,
+    ) -> Iterator[WallEntry]:
+        """
+        Lazily yields the entries of the user's wall newest-first.
+
+        Args:
+            limit:
+                The maximum number of posts to yield (all of them if None).
+            before:
+                Only yield posts strictly older than this timestamp.
+        """
+        streams = [
+            user._iter_wall_entries(before) for user in [self, *self.following.values()]
+        ]
+
+        return merge_newest_first(streams, limit)
 
     def get_wall(self) -> list[str]:
         """Returns the wall of the user."""
-        wall = self.get_posts(signed=True)
-        wall.extend(
-            [post for user in self.following for post in user.get_posts(signed=True)]
+        wall = list(self.iter_wall())
+        return render_wall(wall[::-1])
+
+
+class MemoryBackend:
+    """
+    The default storage backend, keeping users and posts in memory.
+
+    Users are kept by name, with their posts in a shared columnar post store.
+    Walls are merged lazily from the timelines of their authors. The id of a
+    user is their interned author id in the post store.
+
+    Attributes:
+        users:
+            The users, by name.
+        store:
+            The post store holding the posts of all the users.
+    """
+
+    def __init__(self, store: PostStore | None = None):
+        """
+        Initializes an empty backend.
+
+        Args:
+            store:
+                The post store to keep the posts in (a new in-memory one if
+                None).
+        """
+        self.users: dict[str, User] = {}
+        self.store = PostStore() if store is None else store
+
+    def add_user(self, name: str):
+        """Adds a user."""
+        self.users[name] = User(name, self.store)
+
+    def has_user(self, name: str) -> bool:
+        """Checks if a user exists."""
+        return name in self.users
+
+    def get_user_id(self, name: str) -> int:
+        """Returns the dense integer id of a user."""
+        return self.users[name].author_id
+
+    def count_users(self) -> int:
+        """Returns the number of users."""
+        return len(self.users)
+
+    def count_posts(self) -> int:
+        """Returns the number of posts."""
+        return self.store.count_posts()
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges."""
+        return sum(len(user.following) for user in list(self.users.values()))
+
+    def add_post(self, name: str, content: str, nanoseconds: int) -> int:
+        """Adds a post to the timeline of a user and returns its sequence id."""
+        user = self.users[name]
+        post_id = self.store.append(user.author_id, content, nanoseconds)
+        user.post_ids.append(post_id)
+        user.timeline_version = next_version()
+        return post_id
+
+    def follows(self, name: str, following: str) -> bool:
+        """Adds a follow edge, returning whether it is new."""
+        return self.users[name].follows(self.users[following])
+
+    def unfollows(self, name: str, following: str) -> bool:
+        """Removes a follow edge, returning whether it existed."""
+        return self.users[name].unfollows(self.users[following])
+
+    def is_following(self, name: str, following: str) -> bool:
+        """Checks if a user is following another user."""
+        return following in self.users[name].following
+
+    def get_following(self, name: str) -> list[str]:
+        """Returns the users a user is following, in the order they were followed."""
+        return list(self.users[name].following)
+
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the users following a user, in the order they followed."""
+        return list(self.users[name].followers)
+
+    def export_follow_graph(self) -> "FollowGraph":
+        """Returns a snapshot of the follow graph."""
+        from src.sr_sw_dev.graph import FollowGraph
+
+        following = {
+            user.author_id: [
+                followee.author_id for followee in list(user.following.values())
+            ]
+            for user in list(self.users.values())
+        }
+        # Users are interned before they are added, so the names are read last
+        # to cover every id of the snapshot
+        names = self.store.names[:]
+        return FollowGraph.from_adjacency(
+            names, (following.get(user_id, ()) for user_id in range(len(names)))
         )
-        wall.sort()
-        return [str(post) for post in wall]
+
+    def get_timeline_version(self, name: str) -> int:
+        """Returns the version of the timeline of a user."""
+        return self.users[name].timeline_version
+
+    def get_wall_version(self, name: str) -> int:
+        """Returns the version of the wall of a user."""
+        return self.users[name].wall_version
+
+    def read_timeline(self, name: str) -> list[Post]:
+        """Returns the posts of a user newest-first."""
+        return self.users[name].get_posts(signed=False)
+
+    def read_wall(
+        self, name: str, limit: int | None, before: datetime | None
+    ) -> Iterable[WallEntry]:
+        """Lazily yields the entries of the wall of a user newest-first."""
+        return self.users[name].iter_wall(limit, before)
+
+    def close(self):
+        """Releases the resources of the backend."""
 
 
 class SocialNetwork:
     """
     A social network.
 
+    The users, posts and follows are kept by a storage backend, in memory by
+    default. The fan-out walls, the durable log, the full-text index, pages
+    and searches are built on the in-memory backend, so they are not
+    available with others (e.g. a SQLite database, which is durable itself).
+
     Attributes:
+        backend:
+            The storage backend keeping the users, posts and follows.
         users:
-            The users of the social network.
+            The users of the social network, with the in-memory backend.
+        store:
+            The post store holding the posts of all the users, with the
+            in-memory backend.
+        fanout:
+            The materialized walls updated on write, if fan-out-on-write is
+            enabled. Otherwise, walls are merged from the timelines on read.
+        persistence:
+            The durable storage the changes are logged to, if any.
+        cache:
+            The cache of rendered timelines and walls, if any.
+        index:
+            The full-text index of the posts, if any. Otherwise, searches scan
+            every post.
+        metrics:
+            The metrics the operations are measured in, if any.
+        retention:
+            The retention policy bounding the timelines, if any. Otherwise,
+            posts are kept forever.
+        readers:
+            The tracker of the reads in flight, if the social network has a
+            retention policy (see `compact`).
     """
 
-    def __init__(self):
-        """Initializes a social network."""
-        self.users = {}
+    # The operations measured when the social network has metrics
+    OPERATIONS = (
+        "add_user",
+        "add_post",
+        "follows",
+        "unfollows",
+        "get_user_timeline",
+        "get_user_wall",
+        "search",
+        "suggest_follows",
+    )
+
+    # The operations reading posts, which compactions wait for
+    READS = (
+        "get_user_timeline",
+        "get_user_wall",
+        "get_timeline_page",
+        "get_wall_page",
+        "search",
+    )
+
+    def __init__(
+        self,
+        fanout: FanoutWalls | None = None,
+        persistence: "Persistence | None" = None,
+        store: PostStore | None = None,
+        cache: "RenderCache | None" = None,
+        index: "InvertedIndex | None" = None,
+        metrics: "Metrics | None" = None,
+        backend: "StorageBackend | None" = None,
+        retention: "Retention | None" = None,
+    ):
+        """
+        Initializes a social network.
+
+        Args:
+            fanout:
+                The materialized walls to update on write (pull-only if None).
+            persistence:
+                The durable storage to recover the social network from and to
+                log its changes to (in-memory only if None).
+            store:
+                The post store to keep the posts in (a new in-memory one if
+                None), e.g. a tiered one sealing cold posts into segments.
+            cache:
+                The cache of rendered timelines and walls (uncached if None).
+            index:
+                The full-text index to update on write (searches scan every
+                post if None).
+            metrics:
+                The metrics to measure the operations in (unmeasured if None).
+                The writes replayed on recovery are not measured.
+            backend:
+                The storage backend to keep the users, posts and follows in (a
+                new in-memory one using the post store if None).
+            retention:
+                The retention policy bounding the timelines (posts are kept
+                forever if None), enforced by `compact`.
+
+        Raises:
+            ValueError:
+                If the backend is not in memory, but the social network has a
+                post store, fan-out walls, a durable log, an index or a
+                retention policy, or if it has a retention policy along with
+                fan-out walls or a durable log.
+        """
+        if backend is None:
+            backend = MemoryBackend(store)
+        elif not isinstance(backend, MemoryBackend) and any(
+            option is not None
+            for option in (fanout, persistence, store, index, retention)
+        ):
+            raise ValueError(
+                "Post stores, fan-out walls, durable logs, indexes and retention "
+                "policies require the in-memory backend"
+            )
+        if retention is not None and (fanout is not None or persistence is not None):
+            raise ValueError(
+                "Retention policies do not support fan-out walls nor durable logs"
+            )
+
+        self.backend = backend
+        if isinstance(backend, MemoryBackend):
+            self.users = backend.users
+            self.store = backend.store
+        self.fanout = fanout
+        self.cache = cache
+        self.index = index
+        self.retention = retention
+
+        # The posts trimmed from the timelines since the latest compaction, and
+        # the ones to remove from the index and to drop from the store, along
+        # with the epoch they were trimmed or removed in (see `compact`)
+        self.readers = None
+        self._trimmed = array("q")
+        self._trimmed_lock = threading.Lock()
+        self._to_remove: deque[tuple[int, array]] = deque()
+        self._to_drop: deque[tuple[int, array]] = deque()
+        if retention is not None:
+            from src.sr_sw_dev.retention import Readers
+
+            self.readers = Readers()
+            self.readers.instrument(self, *self.READS)
+
+        # The snapshot of the follow graph is cached along with the version of
+        # the graph it was taken at. Versions are drawn from a counter, whose
+        # values are unique even across threads, after each change is applied
+        self._graph_clock = count(1)
+        self._graph_version = 0
+        self._graph: tuple[int, FollowGraph] | None = None
+
+        # Changes are only logged once the recovered ones have been replayed
+        self.persistence = None
+        if persistence is not None:
+            persistence.recover(self)
+        self.persistence = persistence
+
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.instrument(self, *self.OPERATIONS)
+            metrics.register_gauge("users", self.count_users)
+            metrics.register_gauge("posts", self.backend.count_posts)
+            metrics.register_gauge("follows", self.count_follows)
 
         log.debug("Social network initialized")
 
     def has_users(self) -> bool:
         """Checks if the social network has any users."""
-        return bool(self.users)
+        return self.backend.count_users() > 0
 
     def add_user(self, name: str):
         """Adds a user to the social network."""
-        self.users[name] = User(name)
+        if self.persistence is not None:
+            self.persistence.log_add_user(name)
 
-        log.debug(f"User added to social network: {name}")
+        # The user is only published once logged, so that the records of the
+        # writes involving them always come after theirs
+        self.backend.add_user(name)
+        self._graph_version = next(self._graph_clock)
+        if self.fanout is not None:
+            self.fanout.add_user(self.users[name])
+        if self.cache is not None:
+            self.cache.invalidate(name)
+
+        log.debug("User added to social network: %s", name)
+        self._snapshot_if_due()
 
     def has_user(self, name: str) -> bool:
         """Checks if the social network has a user with the given name."""
-        return name in self.users
+        return self.backend.has_user(name)
 
     def count_users(self) -> int:
         """Returns the number of users in the social network."""
-        return len(self.users)
+        return self.backend.count_users()
 
-    def add_post(self, name: str, post: str):
+    def count_follows(self) -> int:
+        """Returns the number of follow edges in the social network."""
+        return self.backend.count_follows()
+
+    def add_post(self, name: str, post: str, timestamp: datetime | None = None):
         """
         Adds a post to the user's timeline.
 
@@ -252,6 +879,47 @@ class SocialNetwork:
                 The name of the user.
             post:
                 The post to add.
+            timestamp:
+                The timestamp of the post (now if None), e.g. when replaying it.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        if not self.backend.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            nanoseconds = to_nanoseconds(
+                datetime.now() if timestamp is None else timestamp
+            )
+            post_id = self.backend.add_post(name, post, nanoseconds)
+            if self.retention is not None and self.retention.ring:
+                # Timelines are let past the cap by as many posts, then trimmed
+                # in one slice, so that each post costs O(1) amortized
+                user = self.users[name]
+                if len(user.post_ids) >= 2 * self.retention.max_posts:
+                    self._trim(user, None)
+            if self.fanout is not None:
+                user = self.users[name]
+                self.fanout.push(user, user.posts[-1])
+            if self.index is not None:
+                self.index.add(post_id, post)
+            if self.persistence is not None:
+                self.persistence.log_add_post(name, post, nanoseconds)
+            if self.cache is not None:
+                self.cache.invalidate(name)
+                for follower in self.backend.get_followers(name):
+                    self.cache.invalidate(follower, "wall")
+
+        log.debug("Post added to %s's timeline in social network: %s", name, post)
+        self._snapshot_if_due()
+
+    def get_timeline_version(self, name: str) -> int:
+        """
+        Returns the version of the timeline of the user.
+
+        The version is newer whenever the user has posted since, so clients can
+        pass it to `get_user_timeline` to only read the timeline once changed.
 
         Raises:
             ValueError:
@@ -260,16 +928,50 @@ class SocialNetwork:
         if not self.has_user(name):
             raise ValueError(f"User {name} does not exist")
         else:
-            self.users[name].add_post(post)
+            return self.backend.get_timeline_version(name)
 
-        log.debug(f"Post added to {name}'s timeline in social network: {post}")
+    def get_user_timeline(
+        self, name: str, if_changed_since: int | None = None
+    ) -> list[str] | None:
+        """
+        Returns the timeline of the user.
 
-    def get_user_timeline(self, name: str) -> list[str]:
-        """Returns the timeline of the user."""
+        Args:
+            name:
+                The name of the user.
+            if_changed_since:
+                A version of the timeline (see `get_timeline_version`). If the
+                timeline has not changed since, None is returned without
+                reading nor rendering it, even though its elapsed-time labels
+                may have.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
         if not self.has_user(name):
             raise ValueError(f"User {name} does not exist")
+        elif (
+            if_changed_since is not None
+            and self.backend.get_timeline_version(name) <= if_changed_since
+        ):
+            return None
+        elif self.cache is None:
+            return render_posts(self.backend.read_timeline(name))
         else:
-            return [str(post) for post in self.users[name].get_posts(signed=False)]
+            view = self.cache.get("timeline", name)
+            if view is None:
+                generation = self.cache.generation(name)
+                posts = self.backend.read_timeline(name)
+                view = self.cache.put(
+                    "timeline",
+                    name,
+                    prefixes=[post.content for post in posts],
+                    timestamps=[post.timestamp for post in posts],
+                    generation=generation,
+                )
+
+            return self.cache.render(view)
 
     def follows(self, name: str, following: str):
         """Adds a user to the user's following list."""
@@ -278,54 +980,588 @@ class SocialNetwork:
         elif not self.has_user(following):
             raise ValueError(f"User {following} does not exist")
         else:
-            self.users[name].follows(self.users[following])
-
-            log.debug(f"{name} follows {following} in social network")
+            if self.backend.follows(name, following):
+                self._graph_version = next(self._graph_clock)
+                if self.fanout is not None:
+                    self.fanout.follow(self.users[name], self.users[following])
+                if self.persistence is not None:
+                    self.persistence.log_follows(name, following)
+                if self.cache is not None:
+                    self.cache.invalidate(name, "wall")
+
+            log.debug("%s follows %s in social network", name, following)
+            self._snapshot_if_due()
+
+    def unfollows(self, name: str, following: str):
+        """Removes a user from the user's following list."""
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        elif not self.has_user(following):
+            raise ValueError(f"User {following} does not exist")
+        else:
+            if self.backend.unfollows(name, following):
+                self._graph_version = next(self._graph_clock)
+                if self.fanout is not None:
+                    self.fanout.unfollow(self.users[name], self.users[following])
+                if self.persistence is not None:
+                    self.persistence.log_unfollows(name, following)
+                if self.cache is not None:
+                    self.cache.invalidate(name, "wall")
+
+            log.debug("%s unfollows %s in social network", name, following)
+            self._snapshot_if_due()
+
+    def is_following(self, name: str, following: str) -> bool:
+        """Checks if a user is following another user."""
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            return self.backend.is_following(name, following)
 
     def get_following(self, name: str) -> list[str]:
         """Returns the users that the user is following."""
         if not self.has_user(name):
             raise ValueError(f"User {name} does not exist")
         else:
-            return [user.get_name() for user in self.users[name].get_following()]
+            return self.backend.get_following(name)
 
-    def get_user_wall(self, name: str) -> list[str]:
-        """Returns the wall of the user."""
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the users following the user."""
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            return self.backend.get_followers(name)
+
+    def get_user_id(self, name: str) -> int:
+        """
+        Returns the integer id of a user.
+
+        Users are assigned dense ids in the order they are added, from 0 to the
+        number of users, which index the follow graph.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            return self.backend.get_user_id(name)
+
+    def get_follow_graph(self, max_changes: int = 0) -> "FollowGraph":
+        """
+        Returns a snapshot of the follow graph, in compressed sparse row form.
+
+        The snapshot is exported from the backend on the first call after more
+        than `max_changes` changes of the users or follow edges, and shared by
+        the calls until then.
+
+        Args:
+            max_changes:
+                The number of changes the snapshot may lag behind (none by
+                default).
+        """
+        version = self._graph_version
+        graph = self._graph
+        if graph is None or version - graph[0] > max_changes:
+            graph = self._graph = (version, self.backend.export_follow_graph())
+
+        return graph[1]
+
+    def suggest_follows(self, name: str, k: int = 10) -> list[str]:
+        """
+        Suggests users to follow, among the ones followed by one's followees.
+
+        Candidates are ranked by the number of the user's followees following
+        them, ties broken by the oldest user first.
+
+        The followees of the user are always the current ones, but theirs are
+        read from a snapshot of the follow graph that is only exported again
+        once the changes since the previous export exceed a fraction of its
+        edges (see `SUGGESTION_STALENESS`). Thus the export is amortized over
+        the changes instead of being paid by the first suggestion after each
+        of them.
+
+        Args:
+            name:
+                The name of the user.
+            k:
+                The maximum number of suggestions.
+
+        Raises:
+            ValueError:
+                If the user does not exist or k is not positive.
+        """
+        if k < 1:
+            raise ValueError("The number of suggestions must be positive")
+
+        user_id = self.get_user_id(name)
+        cached = self._graph
+        max_changes = (
+            0
+            if cached is None
+            else int(cached[1].count_follows() * SUGGESTION_STALENESS)
+        )
+        graph = self.get_follow_graph(max_changes)
+        following = map(self.backend.get_user_id, self.get_following(name))
+        return [
+            graph.names[candidate]
+            for candidate, _ in graph.suggest_follows(user_id, k, following)
+        ]
+
+    def get_wall_version(self, name: str) -> int:
+        """
+        Returns the version of the wall of the user.
+
+        The version is newer whenever the user or one of their followees has
+        posted since, or the user has followed or unfollowed someone, so
+        clients can pass it to `get_user_wall` to only read the wall once
+        changed. It costs O(k) for k followees, without reading any post.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            return self.backend.get_wall_version(name)
+
+    def get_user_wall(
+        self,
+        name: str,
+        limit: int | None = None,
+        before: datetime | None = None,
+        if_changed_since: int | None = None,
+    ) -> list[str] | None:
+        """
+        Returns the wall of the user newest-first.
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts to return (all of them if None).
+            before:
+                Only return posts strictly older than this timestamp.
+            if_changed_since:
+                A version of the wall (see `get_wall_version`). If the wall has
+                not changed since, None is returned without reading nor
+                rendering it, even though its elapsed-time labels may have.
+
+        Raises:
+            ValueError:
+                If the user does not exist.
+        """
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        elif (
+            if_changed_since is not None
+            and self.backend.get_wall_version(name) <= if_changed_since
+        ):
+            return None
+        elif self.cache is None or before is not None:
+            return render_wall(self._read_wall(name, limit, before))
+        else:
+            view = self.cache.get("wall", name, limit)
+            if view is None:
+                generation = self.cache.generation(name)
+                wall = self._read_wall(name, limit, before)
+                view = self.cache.put(
+                    "wall",
+                    name,
+                    limit,
+                    prefixes=[f"{author} - {post.content}" for author, post in wall],
+                    timestamps=[post.timestamp for _, post in wall],
+                    generation=generation,
+                )
+
+            return self.cache.render(view)
+
+    def get_timeline_page(
+        self,
+        name: str,
+        limit: int = 20,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Page:
+        """
+        Returns a page of the timeline of the user newest-first.
+
+        Only the posts of the page are read and rendered, so a page costs a
+        binary search into the timeline plus O(limit).
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts in the page.
+            cursor:
+                The cursor of the previous page (the newest posts if None).
+            since:
+                Only return posts at or after this timestamp.
+            until:
+                Only return posts strictly older than this timestamp.
+
+        Raises:
+            ValueError:
+                If the user does not exist, the limit or cursor is invalid, or
+                the backend is not in memory.
+        """
+        self._require_in_memory("Pages")
         if not self.has_user(name):
             raise ValueError(f"User {name} does not exist")
         else:
-            wall = self.users[name].get_posts(signed=True)
-            wall.extend(
-                [
-                    post
-                    for user in self.users[name].get_following()
-                    for post in user.get_posts(signed=True)
-                ]
+            after = self._decode_cursor(cursor)
+            ids = self.users[name].iter_post_ids(since, until, after)
+            post_ids, next_cursor = self._paginate(ids, limit)
+
+            store = self.store
+            return Page(
+                render_posts(
+                    [
+                        Post.load(store.get_content(i), store.get_nanoseconds(i), i)
+                        for i in post_ids
+                    ]
+                ),
+                next_cursor,
             )
-            wall.sort(reverse=True)
 
-            return [str(post) for post in wall]
+    def get_wall_page(
+        self,
+        name: str,
+        limit: int = 20,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Page:
+        """
+        Returns a page of the wall of the user newest-first.
+
+        The timelines on the wall are each resumed after the cursor with a
+        binary search, then lazily merged by (timestamp, sequence id) until
+        the page is full, so a page costs O(k log n + limit log k) for k
+        timelines of n posts.
+
+        Args:
+            name:
+                The name of the user.
+            limit:
+                The maximum number of posts in the page.
+            cursor:
+                The cursor of the previous page (the newest posts if None).
+            since:
+                Only return posts at or after this timestamp.
+            until:
+                Only return posts strictly older than this timestamp.
+
+        Raises:
+            ValueError:
+                If the user does not exist, the limit or cursor is invalid, or
+                the backend is not in memory.
+        """
+        self._require_in_memory("Pages")
+        if not self.has_user(name):
+            raise ValueError(f"User {name} does not exist")
+        else:
+            after = self._decode_cursor(cursor)
+            user, store = self.users[name], self.store
+            streams = [
+                author.iter_post_ids(since, until, after)
+                for author in [user, *user.following.values()]
+            ]
+            merged = heapq.merge(
+                *streams,
+                key=lambda post_id: (store.get_nanoseconds(post_id), post_id),
+                reverse=True,
+            )
+            post_ids, next_cursor = self._paginate(merged, limit)
+
+            return Page(
+                render_wall(
+                    [
+                        WallEntry(
+                            store.get_author(i),
+                            Post.load(
+                                store.get_content(i), store.get_nanoseconds(i), i
+                            ),
+                        )
+                        for i in post_ids
+                    ]
+                ),
+                next_cursor,
+            )
+
+    def search(
+        self, query: str, limit: int = 20, author: str | None = None
+    ) -> list[str]:
+        """
+        Returns the posts matching a query newest-first, rendered like a wall.
+
+        Posts are ordered by sequence id, i.e. the most recently posted first.
+
+        Args:
+            query:
+                The words all matching posts must contain, where words ending
+                with "*" are prefixes (e.g. "weath* today").
+            limit:
+                The maximum number of posts to return.
+            author:
+                Only return the posts of this user (everyone's if None).
+
+        Raises:
+            ValueError:
+                If the author does not exist, the query or limit is invalid, or
+                the backend is not in memory.
+        """
+        self._require_in_memory("Searches")
+        if author is not None and not self.has_user(author):
+            raise ValueError(f"User {author} does not exist")
+        if limit < 1:
+            raise ValueError("The search limit must be positive")
+
+        store = self.store
+        index = self.index
+        if index is None:
+            from src.sr_sw_dev.search import scan
+
+            ids = scan(store, query)
+        else:
+            ids = index.search(query)
+        if self.retention is not None:
+            ids = (i for i in ids if self._is_retained(i))
+        if author is not None:
+            ids = (i for i in ids if store.get_author(i) == author)
+
+        return render_wall(
+            [
+                WallEntry(
+                    store.get_author(i),
+                    Post.load(store.get_content(i), store.get_nanoseconds(i), i),
+                )
+                for i in islice(ids, limit)
+            ]
+        )
+
+    def commit(self):
+        """
+        Writes the changes logged so far, making them durable.
+
+        This is a no-op if the social network is not persistent. Changes are
+        only logged in memory until committed (or until a whole group of them
+        is), so they must be committed before being acknowledged.
+        """
+        if self.persistence is not None:
+            self.persistence.commit()
+
+    def compact(self, now: datetime | None = None) -> "Compaction":
+        """
+        Enforces the retention policy, trimming the timelines in bulk.
+
+        Each timeline is trimmed by swapping in a copy without the posts that
+        fell out of the policy, so readers are never blocked. The posts trimmed
+        are then removed from the index by a later compaction, once every read
+        in flight started after they were trimmed, and dropped from the store by
+        a later one still, once every read in flight started after they were
+        removed. Thus a read never loses the posts it is reading, and the posts
+        of idle users do not hold back the reclamation of the others'.
+
+        Only one compaction may run at a time.
+
+        Args:
+            now:
+                The timestamp the maximum age is relative to (the current one if
+                None).
+
+        Raises:
+            ValueError:
+                If the social network has no retention policy.
+        """
+        if self.retention is None:
+            raise ValueError("Social network has no retention policy")
+
+        from src.sr_sw_dev.retention import Compaction
+
+        store, readers = self.store, self.readers
+        oldest = readers.oldest()
+
+        reclaimed = reclaimed_bytes = 0
+        while self._to_drop and self._to_drop[0][0] < oldest:
+            n_posts, n_bytes = store.drop(self._to_drop.popleft()[1])
+            reclaimed += n_posts
+            reclaimed_bytes += n_bytes
+
+        while self._to_remove and self._to_remove[0][0] < oldest:
+            post_ids = self._to_remove.popleft()[1]
+            if self.index is not None:
+                self.index.remove((i, store.get_content(i)) for i in post_ids)
+            self._to_drop.append((readers.epoch, post_ids))
+
+        cutoff = self.retention.cutoff(now)
+        cutoff = None if cutoff is None else to_nanoseconds(cutoff)
+
+        trimmed = 0
+        for user in list(self.users.values()):
+            n_trimmed = self._compact_timeline(user, cutoff)
+            if n_trimmed and self.cache is not None:
+                self.cache.invalidate(user.name)
+                for follower in list(user.followers):
+                    self.cache.invalidate(follower, "wall")
+            trimmed += n_trimmed
+
+        # Including the posts trimmed by ring buffers since the latest compaction
+        with self._trimmed_lock:
+            post_ids, self._trimmed = self._trimmed, array("q")
+        if post_ids:
+            self._to_remove.append((readers.epoch, array("q", sorted(post_ids))))
+        readers.advance()
+
+        log.debug("Social network compacted: %d posts trimmed", trimmed)
+        return Compaction(trimmed, reclaimed, reclaimed_bytes)
+
+    def _compact_timeline(self, user: User, cutoff: int | None) -> int:
+        """Trims a timeline during a compaction, returning the number of posts."""
+        return self._trim(user, cutoff)
+
+    def _trim(self, user: User, cutoff: int | None) -> int:
+        """
+        Trims the posts of a timeline that fell out of the retention policy.
+
+        Args:
+            user:
+                The user whose timeline to trim.
+            cutoff:
+                The timestamp older posts fell out of the policy at, in
+                nanoseconds since the epoch (no maximum age if None).
+
+        Returns:
+            The number of posts trimmed.
+        """
+        post_ids = user.post_ids
+        max_posts = self.retention.max_posts
+        start = 0 if max_posts is None else max(0, len(post_ids) - max_posts)
+        if cutoff is not None:
+            start = max(
+                start, bisect_left(post_ids, cutoff, key=self.store.get_nanoseconds)
+            )
+
+        if start:
+            user.post_ids = post_ids[start:]
+            user.timeline_version = next_version()
+            with self._trimmed_lock:
+                self._trimmed.extend(post_ids[:start])
+
+        return start
+
+    def _is_retained(self, post_id: int) -> bool:
+        """Checks if a post is still on the timeline of its author."""
+        store = self.store
+        post_ids = self.users[store.get_author(post_id)].post_ids
+        if not post_ids:
+            return False
+
+        first = post_ids[0]
+        return (store.get_nanoseconds(post_id), post_id) >= (
+            store.get_nanoseconds(first),
+            first,
+        )
+
+    def _require_in_memory(self, feature: str):
+        """Raises a ValueError if the backend is not the in-memory one."""
+        if not isinstance(self.backend, MemoryBackend):
+            raise ValueError(f"{feature} require the in-memory backend")
+
+    def _decode_cursor(self, cursor: str | None) -> Cursor | None:
+        """Decodes a cursor, checking that it points to a post of the store."""
+        if cursor is None:
+            return None
+
+        after = Cursor.decode(cursor)
+        if not 0 <= after.post_id < self.store.count_posts():
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+        return after
+
+    def _paginate(self, ids: Iterator[int], limit: int) -> tuple[list[int], str | None]:
+        """Reads a page of row ids, along with the cursor of the next page if any."""
+        if limit < 1:
+            raise ValueError("The page limit must be positive")
+
+        post_ids = list(islice(ids, limit + 1))
+        if len(post_ids) <= limit:
+            return post_ids, None
+
+        del post_ids[limit:]
+        last = post_ids[-1]
+        return post_ids, Cursor(self.store.get_nanoseconds(last), last).encode()
+
+    def _snapshot_if_due(self):
+        """Writes a snapshot if enough records were logged since the latest one."""
+        if self.persistence is not None and self.persistence.snapshot_due():
+            self.persistence.snapshot()
+
+    def _read_wall(
+        self, name: str, limit: int | None, before: datetime | None
+    ) -> list[WallEntry]:
+        """Reads the entries of a wall newest-first, from its buffer if any."""
+        wall = None
+        if self.fanout is not None:
+            wall = self.fanout.read(self.users[name], limit, before)
+        if wall is None:
+            wall = self.backend.read_wall(name, limit, before)
+
+        return list(wall)
 
 
 class Application:
     """
     A social networking application.
 
+    Commands are made of a username, a verb and a predicate (e.g. "Alice follows
+    Bob"). They are tokenized in a single pass by a regular expression compiled
+    from the registered verbs, and dispatched to the handler of their action.
+    Commands without a verb read the timeline of a user (e.g. "Alice").
+
     Attributes:
         social_network:
             The social network of the application.
         commands:
-            The commands of the application.
+            The action of each registered verb.
+        handlers:
+            The handler of each action, called with the username and predicate.
     """
 
-    def __init__(self):
-        """Initializes a social networking application."""
-        self.social_network = SocialNetwork()
-        self.commands = {
-            "->": "posting",
-            "follows": "following",
-            "wall": "wall",
-        }.copy()
+    def __init__(
+        self,
+        social_network: SocialNetwork | None = None,
+        metrics: "Metrics | None" = None,
+    ):
+        """
+        Initializes a social networking application.
+
+        Args:
+            social_network:
+                The social network to run commands against (a new in-memory one
+                if None).
+            metrics:
+                The metrics to measure the parsed commands in (unmeasured if
+                None), usually the ones of the social network.
+        """
+        self.social_network = (
+            SocialNetwork() if social_network is None else social_network
+        )
+        self.commands = {}
+        self.handlers = {}
+        if metrics is not None:
+            metrics.instrument(self, "parse_command")
+
+        self.register_command("->", "posting", self._execute_posting)
+        self.register_command("follows", "following", self._execute_following)
+        self.register_command("unfollows", "unfollowing", self._execute_unfollowing)
+        self.register_command("wall", "wall", self._execute_wall)
+        self.register_command("timeline", "timeline", self._execute_timeline)
+        self.register_command("search", "search", self._execute_search)
 
     def has_social_network(self) -> bool:
         """Checks if the application has a social network."""
@@ -339,90 +1575,441 @@ class Application:
         """Checks if the application has commands to execute."""
         return bool(self.commands)
 
-    def parse_command(self, command: str) -> list[str] | None:
+    def register_command(
+        self,
+        verb: str,
+        action: str,
+        handler: Callable[[str, str], list[str] | None],
+    ):
+        """
+        Registers a new command (or replaces an existing one).
+
+        Args:
+            verb:
+                The verb separating the username from the predicate.
+            action:
+                The name of the action executed by the command.
+            handler:
+                The function executing the command. It is called with the
+                username and the predicate, both stripped from whitespace.
+        """
+        self.commands[verb] = action
+        self.handlers[action] = handler
+
+        # Word verbs must be whole words (e.g. "wall" must not match "Swallow"),
+        # and longer verbs take precedence over their prefixes
+        alternatives = []
+        for cmd in sorted(self.commands, key=len, reverse=True):
+            alternative = re.escape(cmd)
+            if cmd[0].isalnum():
+                alternative = rf"\b{alternative}"
+            if cmd[-1].isalnum():
+                alternative = rf"{alternative}\b"
+            alternatives.append(alternative)
+
+        self._symbols = [cmd for cmd in self.commands if not cmd.isalnum()]
+        self._tokenizer = re.compile(
+            rf"(?P<username>.*?)\s*(?P<verb>{'|'.join(alternatives)})(?P<predicate>.*)",
+            re.DOTALL,
+        )
+
+        log.debug("Command registered: %s (%s)", verb, action)
+
+    def tokenize(self, command: str) -> tuple[str, str, str] | None:
+        """
+        Splits a command into its action, username and predicate.
+
+        Most commands have the verb as their first or second word, so they are
+        split once and dispatched with a dictionary lookup. Any other command
+        (e.g. "Alice->Hi" or "Alice Smith -> Hi") falls back to a regular
+        expression that finds the leftmost verb in a single scan. Either way, a
+        message that merely contains a verb (e.g. "Alice -> check my wall") is
+        not misrouted.
+
+        Args:
+            command:
+                The command to tokenize.
+
+        Returns:
+            The action, username and predicate of the command, or None if the
+            command does not contain any verb.
+        """
+        command = command.strip()
+        commands = self.commands
+        parts = command.split(None, 2)
+        n_parts = len(parts)
+        if n_parts > 1 and parts[1] in commands:
+            return commands[parts[1]], parts[0], parts[2] if n_parts > 2 else ""
+        elif n_parts and parts[0] in commands:
+            return commands[parts[0]], "", command[len(parts[0]) :].lstrip()
+        elif n_parts == 1:
+            # A single word can only be a command if a verb is glued to it
+            for verb in self._symbols:
+                if verb in command:
+                    break
+            else:
+                return None
+
+        match = self._tokenizer.match(command)
+        if match is None:
+            return None
+
+        username, verb, predicate = match.group("username", "verb", "predicate")
+        return commands[verb], username.strip(), predicate.strip()
+
+    def execute_many(
+        self,
+        commands: Iterable[str],
+        on_error: Callable[[str, ValueError], None] | None = None,
+    ) -> Iterator[list[str]]:
+        """
+        Lazily executes a stream of commands.
+
+        The changes of the commands are committed together before each output
+        is yielded, and at the end of the stream, so that outputs are only
+        produced once the changes of the commands before them are durable.
+
+        Args:
+            commands:
+                The commands to execute. Blank commands are skipped.
+            on_error:
+                The function called with each invalid command and its error. If
+                None, the first invalid command stops the execution.
+
+        Yields:
+            The output of each command that has one.
+
+        Raises:
+            ValueError:
+                If a command is invalid and no `on_error` function is given.
+        """
+        parse_command = self.parse_command
+        social_network = self.get_social_network()
+        try:
+            for command in commands:
+                if command.isspace() or not command:
+                    continue
+
+                try:
+                    result = parse_command(command, commit=False)
+                except ValueError as e:
+                    if on_error is None:
+                        raise
+                    on_error(command, e)
+                else:
+                    if result:
+                        social_network.commit()
+                        yield result
+        finally:
+            social_network.commit()
+
+    def parse_command(self, command: str, commit: bool = True) -> list[str] | None:
         """Parses and executes a command.
 
         Args:
             command:
                 The command to parse and execute.
+            commit:
+                Whether to commit the changes of the command before returning,
+                so that it is durable once acknowledged. Batches of commands
+                commit once for all of them instead (see `execute_many`).
 
         Raises:
             ValueError:
                 If the command is invalid.
         """
+        try:
+            return self._parse_command(command)
+        finally:
+            if commit:
+                self.get_social_network().commit()
+
+    def _parse_command(self, command: str) -> list[str] | None:
+        """Parses and executes a command, without committing its changes."""
         # Strip whitespace from command
         command = command.strip()
 
-        # Check if the command is valid
-        username, action, predicate = None, None, None
-        for cmd in self.commands:
-            if cmd in command:
-                username, predicate = command.split(cmd)
-
-                # Strip whitespace from username and predicate
-                username = username.strip()
-                predicate = predicate.strip()
-                action = self.commands[cmd]
-                break
-
         # Execute the command
-        if action == "posting":
-            log.debug(f"Posting command: {username} {predicate}")
-            if username and predicate:
-                if not self.social_network.has_user(username):
-                    self.social_network.add_user(username)
-
-                self.social_network.add_post(username, predicate)
-            else:
-                if not username:
-                    raise ValueError("Invalid posting command: username is empty")
-                else:
-                    raise ValueError("Invalid posting command: message is empty")
-        elif action == "following":
-            log.debug(f"Following command: {username} {predicate}")
-            if username and predicate:
-                self.social_network.follows(username, predicate)
-            else:
-                if not username:
-                    raise ValueError("Invalid following command: username is empty")
-                else:
-                    raise ValueError(
-                        "Invalid following command: user to follow is empty"
-                    )
-        elif action == "wall":
-            log.debug(f"Wall command: {username}")
-            if username:
-                return self.social_network.get_user_wall(username)
-            else:
-                raise ValueError("Invalid wall command: username is empty")
+        tokens = self.tokenize(command)
+        if tokens is not None:
+            action, username, predicate = tokens
+            return self.handlers[action](username, predicate)
         elif self.get_social_network().has_user(command):
             # It is a reading command
-            log.debug(f"Reading command: {command}")
+            log.debug("Reading command: %s", command)
             return self.get_social_network().get_user_timeline(command)
         elif len(command.split(" ")) == 1:
             # Assume the user is trying to read the timeline of a nonexistent user
-            log.error(f"Invalid user: {command}")
+            log.error("Invalid user: %s", command)
             raise ValueError(f"Invalid user: {command}")
         else:
             # Assume the command is invalid
-            log.error(f"Invalid command: {command}")
+            log.error("Invalid command: %s", command)
             raise ValueError(f"Invalid command: {command}")
 
+    def _execute_posting(self, username: str, predicate: str):
+        """Executes a posting command (e.g. "Alice -> Hello!")."""
+        log.debug("Posting command: %s %s", username, predicate)
+        if username and predicate:
+            if not self.social_network.has_user(username):
+                self.social_network.add_user(username)
 
-if __name__ == "__main__":
-    app = Application()
+            self.social_network.add_post(username, predicate)
+        else:
+            if not username:
+                raise ValueError("Invalid posting command: username is empty")
+            else:
+                raise ValueError("Invalid posting command: message is empty")
 
-    while True:
-        try:
-            command = input("> ")
-            if command.lower() == "exit":
-                break
+    def _execute_following(self, username: str, predicate: str):
+        """Executes a following command (e.g. "Alice follows Bob")."""
+        log.debug("Following command: %s %s", username, predicate)
+        if username and predicate:
+            self.social_network.follows(username, predicate)
+        else:
+            if not username:
+                raise ValueError("Invalid following command: username is empty")
             else:
-                result = app.parse_command(command)
-                if result:
-                    print("\n".join(result))
-        except (KeyboardInterrupt, EOFError):
-            print("Exit")
-            break
-        except ValueError as e:
-            print(e)
+                raise ValueError("Invalid following command: user to follow is empty")
+
+    def _execute_unfollowing(self, username: str, predicate: str):
+        """Executes an unfollowing command (e.g. "Alice unfollows Bob")."""
+        log.debug("Unfollowing command: %s %s", username, predicate)
+        if username and predicate:
+            self.social_network.unfollows(username, predicate)
+        else:
+            if not username:
+                raise ValueError("Invalid unfollowing command: username is empty")
+            else:
+                raise ValueError(
+                    "Invalid unfollowing command: user to unfollow is empty"
+                )
+
+    def _execute_wall(self, username: str, predicate: str) -> list[str]:
+        """
+        Executes a wall command (e.g. "Alice wall").
+
+        With page options (e.g. "Alice wall limit=20 since=2024-01-01"), only
+        a page of the wall is returned. See `parse_page_options`.
+        """
+        log.debug("Wall command: %s %s", username, predicate)
+        if not username:
+            raise ValueError("Invalid wall command: username is empty")
+        elif not predicate:
+            return self.social_network.get_user_wall(username)
+        else:
+            page = self.social_network.get_wall_page(
+                username, **self.parse_page_options(predicate)
+            )
+            return self._format_page(page)
+
+    def _execute_timeline(self, username: str, predicate: str) -> list[str]:
+        """Executes a timeline page command (e.g. "Alice timeline limit=20")."""
+        log.debug("Timeline command: %s %s", username, predicate)
+        if username:
+            page = self.social_network.get_timeline_page(
+                username, **self.parse_page_options(predicate)
+            )
+            return self._format_page(page)
+        else:
+            raise ValueError("Invalid timeline command: username is empty")
+
+    def _execute_search(self, username: str, predicate: str) -> list[str]:
+        """
+        Executes a search command (e.g. "search weath*" or "Alice search hello").
+
+        Without a username, the posts of everyone are searched.
+        """
+        log.debug("Search command: %s %s", username, predicate)
+        if predicate:
+            return self.social_network.search(predicate, author=username or None)
+        else:
+            raise ValueError("Invalid search command: query is empty")
+
+    @staticmethod
+    def parse_page_options(predicate: str) -> dict[str, int | str | datetime]:
+        """
+        Parses the options of a page command, given as `key=value` words.
+
+        The options are `limit` (the number of posts in the page), `cursor`
+        (the one printed after the previous page), and `since` and `until`
+        (ISO 8601 timestamps, e.g. "2024-01-01T12:00"). Timestamps with a time
+        zone (e.g. "2024-01-01T12:00Z") are converted to local time, like the
+        timestamps of the posts.
+
+        Raises:
+            ValueError:
+                If an option is unknown or its value is invalid.
+        """
+        options = {}
+        for word in predicate.split():
+            key, _, value = word.partition("=")
+            try:
+                if key == "limit" and int(value) > 0:
+                    options[key] = int(value)
+                elif key == "cursor" and value:
+                    options[key] = value
+                elif key in ("since", "until"):
+                    timestamp = datetime.fromisoformat(value)
+                    if timestamp.tzinfo is not None:
+                        timestamp = timestamp.astimezone().replace(tzinfo=None)
+                    options[key] = timestamp
+                else:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Invalid page option: {word}") from None
+
+        return options
+
+    @staticmethod
+    def _format_page(page: Page) -> list[str]:
+        """Returns the lines of a page, followed by its cursor if there are more."""
+        if page.cursor is None:
+            return page.lines
+
+        return [*page.lines, f"(more: cursor={page.cursor})"]
+
+
+def replay(
+    application: Application,
+    lines: Iterable[str],
+    out: TextIO,
+    batch_size: int = 4096,
+):
+    """
+    Replays a stream of commands, writing their output in batches.
+
+    Lines are streamed through the application without being loaded in memory,
+    and the output (including error messages) is buffered and written
+    `batch_size` commands at a time. Replaying stops at an "exit" command.
+
+    Args:
+        application:
+            The application executing the commands.
+        lines:
+            The commands to execute, one per line.
+        out:
+            The stream to write the output to.
+        batch_size:
+            The number of outputs to buffer before writing them.
+    """
+    buffer = []
+
+    def report(_command: str, error: ValueError):
+        buffer.append(f"{error}\n")
+
+    commands = takewhile(lambda line: line.strip().lower() != "exit", lines)
+    for result in application.execute_many(commands, on_error=report):
+        buffer.append("\n".join(result) + "\n")
+        if len(buffer) >= batch_size:
+            out.writelines(buffer)
+            buffer.clear()
+
+    out.writelines(buffer)
+    out.flush()
+
+
+def main(argv: list[str] | None = None):
+    """
+    Runs the application from the command line.
+
+    Commands are read interactively unless a file to replay is given or the
+    standard input is not a terminal (e.g. when commands are piped in).
+
+    Args:
+        argv:
+            The command line arguments (the ones of the process if None).
+    """
+    import argparse
+
+    from src.sr_sw_dev.cache import RenderCache
+    from src.sr_sw_dev.log_config import configure_logging
+    from src.sr_sw_dev.metrics import Metrics, SamplingProfiler
+    from src.sr_sw_dev.persistence import Persistence
+    from src.sr_sw_dev.search import InvertedIndex
+
+    parser = argparse.ArgumentParser(
+        description="A console-based social networking application."
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="replay the commands in FILE ('-' for the standard input)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        metavar="DIR",
+        help="recover the social network from DIR and log its changes there",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="measure the operations and write their metrics to FILE on exit "
+        "(as JSON if it ends with .json, in the Prometheus text format otherwise)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="sample the call stacks and write them collapsed to FILE on exit",
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    persistence = None if args.data_dir is None else Persistence(args.data_dir)
+    metrics = None if args.metrics is None else Metrics()
+    profiler = None if args.profile is None else SamplingProfiler()
+    app = Application(
+        SocialNetwork(
+            persistence=persistence,
+            cache=RenderCache(),
+            index=InvertedIndex(),
+            metrics=metrics,
+        ),
+        metrics,
+    )
+    if profiler is not None:
+        profiler.start()
+    try:
+        _run(app, args.replay)
+    finally:
+        if persistence is not None:
+            persistence.close()
+        if metrics is not None:
+            with open(args.metrics, "w", encoding="utf-8") as file:
+                json_format = args.metrics.endswith(".json")
+                file.write(metrics.to_json() if json_format else metrics.to_text())
+        if profiler is not None:
+            profiler.stop()
+            with open(args.profile, "w", encoding="utf-8") as file:
+                file.writelines(f"{line}\n" for line in profiler.report())
+
+
+def _run(app: Application, replay_file: str | None):
+    """Replays commands from a file or reads them interactively."""
+    if replay_file is None and not sys.stdin.isatty():
+        replay_file = "-"
+
+    if replay_file == "-":
+        replay(app, sys.stdin, sys.stdout)
+    elif replay_file is not None:
+        with open(replay_file, encoding="utf-8") as lines:
+            replay(app, lines, sys.stdout)
+    else:
+        while True:
+            try:
+                command = input("> ")
+                if command.lower() == "exit":
+                    break
+                else:
+                    result = app.parse_command(command)
+                    if result:
+                        print("\n".join(result))
+            except (KeyboardInterrupt, EOFError):
+                print("Exit")
+                break
+            except ValueError as e:
+                print(e)
+
+
+if __name__ == "__main__":
+    main()
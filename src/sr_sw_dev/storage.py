@@ -0,0 +1,421 @@
+"""Storage backends keeping the users, posts and follows of a social network."""
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+from typing import Protocol
+
+from src.sr_sw_dev.graph import FollowGraph
+from src.sr_sw_dev.social_networking import Post, next_version
+from src.sr_sw_dev.store import to_nanoseconds
+from src.sr_sw_dev.walls import WallEntry
+
+log = logging.getLogger(__name__)
+
+# The largest timestamp, to read walls without an upper bound
+NEWEST = 2**63 - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    author INTEGER NOT NULL REFERENCES users (id),
+    nanoseconds INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_by_author ON posts (author, nanoseconds);
+CREATE TABLE IF NOT EXISTS follows (
+    id INTEGER PRIMARY KEY,
+    follower INTEGER NOT NULL REFERENCES users (id),
+    followee INTEGER NOT NULL REFERENCES users (id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS follows_by_follower ON follows (follower, followee);
+CREATE INDEX IF NOT EXISTS follows_by_followee ON follows (followee, follower);
+"""
+
+INSERT_POST = "INSERT INTO posts (id, author, nanoseconds, content) VALUES (?, ?, ?, ?)"
+
+# Posts are sorted by (timestamp, sequence id), which the index on (author,
+# timestamp) yields per author since it ends with the row id
+SELECT_TIMELINE = """
+SELECT content, nanoseconds, id FROM posts
+WHERE author = ?
+ORDER BY nanoseconds DESC, id DESC
+"""
+
+# The timelines on a wall are each read from the index on (author, timestamp),
+# and merged by a top-k sort bounded by the limit
+SELECT_WALL = """
+SELECT users.name, posts.content, posts.nanoseconds, posts.id
+FROM posts JOIN users ON users.id = posts.author
+WHERE posts.author IN (
+    SELECT ?1 UNION ALL SELECT followee FROM follows WHERE follower = ?1
+)
+AND posts.nanoseconds < ?2
+ORDER BY posts.nanoseconds DESC, posts.id DESC
+LIMIT ?3
+"""
+
+SELECT_NAMES = "SELECT name FROM users ORDER BY id"
+
+SELECT_FOLLOWING = """
+SELECT users.name FROM follows JOIN users ON users.id = follows.followee
+WHERE follows.follower = ?
+ORDER BY follows.id
+"""
+
+SELECT_FOLLOWERS = """
+SELECT users.name FROM follows JOIN users ON users.id = follows.follower
+WHERE follows.followee = ?
+ORDER BY follows.id
+"""
+
+
+class StorageBackend(Protocol):
+    """
+    The storage of the users, posts and follows of a social network.
+
+    The social network checks that users exist before calling the backend, so
+    backends may assume that the users they are given exist.
+    """
+
+    def add_user(self, name: str):
+        """Adds a user."""
+
+    def has_user(self, name: str) -> bool:
+        """Checks if a user exists."""
+
+    def get_user_id(self, name: str) -> int:
+        """Returns the dense integer id of a user, in the order users were added."""
+
+    def count_users(self) -> int:
+        """Returns the number of users."""
+
+    def count_posts(self) -> int:
+        """Returns the number of posts."""
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges."""
+
+    def add_post(self, name: str, content: str, nanoseconds: int) -> int:
+        """Adds a post to the timeline of a user and returns its sequence id."""
+
+    def follows(self, name: str, following: str) -> bool:
+        """Adds a follow edge, returning whether it is new."""
+
+    def unfollows(self, name: str, following: str) -> bool:
+        """Removes a follow edge, returning whether it existed."""
+
+    def is_following(self, name: str, following: str) -> bool:
+        """Checks if a user is following another user."""
+
+    def get_following(self, name: str) -> list[str]:
+        """Returns the users a user is following, in the order they were followed."""
+
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the users following a user, in the order they followed."""
+
+    def export_follow_graph(self) -> FollowGraph:
+        """Returns a snapshot of the follow graph."""
+
+    def get_timeline_version(self, name: str) -> int:
+        """Returns the version of the timeline of a user, newer once they post."""
+
+    def get_wall_version(self, name: str) -> int:
+        """Returns the version of the wall of a user, newer once it changes."""
+
+    def read_timeline(self, name: str) -> list[Post]:
+        """Returns the posts of a user newest-first."""
+
+    def read_wall(
+        self, name: str, limit: int | None, before: datetime | None
+    ) -> Iterable[WallEntry]:
+        """Returns the entries of the wall of a user newest-first."""
+
+    def close(self):
+        """Releases the resources of the backend."""
+
+
+class SqliteBackend:
+    """
+    A storage backend keeping the social network in a SQLite database.
+
+    Only the ids of the users are kept in memory, so the posts and follows can
+    outgrow the memory of the process. The database is in WAL journal mode,
+    so readers never block the writer nor each other.
+
+    Writes go through a single connection, guarded by a lock. Posts are
+    buffered and inserted in batches with a single `executemany` per
+    transaction, like the group commits of the write-ahead log: the posts of
+    a batch are lost if the process crashes before it is flushed. Reads flush
+    the pending posts first, then run on a pool of connections, so that
+    concurrent readers do not share one. Every query is a constant string,
+    so each connection prepares it once and reuses it from its statement
+    cache.
+
+    Timelines and walls are read with indexes on (author, timestamp) and on
+    both sides of the follow edges. A wall is a single query merging the
+    timelines of its authors, bounded by the limit.
+
+    The versions of the timelines and following lists are kept in memory.
+    They are drawn from a clock starting at the current time, so reopening a
+    database gives every user a version newer than any before.
+
+    Attributes:
+        path:
+            The path of the database.
+        batch_size:
+            The number of posts inserted per transaction.
+        pool_size:
+            The maximum number of idle reader connections kept open.
+        ids:
+            The id of each user, by name.
+        pending:
+            The posts waiting to be inserted, as (id, author id, nanoseconds,
+            content) rows.
+        next_id:
+            The sequence id of the next post.
+        timeline_versions:
+            The version of the timeline of each user, by name.
+        following_versions:
+            The version of the following list of each user, by name.
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = 256, pool_size: int = 8):
+        """
+        Opens a database, creating it if needed.
+
+        Args:
+            path:
+                The path of the database.
+            batch_size:
+                The number of posts inserted per transaction.
+            pool_size:
+                The maximum number of idle reader connections kept open.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.executescript(SCHEMA)
+
+        self.ids: dict[str, int] = dict(
+            self._writer.execute("SELECT name, id FROM users")
+        )
+        self.pending: list[tuple[int, int, int, str]] = []
+        (self.next_id,) = self._writer.execute(
+            "SELECT coalesce(max(id) + 1, 0) FROM posts"
+        ).fetchone()
+        version = next_version()
+        self.timeline_versions = dict.fromkeys(self.ids, version)
+        self.following_versions = dict.fromkeys(self.ids, version)
+
+        log.debug("SQLite backend opened: %s", self.path)
+
+    def add_user(self, name: str):
+        """Adds a user, unless they already exist."""
+        with self._lock:
+            self._writer.execute(
+                "INSERT OR IGNORE INTO users (name) VALUES (?)", (name,)
+            )
+            (self.ids[name],) = self._writer.execute(
+                "SELECT id FROM users WHERE name = ?", (name,)
+            ).fetchone()
+            version = next_version()
+            self.timeline_versions[name] = self.following_versions[name] = version
+
+    def has_user(self, name: str) -> bool:
+        """Checks if a user exists."""
+        return name in self.ids
+
+    def get_user_id(self, name: str) -> int:
+        """
+        Returns the dense integer id of a user.
+
+        Users are never deleted, so their row ids are dense: SQLite assigns the
+        largest row id plus one to each new user.
+        """
+        return self.ids[name] - 1
+
+    def count_users(self) -> int:
+        """Returns the number of users."""
+        return len(self.ids)
+
+    def count_posts(self) -> int:
+        """Returns the number of posts."""
+        return self.next_id
+
+    def count_follows(self) -> int:
+        """Returns the number of follow edges."""
+        with self._reader() as connection:
+            (count,) = connection.execute("SELECT count(*) FROM follows").fetchone()
+        return count
+
+    def add_post(self, name: str, content: str, nanoseconds: int) -> int:
+        """Adds a post to the timeline of a user and returns its sequence id."""
+        with self._lock:
+            post_id = self.next_id
+            self.next_id += 1
+            self.pending.append((post_id, self.ids[name], nanoseconds, content))
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+            self.timeline_versions[name] = next_version()
+
+        return post_id
+
+    def flush(self):
+        """Inserts the pending posts."""
+        with self._lock:
+            self._flush()
+
+    def follows(self, name: str, following: str) -> bool:
+        """Adds a follow edge, returning whether it is new."""
+        if name == following:
+            return False
+
+        with self._lock:
+            cursor = self._writer.execute(
+                "INSERT OR IGNORE INTO follows (follower, followee) VALUES (?, ?)",
+                (self.ids[name], self.ids[following]),
+            )
+            if cursor.rowcount != 1:
+                return False
+
+            self.following_versions[name] = next_version()
+            return True
+
+    def unfollows(self, name: str, following: str) -> bool:
+        """Removes a follow edge, returning whether it existed."""
+        with self._lock:
+            cursor = self._writer.execute(
+                "DELETE FROM follows WHERE follower = ? AND followee = ?",
+                (self.ids[name], self.ids[following]),
+            )
+            if cursor.rowcount != 1:
+                return False
+
+            self.following_versions[name] = next_version()
+            return True
+
+    def is_following(self, name: str, following: str) -> bool:
+        """Checks if a user is following another user."""
+        followee = self.ids.get(following)
+        with self._reader() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM follows WHERE follower = ? AND followee = ?",
+                (self.ids[name], followee),
+            ).fetchone()
+        return row is not None
+
+    def get_following(self, name: str) -> list[str]:
+        """Returns the users a user is following, in the order they were followed."""
+        with self._reader() as connection:
+            rows = connection.execute(SELECT_FOLLOWING, (self.ids[name],))
+            return [following for (following,) in rows]
+
+    def get_followers(self, name: str) -> list[str]:
+        """Returns the users following a user, in the order they followed."""
+        with self._reader() as connection:
+            rows = connection.execute(SELECT_FOLLOWERS, (self.ids[name],))
+            return [follower for (follower,) in rows]
+
+    def export_follow_graph(self) -> FollowGraph:
+        """Returns a snapshot of the follow graph."""
+        with self._reader() as connection:
+            edges = connection.execute(
+                "SELECT follower, followee FROM follows"
+            ).fetchall()
+            # The names are read last to cover the users of every edge
+            names = [name for (name,) in connection.execute(SELECT_NAMES)]
+
+        following = [[] for _ in names]
+        for follower, followee in edges:
+            following[follower - 1].append(followee - 1)
+        return FollowGraph.from_adjacency(names, following)
+
+    def get_timeline_version(self, name: str) -> int:
+        """Returns the version of the timeline of a user."""
+        return self.timeline_versions[name]
+
+    def get_wall_version(self, name: str) -> int:
+        """Returns the version of the wall of a user."""
+        versions = self.timeline_versions
+        return max(
+            versions[name],
+            self.following_versions[name],
+            *(versions[following] for following in self.get_following(name)),
+        )
+
+    def read_timeline(self, name: str) -> list[Post]:
+        """Returns the posts of a user newest-first."""
+        self.flush()
+        with self._reader() as connection:
+            rows = connection.execute(SELECT_TIMELINE, (self.ids[name],))
+            return [Post.load(*row) for row in rows]
+
+    def read_wall(
+        self, name: str, limit: int | None, before: datetime | None
+    ) -> list[WallEntry]:
+        """Returns the entries of the wall of a user newest-first."""
+        self.flush()
+        until = NEWEST if before is None else to_nanoseconds(before)
+        with self._reader() as connection:
+            rows = connection.execute(
+                SELECT_WALL, (self.ids[name], until, -1 if limit is None else limit)
+            )
+            return [
+                WallEntry(author, Post.load(content, nanoseconds, post_id))
+                for author, content, nanoseconds, post_id in rows
+            ]
+
+    def close(self):
+        """Inserts the pending posts and closes the connections."""
+        self.flush()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+        log.debug("SQLite backend closed: %s", self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection in autocommit mode, shareable across threads."""
+        connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a reader connection from the pool, opening one if none is idle."""
+        try:
+            connection = self._readers.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+
+        try:
+            yield connection
+        finally:
+            if self._readers.qsize() < self.pool_size:
+                self._readers.put(connection)
+            else:
+                connection.close()
+
+    def _flush(self):
+        """Inserts the pending posts in a single transaction, with the lock held."""
+        if self.pending:
+            self._writer.execute("BEGIN")
+            self._writer.executemany(INSERT_POST, self.pending)
+            self._writer.execute("COMMIT")
+            self.pending.clear()
@@ -0,0 +1,522 @@
+"""Columnar storage for the posts of a social network."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta
+import heapq
+from itertools import chain, repeat
+from operator import add, attrgetter
+import os
+from pathlib import Path
+import threading
+from typing import NamedTuple
+
+from src.sr_sw_dev.segments import Segment
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# The number of bytes of the fixed-size columns of a post (author, timestamp
+# and offset)
+ROW_SIZE = 4 + 8 + 8
+
+
+def to_nanoseconds(timestamp: datetime) -> int:
+    """Returns the nanoseconds elapsed between the epoch and a timestamp."""
+    return (timestamp - EPOCH) // MICROSECOND * 1000
+
+
+def from_nanoseconds(nanoseconds: int) -> datetime:
+    """Returns the timestamp that is the given number of nanoseconds after the epoch."""
+    return EPOCH + timedelta(microseconds=nanoseconds // 1000)
+
+
+class HotColumns(NamedTuple):
+    """
+    The columns of the posts a post store keeps in memory.
+
+    Posts are dense, i.e. the i-th one has row id `base + i`, until posts are
+    dropped from between them: the posts copied around them are then sparse,
+    and their row ids are kept in a sorted column before the dense ones.
+
+    Attributes:
+        base:
+            The row id of the first dense in-memory post.
+        ids:
+            The row id of each sparse post, all before `base`.
+        authors:
+            The author id of each post.
+        timestamps:
+            The timestamp of each post, in nanoseconds since the epoch.
+        offsets:
+            The offset of the content of each post in the whole arena. The
+            content of the i-th post spans from `offsets[i]` to
+            `offsets[i + 1]`.
+        arena:
+            The UTF-8 encoded content of the posts, starting at `offsets[0]`.
+    """
+
+    base: int
+    ids: array
+    authors: array
+    timestamps: array
+    offsets: array
+    arena: bytearray
+
+
+class PostStore:
+    """
+    Columnar storage for posts.
+
+    Instead of one object per post, every post is a row id into a few flat
+    columns: the interned id of its author, its timestamp in nanoseconds since
+    the epoch and the offset of its UTF-8 encoded content in a shared arena.
+    Timestamps are naive, like the ones returned by `datetime.now()`.
+
+    Row ids are assigned in the order posts are appended, so they double as a
+    monotonically increasing sequence id, which breaks the ties between posts
+    with the same timestamp.
+
+    Given a segment directory, the store is tiered: only the newest posts (the
+    hot window) stay in memory, and older ones are sealed into immutable,
+    memory-mapped segments of `segment_size` posts. Row ids are stable across
+    tiers, and reads only page a cold segment in when they go past the hot
+    window.
+
+    Posts are only ever appended, and sealing replaces the in-memory columns
+    as a whole rather than trimming them in place, so posts can be read from
+    other threads without locking while one thread appends.
+
+    Posts can be dropped in bulk, e.g. once they fall out of a retention
+    policy: the in-memory columns are replaced by copies without them, and the
+    segments are deleted once all of their posts were dropped. Row ids stay
+    stable, and the row ids of dropped posts are no longer valid.
+
+    Attributes:
+        names:
+            The name of each interned author, indexed by author id.
+        author_ids:
+            The author id of each interned author name.
+        hot:
+            The columns of the in-memory posts.
+        segment_dir:
+            The directory to seal cold posts into (in-memory only if None).
+        hot_size:
+            The number of newest posts kept in memory when tiered.
+        segment_size:
+            The number of posts sealed into each segment.
+        segments:
+            The sealed segments, sorted by row id.
+    """
+
+    def __init__(
+        self,
+        segment_dir: Path | None = None,
+        hot_size: int = 100_000,
+        segment_size: int = 100_000,
+    ):
+        """
+        Initializes an empty post store.
+
+        Args:
+            segment_dir:
+                The directory to seal cold posts into (in-memory only if None).
+                It is created if it does not exist.
+            hot_size:
+                The number of newest posts kept in memory when tiered.
+            segment_size:
+                The number of posts sealed into each segment.
+        """
+        self.names: list[str] = []
+        self.author_ids: dict[str, int] = {}
+        self.hot = HotColumns(
+            0, array("q"), array("i"), array("q"), array("q", [0]), bytearray()
+        )
+
+        self.segment_dir = None if segment_dir is None else Path(segment_dir)
+        self.hot_size = hot_size
+        self.segment_size = segment_size
+        self.segments: list[Segment] = []
+        self._lock = threading.Lock()
+
+        # The number of dropped posts of each segment, by row id of its first
+        # post, and the dropped posts still in memory, which a tiered store
+        # only drops once they are sealed
+        self._dropped: dict[int, int] = {}
+        self._unsealed = array("q")
+
+        if self.segment_dir is not None:
+            os.makedirs(self.segment_dir, exist_ok=True)
+
+    @property
+    def base(self) -> int:
+        """Returns the row id of the first in-memory post."""
+        return self.hot.base
+
+    @property
+    def authors(self) -> array:
+        """Returns the author id of each in-memory post."""
+        return self.hot.authors
+
+    @property
+    def timestamps(self) -> array:
+        """Returns the timestamp of each in-memory post."""
+        return self.hot.timestamps
+
+    @property
+    def offsets(self) -> array:
+        """Returns the arena offsets of the in-memory posts."""
+        return self.hot.offsets
+
+    @property
+    def arena(self) -> bytearray:
+        """Returns the UTF-8 encoded content of the in-memory posts."""
+        return self.hot.arena
+
+    def intern(self, name: str) -> int:
+        """Returns the author id of a name, assigning a new one if needed."""
+        author_id = self.author_ids.get(name)
+        if author_id is None:
+            with self._lock:
+                author_id = self.author_ids.get(name)
+                if author_id is None:
+                    self.names.append(name)
+                    author_id = self.author_ids[name] = len(self.names) - 1
+
+        return author_id
+
+    def append(self, author_id: int, content: str, timestamp: int) -> int:
+        """
+        Appends a post to the store.
+
+        Args:
+            author_id:
+                The interned id of the author of the post.
+            content:
+                The content of the post.
+            timestamp:
+                The timestamp of the post, in nanoseconds since the epoch.
+
+        Returns:
+            The row id of the new post.
+        """
+        encoded = content.encode()
+        with self._lock:
+            hot = self.hot
+            hot.arena.extend(encoded)
+            hot.authors.append(author_id)
+            hot.timestamps.append(timestamp)
+            hot.offsets.append(hot.offsets[-1] + len(encoded))
+            post_id = hot.base + len(hot.timestamps) - len(hot.ids) - 1
+
+            if (
+                self.segment_dir is not None
+                and len(hot.timestamps) >= self.hot_size + self.segment_size
+            ):
+                self._seal()
+
+        return post_id
+
+    def count_posts(self) -> int:
+        """Returns the number of posts appended to the store, dropped or not."""
+        hot = self.hot
+        return hot.base + len(hot.timestamps) - len(hot.ids)
+
+    def count_stored_posts(self) -> int:
+        """
+        Returns the number of posts stored, in memory or in segments.
+
+        The dropped posts of a segment are still stored until all of its posts
+        are dropped.
+        """
+        hot = self.hot
+        return len(hot.timestamps) + sum(map(len, self.segments))
+
+    def iter_post_ids(self, reverse: bool = False) -> Iterator[int]:
+        """Lazily yields the row ids of the posts stored, oldest-first by default."""
+        with self._lock:
+            # Both tiers are read at once, so that no post is sealed in between
+            hot, segments = self.hot, self.segments
+
+        ranges = [
+            *(range(segment.start, segment.stop) for segment in segments),
+            hot.ids,
+            range(hot.base, hot.base + len(hot.timestamps) - len(hot.ids)),
+        ]
+        if reverse:
+            return chain.from_iterable(map(reversed, reversed(ranges)))
+
+        return chain.from_iterable(ranges)
+
+    def get_author(self, post_id: int) -> str:
+        """Returns the name of the author of a post."""
+        hot = self.hot
+        i = post_id - hot.base
+        if i >= 0:
+            return self.names[hot.authors[i + len(hot.ids)]]
+
+        i = _sparse_row(hot, post_id)
+        if i >= 0:
+            return self.names[hot.authors[i]]
+
+        segment = self._segment(post_id)
+        return self.names[segment.authors[post_id - segment.start]]
+
+    def get_content(self, post_id: int) -> str:
+        """Returns the content of a post."""
+        hot = self.hot
+        i = post_id - hot.base
+        i = i + len(hot.ids) if i >= 0 else _sparse_row(hot, post_id)
+        if i >= 0:
+            offsets = hot.offsets
+            arena_start = offsets[0]
+            return hot.arena[
+                offsets[i] - arena_start : offsets[i + 1] - arena_start
+            ].decode()
+
+        return self._segment(post_id).get_content(post_id)
+
+    def get_timestamp(self, post_id: int) -> datetime:
+        """Returns the timestamp of a post."""
+        return from_nanoseconds(self.get_nanoseconds(post_id))
+
+    def get_nanoseconds(self, post_id: int) -> int:
+        """Returns the timestamp of a post, in nanoseconds since the epoch."""
+        hot = self.hot
+        i = post_id - hot.base
+        if i >= 0:
+            return hot.timestamps[i + len(hot.ids)]
+
+        i = _sparse_row(hot, post_id)
+        if i >= 0:
+            return hot.timestamps[i]
+
+        segment = self._segment(post_id)
+        return segment.timestamps[post_id - segment.start]
+
+    def load(
+        self,
+        names: list[str],
+        authors: array,
+        timestamps: array,
+        offsets: array,
+        arena: bytearray,
+    ):
+        """
+        Replaces the content of the store with the columns of an untiered store.
+
+        Args:
+            names:
+                The name of each interned author, indexed by author id.
+            authors:
+                The author id of each post.
+            timestamps:
+                The timestamp of each post, in nanoseconds since the epoch.
+            offsets:
+                The offset of the content of each post in the arena, plus the
+                offset following the last one.
+            arena:
+                The UTF-8 encoded content of all the posts.
+        """
+        with self._lock:
+            self.names = names
+            self.author_ids = {name: i for i, name in enumerate(names)}
+            self.hot = HotColumns(0, array("q"), authors, timestamps, offsets, arena)
+            self._seal()
+
+    def seal(self):
+        """
+        Seals the oldest in-memory posts into segments.
+
+        Posts are sealed `segment_size` at a time, while more than `hot_size`
+        of them would stay in memory. This is a no-op if the store is not
+        tiered.
+        """
+        with self._lock:
+            self._seal()
+
+    def drop(self, post_ids: Sequence[int]) -> tuple[int, int]:
+        """
+        Drops posts from the store, e.g. once no timeline nor read can reach them.
+
+        The in-memory posts are dropped by copying the ones to keep without
+        holding the lock, then the posts appended meanwhile, which is the only
+        part blocking writers. The copied posts become sparse, keeping their
+        row ids. Segments are immutable, so they are only deleted whole, once
+        all of their posts were dropped, and the in-memory posts of a tiered
+        store are only dropped once they are sealed.
+
+        Args:
+            post_ids:
+                The sorted row ids of the posts to drop, which must not have
+                been dropped yet.
+
+        Returns:
+            The number of posts and of bytes of columns and content dropped.
+        """
+        if self.segment_dir is not None:
+            return self._drop_sealed(post_ids)
+
+        hot = self.hot
+        n, k, base = len(hot.timestamps), len(hot.ids), hot.base
+        rows = [
+            post_id - base + k if post_id >= base else _sparse_row(hot, post_id)
+            for post_id in post_ids
+        ]
+        if not rows:
+            return 0, 0
+
+        ids, authors, timestamps = array("q"), array("i"), array("q")
+        offsets, arena = array("q", [0]), bytearray()
+        old_offsets, arena_start = hot.offsets, hot.offsets[0]
+        previous = 0
+        for row in [*rows, n]:
+            if row > previous:
+                # Copies the run of posts kept before the dropped one
+                ids.extend(hot.ids[previous:row])
+                if row > k:
+                    ids.extend(range(base + max(previous, k) - k, base + row - k))
+                authors.extend(hot.authors[previous:row])
+                timestamps.extend(hot.timestamps[previous:row])
+                start = old_offsets[previous] - arena_start
+                shift = len(arena) - start - arena_start
+                offsets.extend(
+                    map(add, old_offsets[previous + 1 : row + 1], repeat(shift))
+                )
+                arena.extend(hot.arena[start : old_offsets[row] - arena_start])
+            previous = row + 1
+
+        n_bytes = len(rows) * ROW_SIZE + (old_offsets[n] - arena_start) - len(arena)
+        with self._lock:
+            # The posts appended meanwhile are copied as they are, dense
+            hot = self.hot
+            m = len(hot.timestamps)
+            authors.extend(hot.authors[n:m])
+            timestamps.extend(hot.timestamps[n:m])
+            shift = len(arena) - old_offsets[n]
+            offsets.extend(map(add, hot.offsets[n + 1 : m + 1], repeat(shift)))
+            arena.extend(hot.arena[old_offsets[n] - arena_start :])
+            self.hot = HotColumns(
+                base + n - k, ids, authors, timestamps, offsets, arena
+            )
+
+        return len(rows), n_bytes
+
+    def chunks(self) -> Iterator[tuple[Sequence[int], ...]]:
+        """
+        Yields the columns of the segments and then of the in-memory posts.
+
+        Each chunk is a tuple of the authors, timestamps, offsets and arena of a
+        contiguous range of posts, where the offsets include the end offset of
+        the last post. Concatenating the chunks (and dropping all but the last
+        end offset) yields the columns of an untiered store.
+
+        The store must not have dropped posts.
+        """
+        for segment in self.segments:
+            yield segment.authors, segment.timestamps, segment.offsets, segment.arena
+        yield self.authors, self.timestamps, self.offsets, self.arena
+
+    def close(self):
+        """Unmaps the segments of the store."""
+        for segment in self.segments:
+            segment.close()
+
+    def nbytes(self) -> int:
+        """Returns the number of in-memory bytes used by the columns and arena."""
+        hot = self.hot
+        columns = (hot.ids, hot.authors, hot.timestamps, hot.offsets)
+        return sum(len(column) * column.itemsize for column in columns) + len(hot.arena)
+
+    def _segment(self, post_id: int) -> Segment:
+        """Returns the segment holding a cold post."""
+        segments = self.segments
+        i = bisect_right(segments, post_id, key=attrgetter("start")) - 1
+        if i < 0 or post_id >= segments[i].stop:
+            raise IndexError(f"Invalid post id: {post_id}")
+
+        return segments[i]
+
+    def _drop_sealed(self, post_ids: Sequence[int]) -> tuple[int, int]:
+        """Drops posts from a tiered store, deleting the segments left empty."""
+        with self._lock:
+            post_ids = array("q", heapq.merge(self._unsealed, post_ids))
+            sealed = bisect_left(post_ids, self.hot.base)
+            self._unsealed = post_ids[sealed:]
+
+            kept, deleted = [], []
+            for segment in self.segments:
+                dropped = self._dropped.get(segment.start, 0) + (
+                    bisect_left(post_ids, segment.stop, 0, sealed)
+                    - bisect_left(post_ids, segment.start, 0, sealed)
+                )
+                if dropped < len(segment):
+                    self._dropped[segment.start] = dropped
+                    kept.append(segment)
+                else:
+                    self._dropped.pop(segment.start, None)
+                    deleted.append(segment)
+
+            # The list is replaced as a whole, so that readers can keep using
+            # the previous one
+            self.segments = kept
+
+        n_posts = n_bytes = 0
+        for segment in deleted:
+            n_posts += len(segment)
+            n_bytes += segment.path.stat().st_size
+            segment.close()
+            segment.path.unlink()
+
+        return n_posts, n_bytes
+
+    def _seal(self):
+        """Seals the oldest in-memory posts into segments, holding the lock."""
+        if self.segment_dir is None:
+            return
+
+        # The in-memory posts of a tiered store are never sparse (see `drop`)
+        hot = self.hot
+        while len(hot.timestamps) >= self.hot_size + self.segment_size:
+            n, arena_start = self.segment_size, hot.offsets[0]
+            size = hot.offsets[n] - arena_start
+            segment = Segment.write(
+                self.segment_dir / f"segment-{hot.base:012d}.seg",
+                hot.base,
+                hot.authors[:n],
+                hot.timestamps[:n],
+                hot.offsets[: n + 1],
+                hot.arena[:size],
+            )
+            self.segments.append(segment)
+
+            # Readers holding the previous columns can keep using them
+            hot = HotColumns(
+                hot.base + n,
+                hot.ids,
+                hot.authors[n:],
+                hot.timestamps[n:],
+                hot.offsets[n:],
+                hot.arena[size:],
+            )
+            self.hot = hot
+
+
+def _sparse_row(hot: HotColumns, post_id: int) -> int:
+    """
+    Returns the index of a sparse in-memory post in the columns, or -1 if cold.
+
+    Raises:
+        IndexError:
+            If the post was dropped.
+    """
+    ids = hot.ids
+    if not ids or post_id < ids[0]:
+        return -1
+
+    i = bisect_left(ids, post_id)
+    if i == len(ids) or ids[i] != post_id:
+        raise IndexError(f"Invalid post id: {post_id}")
+
+    return i
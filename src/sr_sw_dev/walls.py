@@ -0,0 +1,273 @@
+"""Helpers to build walls out of the per-user timelines of a social network."""
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+import heapq
+from itertools import islice
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+
+from src.sr_sw_dev.store import to_nanoseconds
+
+if TYPE_CHECKING:
+    from src.sr_sw_dev.social_networking import Post, User
+
+
+class WallEntry(NamedTuple):
+    """
+    A post shown on a wall, along with its author.
+
+    Unlike a signed copy of the post, a wall entry does not allocate a new post:
+    the author is only prepended to the content when the entry is rendered.
+
+    Attributes:
+        author:
+            The name of the author of the post.
+        post:
+            The post.
+    """
+
+    author: str
+    post: "Post"
+
+    def __str__(self) -> str:
+        """Returns a string representation of the signed post."""
+        return f"{self.author} - {self.post}"
+
+
+def newest_first(entry: WallEntry) -> tuple[int, int]:
+    """Returns the sort key of a wall entry: its timestamp, then its sequence id."""
+    post = entry.post
+    return post.nanoseconds, post.seq
+
+
+def merge_newest_first(
+    streams: Iterable[Iterator[WallEntry]],
+    limit: int | None = None,
+) -> Iterator[WallEntry]:
+    """
+    Lazily merges several newest-first streams of wall entries.
+
+    Each stream must already be sorted newest-first, which is the case for the
+    timelines of the users because posts are only ever appended. Only the head
+    of each stream is kept in the heap, so reading a page of `limit` entries
+    costs O(k + limit * log k) for k streams instead of sorting the whole
+    history.
+
+    Entries are ordered by timestamp, then by sequence id, so posts from the
+    same instant come out in the reverse order they were posted, whichever
+    streams they come from.
+
+    Args:
+        streams:
+            The newest-first streams of wall entries to merge.
+        limit:
+            The maximum number of entries to yield (all of them if None).
+    """
+    merged = heapq.merge(*streams, key=newest_first, reverse=True)
+
+    return merged if limit is None else islice(merged, limit)
+
+
+class FanoutWalls:
+    """
+    Materialized walls maintained on write (fan-out-on-write).
+
+    Every post is pushed into a bounded, newest-first buffer for its author and
+    for each of their followers, so most wall reads only have to walk a buffer.
+    Authors with at least `celebrity_threshold` followers are not fanned out:
+    their posts are pulled from their timeline and merged in at read time.
+    Reads that cannot be answered from a buffer (because it dropped older
+    entries) return None so that the caller falls back to a pull merge.
+
+    Each buffer is guarded by its own lock, so the buffers can be shared
+    between threads: a push only holds the lock of one follower's buffer at a
+    time, and a read only holds the lock of its own buffer while copying it,
+    then merges the celebrity timelines in without any lock. Thus reads never
+    wait for the whole fan-out of a post, only for an insert into their own
+    buffer.
+
+    Attributes:
+        capacity:
+            The maximum number of entries kept in each wall buffer.
+        celebrity_threshold:
+            The number of followers from which an author is pulled on read.
+        buffers:
+            The newest-first wall buffer of each user.
+        truncated:
+            The users whose wall buffer dropped entries because it was full.
+        celebrities:
+            The authors whose posts are pulled on read.
+    """
+
+    def __init__(self, capacity: int = 1000, celebrity_threshold: int = 10_000):
+        """
+        Initializes the materialized walls.
+
+        Args:
+            capacity:
+                The maximum number of entries kept in each wall buffer.
+            celebrity_threshold:
+                The number of followers from which an author is pulled on read.
+        """
+        self.capacity = capacity
+        self.celebrity_threshold = celebrity_threshold
+        self.buffers: dict[str, deque[WallEntry]] = {}
+        self.truncated: set[str] = set()
+        self.celebrities: set[str] = set()
+        self._locks: dict[str, threading.Lock] = {}
+
+    def add_user(self, user: "User"):
+        """Creates an empty wall buffer for a new user."""
+        with self._locks.setdefault(user.name, threading.Lock()):
+            self.buffers[user.name] = deque(maxlen=self.capacity)
+            self.truncated.discard(user.name)
+
+    def is_celebrity(self, name: str) -> bool:
+        """Checks if the posts of the given author are pulled on read."""
+        return name in self.celebrities
+
+    def push(self, user: "User", post: "Post"):
+        """Fans a new post out to its author's and their followers' walls."""
+        author = user.name
+        if author in self.celebrities:
+            return
+
+        # The followers are copied, as they may change while the post is pushed
+        for name in [author, *user.followers]:
+            with self._locks[name]:
+                self._insert(name, author, post)
+
+    def follow(self, user: "User", followee: "User"):
+        """
+        Records a new follow and rebuilds the follower's wall buffer.
+
+        Once an author reaches the celebrity threshold, they stay pulled on read
+        even if they lose followers, because their posts were not fanned out.
+        """
+        if len(followee.followers) >= self.celebrity_threshold:
+            self.celebrities.add(followee.name)
+
+        self._rebuild(user)
+
+    def unfollow(self, user: "User", followee: "User"):
+        """Records an unfollow and rebuilds the follower's wall buffer."""
+        self._rebuild(user)
+
+    def load(self, users: Iterable["User"]):
+        """
+        Rebuilds every wall buffer after users were loaded in bulk.
+
+        Celebrities are recomputed from the current follower counts, which only
+        changes which authors are pulled on read, not the walls themselves.
+        """
+        users = list(users)
+        for user in users:
+            if len(user.followers) >= self.celebrity_threshold:
+                self.celebrities.add(user.name)
+
+        for user in users:
+            self.add_user(user)
+            self._rebuild(user)
+
+    def read(
+        self,
+        user: "User",
+        limit: int | None = None,
+        before: datetime | None = None,
+    ) -> list[WallEntry] | None:
+        """
+        Reads a wall from its buffer, merging celebrity timelines in.
+
+        Args:
+            user:
+                The owner of the wall.
+            limit:
+                The maximum number of posts to return (all of them if None).
+            before:
+                Only return posts strictly older than this timestamp.
+
+        Returns:
+            The entries of the wall newest-first, or None if the
+            buffer no longer holds enough entries to answer the read.
+        """
+        name = user.name
+        with self._locks[name]:
+            truncated = name in self.truncated
+            if limit is None and truncated:
+                return None
+
+            # Copied in C, so the lock is only held for a few microseconds
+            entries = list(self.buffers[name])
+
+        exhausted = False
+        bound = None if before is None else to_nanoseconds(before)
+
+        def buffered() -> Iterator[WallEntry]:
+            nonlocal exhausted
+            for entry in entries:
+                if entry.author not in self.celebrities and (
+                    bound is None or entry.post.nanoseconds < bound
+                ):
+                    yield entry
+            exhausted = True
+
+        streams = [buffered()]
+        streams.extend(
+            source._iter_wall_entries(before)
+            for source in [user, *user.following.values()]
+            if source.name in self.celebrities
+        )
+
+        wall = list(merge_newest_first(streams, limit))
+
+        return None if exhausted and truncated else wall
+
+    def _insert(self, name: str, author: str, post: "Post"):
+        """
+        Inserts a post into a wall buffer keeping it sorted newest-first.
+
+        The lock of the buffer must be held.
+        """
+        buffer = self.buffers[name]
+        key = (post.nanoseconds, post.seq)
+
+        # New posts almost always belong at the head of the buffer, so only
+        # skip the entries that are newer than this post.
+        i = 0
+        for entry in buffer:
+            if newest_first(entry) > key:
+                i += 1
+            else:
+                break
+
+        if len(buffer) == self.capacity:
+            self.truncated.add(name)
+            if i == len(buffer):
+                return
+            buffer.pop()
+
+        buffer.insert(i, WallEntry(author, post))
+
+    def _rebuild(self, user: "User"):
+        """
+        Rebuilds a wall buffer from the timelines of its non-celebrities.
+
+        The lock of the buffer is held while its timelines are merged, so that
+        a post pushed in the meantime is not lost when the buffer is replaced.
+        """
+        with self._locks[user.name]:
+            streams = [
+                source._iter_wall_entries()
+                for source in [user, *user.following.values()]
+                if source.name not in self.celebrities
+            ]
+            wall = list(merge_newest_first(streams, self.capacity + 1))
+
+            if len(wall) > self.capacity:
+                self.truncated.add(user.name)
+            else:
+                self.truncated.discard(user.name)
+
+            self.buffers[user.name] = deque(wall[: self.capacity], maxlen=self.capacity)
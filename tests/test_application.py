@@ -1,11 +1,12 @@
 """This module provides tests for the Application class."""
 
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
+import io
 
 from freezegun import freeze_time
 import pytest
 
-from src.sr_sw_dev.social_networking import Application
+from src.sr_sw_dev.social_networking import Application, replay
 
 
 def test_application_init():
@@ -88,6 +89,23 @@ def test_application_parse_command_following():
     assert following == expected_following, "Charlie should follow Alice"
 
 
+def test_application_parse_command_unfollowing():
+    """Checks that an application can parse unfollowing commands."""
+    application = Application()
+    application.parse_command("Alice -> I love the weather today!")
+    application.parse_command("Charlie -> Hi!")
+    application.parse_command("Charlie follows Alice")
+    application.parse_command("Charlie unfollows Alice")
+
+    following = application.get_social_network().get_following("Charlie")
+    assert following == [], "Charlie should not follow Alice anymore"
+
+    with pytest.raises(
+        ValueError, match="Invalid unfollowing command: user to unfollow is empty"
+    ):
+        application.parse_command("Charlie unfollows")
+
+
 def test_application_parse_command_following_nonexistent_user():
     """Checks that an application can parse following commands with a nonexistent user."""
     application = Application()
@@ -161,3 +179,156 @@ def test_application_parse_command_invalid_command():
 
     with pytest.raises(ValueError, match="Invalid command: Alice reacts"):
         application.parse_command("Alice reacts")
+
+
+def test_application_parse_command_verbs_in_message():
+    """Checks that verbs inside a message or a username do not misroute commands."""
+    application = Application()
+    application.parse_command("Alice -> Bob follows my wall")
+    application.parse_command("Swallow -> Hi!")
+
+    timeline = application.parse_command("Alice")
+    assert timeline == ["Bob follows my wall (just now)"], (
+        "Verbs inside a message should be part of the message"
+    )
+
+    timeline = application.parse_command("Swallow")
+    assert timeline == ["Hi! (just now)"], (
+        "Usernames containing a verb should be read as usernames"
+    )
+
+
+def test_application_register_command():
+    """Checks that new commands can be registered at runtime."""
+    application = Application()
+    application.parse_command("Alice -> I love the weather today!")
+    application.register_command(
+        "posts",
+        "counting",
+        lambda username, _: [
+            str(application.get_social_network().users[username].count_posts())
+        ],
+    )
+
+    assert application.tokenize("Alice posts") == ("counting", "Alice", ""), (
+        "Registered verbs should be tokenized"
+    )
+    assert application.parse_command("Alice posts") == ["1"], (
+        "Registered commands should be dispatched to their handler"
+    )
+    assert application.parse_command("Alice -> My posts are great") is None, (
+        "Existing commands should keep working"
+    )
+
+
+def test_application_execute_many():
+    """Checks that an application can execute a stream of commands."""
+    application = Application()
+    commands = iter(
+        [
+            "Alice -> I love the weather today!",
+            "",
+            "Bob follows Alice",
+            "Bob -> Damn! We lost!",
+            "Bob follows Alice",
+            "Alice",
+        ]
+    )
+
+    with pytest.raises(ValueError, match="User Bob does not exist"):
+        list(application.execute_many(commands))
+
+    errors = []
+    results = list(
+        application.execute_many(
+            commands, on_error=lambda command, error: errors.append(command)
+        )
+    )
+    assert results == [["I love the weather today! (just now)"]], (
+        "Only the outputs of the remaining commands should be yielded"
+    )
+    assert errors == [], "Valid commands should not be reported as errors"
+
+
+def test_application_replay():
+    """Checks that a command log can be replayed into a buffered output."""
+    lines = io.StringIO(
+        "Alice -> I love the weather today!\n"
+        "Charlie follows Alice\n"
+        "Charlie -> Hi!\n"
+        "Charlie follows Alice\n"
+        "Charlie wall\n"
+        "exit\n"
+        "Alice\n"
+    )
+    out = io.StringIO()
+    replay(Application(), lines, out, batch_size=1)
+
+    assert out.getvalue() == (
+        "User Charlie does not exist\n"
+        "Charlie - Hi! (just now)\n"
+        "Alice - I love the weather today! (just now)\n"
+    ), "Outputs and errors should be written in order until the exit command"
+
+
+def test_application_parse_command_pages():
+    """Checks that an application can read timelines and walls a page at a time."""
+    application = Application()
+    now = datetime(2024, 1, 1, 12)
+    with freeze_time(now) as frozen:
+        for i in range(3):
+            application.parse_command(f"Alice -> post {i}")
+            frozen.tick(60)
+
+        first = application.parse_command("Alice timeline limit=2")
+        assert first[:2] == ["post 2 (1 minute ago)", "post 1 (2 minutes ago)"], (
+            "The first page should contain the newest posts"
+        )
+        assert first[2].startswith("(more: cursor="), "A cursor should follow the page"
+
+        cursor = first[2].removeprefix("(more: cursor=").removesuffix(")")
+        assert application.parse_command(f"Alice wall limit=2 cursor={cursor}") == [
+            "Alice - post 0 (3 minutes ago)"
+        ], "The cursor should resume after the first page"
+        assert application.parse_command("Alice wall since=2024-01-01T12:01") == [
+            "Alice - post 2 (1 minute ago)",
+            "Alice - post 1 (2 minutes ago)",
+        ], "Walls should be filtered by time"
+
+        local = datetime(2024, 1, 1, 12, 1, tzinfo=UTC).astimezone()
+        assert application.parse_command(
+            "Alice wall since=2024-01-01T12:01Z"
+        ) == application.parse_command(
+            f"Alice wall since={local.replace(tzinfo=None).isoformat()}"
+        ), "Timestamps with a time zone should be converted to local time"
+
+        for option in ["limit=x", "limit=0", "limit=-1", "until=yesterday"]:
+            with pytest.raises(ValueError, match=f"Invalid page option: {option}"):
+                application.parse_command(f"Alice wall {option}")
+        for cursor in ["é", "AAAA", "!!!!"]:
+            with pytest.raises(ValueError, match=f"Invalid cursor: {cursor}"):
+                application.parse_command(f"Alice wall cursor={cursor}")
+
+
+def test_application_parse_command_search():
+    """Checks that an application can search the posts of everyone or a user."""
+    application = Application()
+    with freeze_time(datetime(2024, 1, 1, 12)) as frozen:
+        application.parse_command("Alice -> I love the weather today")
+        frozen.tick(60)
+        application.parse_command("Bob -> Damn! We lost!")
+        frozen.tick(60)
+
+        assert application.parse_command("search we*") == [
+            "Bob - Damn! We lost! (1 minute ago)",
+            "Alice - I love the weather today (2 minutes ago)",
+        ], "Searches should return the newest matches first"
+        assert application.parse_command("Alice search we*") == [
+            "Alice - I love the weather today (2 minutes ago)"
+        ], "Searches should be filtered by user"
+        assert application.parse_command("search weather lost") == [], (
+            "Every term of a search should match"
+        )
+
+        with pytest.raises(ValueError, match="Invalid search command"):
+            application.parse_command("search")
@@ -0,0 +1,146 @@
+"""This module provides tests for the CommandServer class."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from src.sr_sw_dev.server import CommandClient, CommandServer
+from src.sr_sw_dev.social_networking import Application
+
+
+async def _connect(server: CommandServer) -> tuple[CommandClient, int]:
+    """Starts a server on a free port and connects a client to it."""
+    listener = await server.start()
+    port = listener.sockets[0].getsockname()[1]
+    return await CommandClient.connect(port=port), port
+
+
+def test_command_server_request():
+    """Checks that commands are executed and answered."""
+
+    async def scenario():
+        server = CommandServer(Application())
+        client, _ = await _connect(server)
+
+        assert await client.request("Alice -> I love the weather today") == [], (
+            "Posting should return an empty result"
+        )
+        assert await client.request("Alice") == [
+            "I love the weather today (just now)"
+        ], "Reading should return the timeline"
+        with pytest.raises(ValueError, match="Invalid user: Bob"):
+            await client.request("Bob")
+
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_command_server_pipelining():
+    """Checks that pipelined commands are answered in order."""
+
+    async def scenario():
+        server = CommandServer(Application(), max_pipeline=2)
+        client, _ = await _connect(server)
+
+        client.send([f"user{i} -> post {i}" for i in range(100)])
+        client.send([f"user{i}" for i in range(100)])
+        for _ in range(100):
+            assert await client.receive() == [], "Posts should be answered first"
+        for i in range(100):
+            assert await client.receive() == [f"post {i} (just now)"], (
+                "Timelines should be answered in the order they were requested"
+            )
+
+        assert server.n_requests == 200, "Every command should be executed once"
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_command_server_connection_limit():
+    """Checks that clients beyond the connection limit are turned away."""
+
+    async def scenario():
+        server = CommandServer(Application(), max_connections=1)
+        client, port = await _connect(server)
+        await client.request("Alice -> Hello")
+
+        rejected = await CommandClient.connect(port=port)
+        with pytest.raises(ValueError, match="Too many connections"):
+            await rejected.receive()
+
+        await rejected.close()
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_command_server_unexpected_error(monkeypatch: pytest.MonkeyPatch):
+    """Checks that a command failing unexpectedly does not close the connection."""
+
+    async def scenario():
+        application = Application()
+        server = CommandServer(application)
+        client, _ = await _connect(server)
+
+        def fail(_command: str):
+            raise KeyError("boom")
+
+        parse_command = application.parse_command
+        monkeypatch.setattr(application, "parse_command", fail)
+        with pytest.raises(ValueError, match="Internal error"):
+            await client.request("Alice")
+        monkeypatch.setattr(application, "parse_command", parse_command)
+        assert await client.request("Alice -> Hello") == [], (
+            "The connection should keep serving commands"
+        )
+
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_command_server_receive_cancelled():
+    """Checks that reading stops when cancelled with a full pipeline."""
+
+    async def scenario():
+        server = CommandServer(Application())
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"Alice -> Hello\nAlice -> Bye\n")
+        commands = asyncio.Queue(1)
+        receiving = asyncio.create_task(server._receive(reader, commands))
+        while not commands.full():
+            await asyncio.sleep(0)
+
+        # The client disconnected, so nothing consumes the queue anymore
+        receiving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(receiving, 1)
+
+    asyncio.run(scenario())
+
+
+def test_command_server_unix_socket(tmp_path: Path):
+    """Checks that the server can listen on a Unix socket."""
+
+    async def scenario():
+        server = CommandServer(Application())
+        path = tmp_path / "social_networking.sock"
+        await server.start(path=path)
+        client = await CommandClient.connect(path=path)
+
+        await client.request("Alice -> Hello")
+        assert await client.request("Alice wall") == ["Alice - Hello (just now)"], (
+            "Walls should be served over Unix sockets"
+        )
+
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+"""This module provides tests for the ConcurrentSocialNetwork class."""
+
+from pathlib import Path
+import random
+import sys
+import threading
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.concurrency import ConcurrentSocialNetwork, LockStripes
+from src.sr_sw_dev.persistence import Persistence
+from src.sr_sw_dev.store import PostStore
+from src.sr_sw_dev.walls import FanoutWalls
+
+N_THREADS = 8
+N_STEPS = 400
+
+
+def _stress(social_network: ConcurrentSocialNetwork, names: list[str]) -> list[str]:
+    """Runs random reads and writes from several threads, returning any errors."""
+    errors = []
+
+    def work(seed: int):
+        rng = random.Random(seed)  # noqa: S311
+        try:
+            for step in range(N_STEPS):
+                name, other, action = rng.choice(names), rng.choice(names), rng.random()
+                if action < 0.1:
+                    social_network.follows(name, other)
+                elif action < 0.15:
+                    social_network.unfollows(name, other)
+                elif action < 0.5:
+                    social_network.add_post(name, f"post {seed}-{step}")
+                else:
+                    wall = list(social_network.users[name].iter_wall(10))
+                    timestamps = [entry.post.timestamp for entry in wall]
+                    if timestamps != sorted(timestamps, reverse=True):
+                        errors.append(f"{name}'s wall is not sorted newest-first")
+                    social_network.get_user_wall(name, rng.choice([None, 5]))
+                    social_network.get_user_timeline(name)
+        except Exception as error:
+            errors.append(repr(error))
+
+    # Switch threads as often as possible to interleave the operations
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(target=work, args=(seed,)) for seed in range(N_THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    return errors
+
+
+def test_lock_stripes():
+    """Checks that several stripes can be held at once without duplicates."""
+    stripes = LockStripes(n_stripes=1)
+    with stripes.hold("Alice", "Bob"):
+        assert stripes.locks[0].locked(), "The shared stripe should be held"
+    assert not stripes.locks[0].locked(), "The stripe should be released"
+
+
+def test_concurrent_social_network_stress(tmp_path: Path):
+    """Checks that concurrent reads and writes leave the network consistent."""
+    names = [f"user{i}" for i in range(16)]
+    social_network = ConcurrentSocialNetwork(
+        fanout=FanoutWalls(capacity=8, celebrity_threshold=6),
+        persistence=Persistence(tmp_path / "data", snapshot_interval=200),
+        store=PostStore(tmp_path / "segments", hot_size=64, segment_size=64),
+        cache=RenderCache(capacity=32),
+    )
+    for name in names:
+        social_network.add_user(name)
+
+    errors = _stress(social_network, names)
+    assert not errors, f"Concurrent operations should not fail: {errors[:3]}"
+
+    users = social_network.users.values()
+    n_posts = social_network.store.count_posts()
+    assert n_posts == sum(user.count_posts() for user in users), (
+        "Every post should belong to exactly one timeline"
+    )
+    assert social_network.store.segments, "Some posts should have been sealed"
+    for user in users:
+        contents = [post.get_content() for post in user.posts]
+        assert len(contents) == len(set(contents)), "Posts should not be duplicated"
+        for followee in user.following.values():
+            assert user.name in followee.followers, "Follows should be symmetric"
+
+        wall = list(user.iter_wall())
+        buffered = social_network.fanout.read(user)
+        if buffered is not None:
+            assert buffered == wall, f"{user.name}'s wall buffer should be up to date"
+
+    for (kind, name, *_), view in list(social_network.cache.views.items()):
+        user = social_network.users[name]
+        if kind == "wall":
+            expected = [
+                f"{author} - {post.content}" for author, post in user.iter_wall()
+            ]
+        else:
+            expected = [post.content for post in user.get_posts()]
+        assert view.prefixes[: len(expected)] == expected[: len(view.prefixes)], (
+            f"{name}'s cached {kind} should not be stale"
+        )
+
+    social_network.persistence.close()
+    assert social_network.persistence.generation > 0, "Snapshots should be written"
+    recovered = ConcurrentSocialNetwork(persistence=Persistence(tmp_path / "data"))
+    assert recovered.store.count_posts() == n_posts, "All posts should be recovered"
+    for user in users:
+        assert recovered.get_following(user.name) == list(user.following), (
+            f"{user.name}'s followees should be recovered"
+        )
+    recovered.persistence.close()
+    social_network.store.close()
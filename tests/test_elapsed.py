@@ -0,0 +1,78 @@
+"""This module provides tests for the formatting of elapsed times."""
+
+from datetime import datetime, timedelta
+import random
+
+from dateutil.relativedelta import relativedelta
+
+from src.sr_sw_dev.elapsed import (
+    format_elapsed_nanoseconds,
+    format_elapsed_time,
+    format_elapsed_times,
+)
+from src.sr_sw_dev.store import to_nanoseconds
+
+
+def _reference_elapsed_time(timestamp: datetime, now: datetime) -> str:
+    """Formats an elapsed time with one relativedelta, as posts used to do."""
+    delta = relativedelta(now.replace(microsecond=0), timestamp.replace(microsecond=0))
+    for unit in ("years", "months", "days", "hours", "minutes", "seconds"):
+        count = getattr(delta, unit)
+        if count > 0:
+            return f"{count} {unit[:-1]}{'s' if count != 1 else ''} ago"
+
+    return "just now"
+
+
+def test_format_elapsed_time():
+    """Checks that the most meaningful time unit is shown."""
+    now = datetime(2025, 5, 24, 9, 0, 0)
+    assert format_elapsed_time(now, now) == "just now"
+    assert format_elapsed_time(now - timedelta(seconds=1), now) == "1 second ago"
+    assert format_elapsed_time(now - timedelta(minutes=5, seconds=3), now) == (
+        "5 minutes ago"
+    )
+    assert format_elapsed_time(now - timedelta(days=27, hours=23), now) == (
+        "27 days ago"
+    )
+    assert format_elapsed_time(now - relativedelta(months=1), now) == "1 month ago"
+    assert format_elapsed_time(now + timedelta(minutes=1), now) == "just now", (
+        "Timestamps in the future should be shown as just now"
+    )
+
+
+def test_format_elapsed_times_matches_relativedelta():
+    """Checks that batch formatting matches a relativedelta per timestamp."""
+    rng = random.Random(42)  # noqa: S311
+    for now in (
+        datetime(2025, 3, 1, 0, 0, 0),
+        datetime(2025, 3, 31, 12, 30, 15, 500_000),
+        datetime(2024, 2, 29, 23, 59, 59),
+    ):
+        timestamps = [
+            now - timedelta(seconds=rng.randrange(-60, 3 * 365 * 24 * 3600))
+            for _ in range(5000)
+        ]
+        timestamps.extend(now - timedelta(days=days) for days in range(25, 35))
+
+        expected = [_reference_elapsed_time(ts, now) for ts in timestamps]
+        assert format_elapsed_times(timestamps, now) == expected, (
+            "Batch formatting should match relativedelta for every timestamp"
+        )
+
+
+def test_format_elapsed_nanoseconds_matches_relativedelta():
+    """Checks that epoch timestamps are formatted like datetimes."""
+    rng = random.Random(7)  # noqa: S311
+    now = datetime(2025, 3, 31, 12, 30, 15, 500_000)
+    timestamps = [
+        now
+        - timedelta(microseconds=rng.randrange(-(10**8), 3 * 365 * 24 * 3600 * 10**6))
+        for _ in range(5000)
+    ]
+
+    expected = [_reference_elapsed_time(ts, now) for ts in timestamps]
+    assert (
+        format_elapsed_nanoseconds([to_nanoseconds(ts) for ts in timestamps], now)
+        == expected
+    ), "Epoch timestamps should be truncated to whole seconds like datetimes"
@@ -0,0 +1,122 @@
+"""This module provides tests for the FanoutWalls class."""
+
+from datetime import datetime, timedelta
+import random
+import threading
+
+from freezegun import freeze_time
+
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.walls import FanoutWalls
+
+
+def _replay(
+    social_networks: list[SocialNetwork], seed: int, tick: bool
+) -> tuple[list[str], datetime]:
+    """Applies the same random sequence of operations to the social networks."""
+    rng = random.Random(seed)  # noqa: S311
+    names = [f"user{i}" for i in range(12)]
+    for social_network in social_networks:
+        for name in names:
+            social_network.add_user(name)
+
+    now = datetime.now()
+    for step in range(300):
+        name = rng.choice(names)
+        with freeze_time(now + timedelta(seconds=step if tick else 0)):
+            following, action = rng.choice(names), rng.random()
+            if action < 0.1:
+                for social_network in social_networks:
+                    social_network.follows(name, following)
+            elif action < 0.13:
+                for social_network in social_networks:
+                    social_network.unfollows(name, following)
+            else:
+                for social_network in social_networks:
+                    social_network.add_post(name, f"post {step}")
+
+    return names, now + timedelta(seconds=300)
+
+
+def test_fanout_walls_match_pull_walls():
+    """Checks that materialized walls match the walls merged on read."""
+    for tick in (True, False):
+        pull = SocialNetwork()
+        push = SocialNetwork(fanout=FanoutWalls(capacity=16, celebrity_threshold=4))
+        names, now = _replay([pull, push], seed=42, tick=tick)
+
+        assert push.fanout.celebrities, "Some authors should be pulled on read"
+        assert push.fanout.truncated, "Some wall buffers should have dropped posts"
+
+        with freeze_time(now):
+            for name in names:
+                for limit in (None, 1, 10, 16, 50):
+                    assert push.get_user_wall(name, limit) == pull.get_user_wall(
+                        name, limit
+                    ), f"Wall of {name} should not depend on the fan-out mode"
+
+                before = now - timedelta(seconds=150)
+                assert push.get_user_wall(name, 5, before) == pull.get_user_wall(
+                    name, 5, before
+                ), f"Older pages of {name}'s wall should not depend on the mode"
+
+
+def test_fanout_walls_push():
+    """Checks that posts are pushed to the walls of the followers."""
+    social_network = SocialNetwork(fanout=FanoutWalls(capacity=2))
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    social_network.follows("Bob", "Alice")
+
+    now = datetime.now()
+    for seconds in range(3):
+        with freeze_time(now + timedelta(seconds=seconds)):
+            social_network.add_post("Alice", f"post {seconds}")
+
+    buffer = social_network.fanout.buffers["Bob"]
+    assert [post.get_content() for _, post in buffer] == ["post 2", "post 1"], (
+        "Bob's wall buffer should only keep Alice's newest posts"
+    )
+    assert "Bob" in social_network.fanout.truncated, "Bob's wall should be truncated"
+
+    with freeze_time(now + timedelta(seconds=3)):
+        wall = social_network.get_user_wall("Bob")
+    assert wall == [
+        "Alice - post 2 (1 second ago)",
+        "Alice - post 1 (2 seconds ago)",
+        "Alice - post 0 (3 seconds ago)",
+    ], "Reads past the wall buffer should fall back to the timelines"
+
+
+def test_fanout_walls_read_during_push():
+    """Checks that reads only wait for pushes into their own wall buffer."""
+    fanout = FanoutWalls()
+    social_network = SocialNetwork(fanout=fanout)
+    for name in ["Alice", "Bob", "Charlie"]:
+        social_network.add_user(name)
+    social_network.follows("Bob", "Alice")
+    social_network.follows("Charlie", "Alice")
+
+    # Stall the fan-out of Alice's post at Charlie's wall buffer
+    with fanout._locks["Charlie"]:
+        pushing = threading.Thread(
+            target=social_network.add_post, args=("Alice", "Hello")
+        )
+        pushing.start()
+        for name in ["Alice", "Bob"]:
+            reading = threading.Thread(
+                target=fanout.read, args=(social_network.users[name],)
+            )
+            reading.start()
+            reading.join(timeout=5)
+            assert not reading.is_alive(), (
+                f"Reading {name}'s wall should not wait for the whole fan-out"
+            )
+        assert pushing.is_alive(), "The fan-out should wait for Charlie's buffer"
+    pushing.join()
+
+    for name in ["Alice", "Bob", "Charlie"]:
+        wall = fanout.read(social_network.users[name])
+        assert [post.get_content() for _, post in wall] == ["Hello"], (
+            f"The post should be pushed to {name}'s wall"
+        )
@@ -0,0 +1,172 @@
+"""This module provides tests for the FollowGraph class."""
+
+from array import array
+from collections import Counter
+import random
+
+import pytest
+
+from src.sr_sw_dev.social_networking import SUGGESTION_STALENESS, SocialNetwork
+
+
+@pytest.fixture
+def social_network() -> SocialNetwork:
+    """Returns a social network of five users and seven follow edges."""
+    social_network = SocialNetwork()
+    for name in ["Alice", "Bob", "Charlie", "Dan", "Eve"]:
+        social_network.add_user(name)
+    for name, following in [
+        ("Alice", "Charlie"),
+        ("Alice", "Bob"),
+        ("Bob", "Dan"),
+        ("Bob", "Eve"),
+        ("Charlie", "Eve"),
+        ("Charlie", "Alice"),
+        ("Dan", "Alice"),
+    ]:
+        social_network.follows(name, following)
+
+    return social_network
+
+
+def test_follow_graph_csr(social_network: SocialNetwork):
+    """Checks that the follow graph is exported in CSR form."""
+    assert [social_network.get_user_id(name) for name in ["Alice", "Eve"]] == [
+        0,
+        4,
+    ], "Users should be numbered in the order they were added"
+
+    graph = social_network.get_follow_graph()
+    assert graph.names == ["Alice", "Bob", "Charlie", "Dan", "Eve"], (
+        "The names should be indexed by id"
+    )
+    assert graph.indptr == array("q", [0, 2, 4, 6, 7, 7]), (
+        "The row offsets should count the followees of each user"
+    )
+    assert graph.indices == array("q", [1, 2, 3, 4, 0, 4, 0]), (
+        "Each row should list the sorted ids of the followees"
+    )
+    assert graph.count_users() == 5, "Every user should be in the graph"
+    assert graph.count_follows() == social_network.count_follows(), (
+        "Every follow edge should be in the graph"
+    )
+    assert list(graph.get_following(2)) == [0, 4], "Charlie should follow Alice and Eve"
+
+
+def test_suggest_follows(social_network: SocialNetwork):
+    """Checks that the followees of one's followees are suggested."""
+    assert social_network.suggest_follows("Alice") == ["Eve", "Dan"], (
+        "Eve is followed by two of Alice's followees, Dan by one"
+    )
+    assert social_network.suggest_follows("Alice", k=1) == ["Eve"], (
+        "Only the best suggestions should be returned"
+    )
+    assert social_network.suggest_follows("Dan") == ["Bob", "Charlie"], (
+        "Ties should be broken by the oldest user first"
+    )
+    assert social_network.suggest_follows("Eve") == [], (
+        "A user following nobody should get no suggestions"
+    )
+
+
+def test_suggest_follows_random():
+    """Checks the suggestions of a random graph against a direct count."""
+    rng = random.Random(3)  # noqa: S311
+    names = [f"user{i}" for i in range(50)]
+    social_network = SocialNetwork()
+    for name in names:
+        social_network.add_user(name)
+    for _ in range(400):
+        social_network.follows(rng.choice(names), rng.choice(names))
+
+    for name in names:
+        following = social_network.get_following(name)
+        counts = Counter(
+            candidate
+            for followee in following
+            for candidate in social_network.get_following(followee)
+            if candidate != name and candidate not in following
+        )
+        expected = sorted(
+            counts, key=lambda candidate: (-counts[candidate], names.index(candidate))
+        )
+        assert social_network.suggest_follows(name, k=5) == expected[:5], (
+            f"The suggestions for {name} should match a direct count"
+        )
+
+
+def test_follow_graph_snapshot(social_network: SocialNetwork):
+    """Checks that the snapshot is only exported again after a change."""
+    graph = social_network.get_follow_graph()
+    social_network.follows("Alice", "Bob")
+    social_network.unfollows("Eve", "Alice")
+    assert social_network.get_follow_graph() is graph, (
+        "No-op follows should keep the snapshot"
+    )
+
+    social_network.follows("Alice", "Eve")
+    assert social_network.suggest_follows("Alice") == ["Dan"], (
+        "The snapshot should be exported again after a follow"
+    )
+    social_network.add_user("Frank")
+    social_network.follows("Frank", "Alice")
+    assert social_network.suggest_follows("Frank") == ["Bob", "Charlie", "Eve"], (
+        "New users should be in the graph"
+    )
+    assert graph.count_users() == 5, "Older snapshots should not change"
+
+
+def test_suggest_follows_stale_graph():
+    """Checks that suggestions only export the graph once enough edges changed."""
+    names = [f"user{i}" for i in range(20)]
+    social_network = SocialNetwork()
+    for name in names:
+        social_network.add_user(name)
+    for i, name in enumerate(names):
+        for j in range(1, 9):
+            social_network.follows(name, names[(i + j) % len(names)])
+    graph = social_network.get_follow_graph()
+    max_changes = int(graph.count_follows() * SUGGESTION_STALENESS)
+
+    assert "user9" in social_network.suggest_follows("user0"), (
+        "user9 is followed by user0's followees"
+    )
+    social_network.follows("user0", "user9")
+    social_network.add_user("Zoe")
+    social_network.follows("Zoe", "user0")
+    assert "user9" not in social_network.suggest_follows("user0"), (
+        "Users followed since the snapshot should not be suggested"
+    )
+    assert social_network.suggest_follows("Zoe", k=3) == ["user1", "user2", "user3"], (
+        "Users added since the snapshot should get suggestions"
+    )
+    assert social_network.get_follow_graph(max_changes) is graph, (
+        "The snapshot should be kept until enough edges changed"
+    )
+
+    for name in names[1 : max_changes + 1]:
+        social_network.unfollows(name, names[(names.index(name) + 1) % len(names)])
+    social_network.suggest_follows("user0")
+    assert social_network.get_follow_graph(max_changes) is not graph, (
+        "The snapshot should be exported again once enough edges changed"
+    )
+
+
+def test_suggest_follows_errors(social_network: SocialNetwork):
+    """Checks that invalid suggestions are refused."""
+    with pytest.raises(ValueError, match="User Zoe does not exist"):
+        social_network.suggest_follows("Zoe")
+    with pytest.raises(ValueError, match="must be positive"):
+        social_network.suggest_follows("Alice", k=0)
+    with pytest.raises(ValueError, match="User Zoe does not exist"):
+        social_network.get_user_id("Zoe")
+
+
+def test_follow_graph_to_numpy(social_network: SocialNetwork):
+    """Checks that the columns convert to NumPy arrays without copying."""
+    np = pytest.importorskip("numpy")
+    graph = social_network.get_follow_graph()
+    indptr, indices = graph.to_numpy()
+    assert indptr.dtype == np.int64, "Offsets should be 64-bit integers"
+    assert indices.tolist() == list(graph.indices), "The ids should match"
+    assert not indices.flags.owndata, "The arrays should share the columns"
@@ -0,0 +1,134 @@
+"""This module provides tests for the InvertedIndex class."""
+
+from datetime import datetime
+from pathlib import Path
+import random
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev.persistence import Persistence
+from src.sr_sw_dev.search import InvertedIndex, parse_query, scan, tokenize
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.store import PostStore
+
+WORDS = ["weather", "weekend", "we", "lost", "love", "coffee", "code", "today"]
+
+
+def test_parse_query():
+    """Checks that queries are split into lowercase terms and prefixes."""
+    assert tokenize("Hello, hello World!") == ["hello", "world"], (
+        "Tokens should be distinct lowercase words"
+    )
+    assert parse_query("Weath* today weath*") == [("weath", True), ("today", False)], (
+        "Words ending with a star should be prefixes, and repeats dropped"
+    )
+    with pytest.raises(ValueError, match="Invalid search query"):
+        parse_query("  *!  ")
+
+
+def test_inverted_index_search():
+    """Checks that AND and prefix queries return the newest matches first."""
+    index = InvertedIndex()
+    for post_id, content in enumerate(
+        [
+            "I love the weather today",
+            "Damn! We lost!",
+            "Good game though.",
+            "The weekend weather looks great",
+        ]
+    ):
+        index.add(post_id, content)
+
+    assert list(index.search("weather")) == [3, 0], "Matches should be newest-first"
+    assert list(index.search("WEATHER today")) == [0], "Terms should be ANDed"
+    assert list(index.search("we*")) == [3, 1, 0], "Prefixes should match any term"
+    assert list(index.search("we* the")) == [3, 0], "Prefixes should be ANDed too"
+    assert list(index.search("rain")) == [], "Unknown terms should match nothing"
+
+    index.add(4, "weekday")
+    assert next(index.search("weekd*")) == 4, "New terms should be found by prefix"
+
+    # Concurrent writers may index posts slightly out of order
+    index.add(2, "Good weather though.")
+    assert index.postings["weather"].tolist() == [0, 2, 3], (
+        "Posting lists should stay sorted"
+    )
+
+
+def test_inverted_index_remove():
+    """Checks that removed posts are no longer found, and their terms dropped."""
+    index = InvertedIndex()
+    posts = ["we love the weather", "weekend", "the weather", "we lost"]
+    for post_id, content in enumerate(posts):
+        index.add(post_id, content)
+    assert list(index.search("week*")) == [1], "Prefixes should be sorted in"
+
+    index.remove([(0, posts[0]), (1, posts[1])], batch_size=2)
+    assert list(index.search("weather")) == [2], "Removed posts should not be found"
+    assert list(index.search("we*")) == [3, 2], "Removed posts should not be found"
+    assert "weekend" not in index.postings, "Emptied terms should be dropped"
+    assert "weekend" not in index.terms, "Emptied terms should leave the vocabulary"
+
+
+def test_inverted_index_matches_scan():
+    """Checks that the index returns the same posts as a linear scan."""
+    rng = random.Random(7)  # noqa: S311
+    store, index = PostStore(), InvertedIndex()
+    author_id = store.intern("Alice")
+    for _ in range(500):
+        content = " ".join(rng.choices(WORDS, k=rng.randint(1, 5)))
+        index.add(store.append(author_id, content, 0), content)
+
+    for query in ["weather", "we", "we*", "lo* today", "co* we* love", "x*"]:
+        assert list(index.search(query)) == list(scan(store, query)), (
+            f"The index and the scan should agree on {query!r}"
+        )
+
+
+def test_social_network_search(tmp_path: Path):
+    """Checks that a social network searches posts with and without an index."""
+    social_networks = [SocialNetwork(), SocialNetwork(index=InvertedIndex())]
+    now = datetime(2024, 1, 1, 12)
+    with freeze_time(now) as frozen:
+        for social_network in social_networks:
+            social_network.add_user("Alice")
+            social_network.add_user("Bob")
+            social_network.add_post("Alice", "I love the weather today")
+        frozen.tick(60)
+        for social_network in social_networks:
+            social_network.add_post("Bob", "Damn! We lost!")
+        frozen.tick(60)
+
+        for social_network in social_networks:
+            assert social_network.search("we*") == [
+                "Bob - Damn! We lost! (1 minute ago)",
+                "Alice - I love the weather today (2 minutes ago)",
+            ], "Search results should be rendered like a wall"
+            assert social_network.search("we*", limit=1) == [
+                "Bob - Damn! We lost! (1 minute ago)"
+            ], "Search results should be limited"
+            assert social_network.search("we*", author="Alice") == [
+                "Alice - I love the weather today (2 minutes ago)"
+            ], "Search results should be filtered by author"
+            with pytest.raises(ValueError, match="User Carol does not exist"):
+                social_network.search("we*", author="Carol")
+
+        persistence = Persistence(tmp_path)
+        social_network = SocialNetwork(persistence=persistence)
+        social_network.add_user("Alice")
+        social_network.add_post("Alice", "Recovered from the snapshot")
+        persistence.snapshot()
+        social_network.add_post("Alice", "Recovered from the log")
+        persistence.close()
+
+        persistence = Persistence(tmp_path)
+        recovered = SocialNetwork(persistence=persistence, index=InvertedIndex())
+        assert recovered.search("recovered") == [
+            "Alice - Recovered from the log (just now)",
+            "Alice - Recovered from the snapshot (just now)",
+        ], "Recovered posts should be indexed"
+        assert recovered.index.postings["recovered"].tolist() == [0, 1], (
+            "Posts should be indexed once"
+        )
+        persistence.close()
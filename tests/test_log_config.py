@@ -0,0 +1,201 @@
+"""This module provides tests for the logging configuration."""
+
+from collections.abc import Iterator
+import logging
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from src.sr_sw_dev import paths
+from src.sr_sw_dev.log_config import AsyncFileHandler, configure_logging
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+@pytest.fixture
+def restore_logging() -> Iterator[None]:
+    """Restores the root and application loggers after a test."""
+    loggers = [logging.getLogger(), logging.getLogger("src.sr_sw_dev")]
+    states = [
+        (logger.handlers[:], logger.level, logger.propagate) for logger in loggers
+    ]
+    yield
+    for logger, (handlers, level, propagate) in zip(loggers, states, strict=True):
+        for handler in logger.handlers:
+            if handler not in handlers:
+                handler.close()
+        logger.handlers[:] = handlers
+        logger.setLevel(level)
+        logger.propagate = propagate
+
+
+def test_import_has_no_logging_side_effects():
+    """Checks that importing the application does not configure logging."""
+    code = (
+        "import logging\n"
+        "import src.sr_sw_dev.social_networking\n"
+        "print(len(logging.getLogger().handlers))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=paths.root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "0", "Importing should not install log handlers"
+
+
+def test_import_defers_optional_modules():
+    """Checks that importing the application skips the modules it needs on demand."""
+    code = (
+        "import sys\n"
+        "import src.sr_sw_dev.social_networking\n"
+        "deferred = ['argparse', 'configparser', 'logging.config', 'dateutil',\n"
+        "    'src.sr_sw_dev.log_config', 'src.sr_sw_dev.metrics',\n"
+        "    'src.sr_sw_dev.persistence', 'src.sr_sw_dev.retention',\n"
+        "    'src.sr_sw_dev.search', 'src.sr_sw_dev.graph', 'src.sr_sw_dev.cache']\n"
+        "print(' '.join(name for name in deferred if name in sys.modules))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=paths.root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "", (
+        f"Importing should not import {result.stdout.strip()}"
+    )
+
+
+@pytest.mark.usefixtures("restore_logging")
+def test_configure_logging(tmp_path: Path):
+    """Checks that the logging configuration is applied on demand, once."""
+    log_dir = tmp_path / "logs"
+    configure_logging(log_dir=log_dir, force=True)
+
+    logging.getLogger("src.sr_sw_dev.social_networking").debug("Hello")
+    for handler in logging.getLogger("src.sr_sw_dev").handlers:
+        handler.flush()
+
+    log_file = log_dir / "social_networking.log"
+    assert log_file.exists(), "Log file should be created in the log directory"
+    assert "DEBUG - Hello" in log_file.read_text(), "Debug records should be logged"
+
+    n_handlers = len(logging.getLogger().handlers)
+    configure_logging(log_dir=log_dir)
+    assert len(logging.getLogger().handlers) == n_handlers, (
+        "Configuring logging twice should be a no-op"
+    )
+
+
+@pytest.mark.usefixtures("restore_logging")
+def test_configure_logging_emits_once(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    """Checks that every record is written once to the console and the file."""
+    log_dir = tmp_path / "logs"
+    configure_logging(log_dir=log_dir, force=True)
+
+    for name in ["src.sr_sw_dev.social_networking", "asyncio"]:
+        logging.getLogger(name).warning("Hello from %s", name)
+    for logger in [logging.getLogger(), logging.getLogger("src.sr_sw_dev")]:
+        for handler in logger.handlers:
+            handler.flush()
+
+    lines = (log_dir / "social_networking.log").read_text().splitlines()
+    console = capsys.readouterr().err.splitlines()
+    for name in ["src.sr_sw_dev.social_networking", "asyncio"]:
+        message = f"Hello from {name}"
+        assert sum(line.endswith(message) for line in lines) == 1, (
+            f"The records of {name} should be written once to the file"
+        )
+        assert console.count(message) == 1, (
+            f"The records of {name} should be written once to the console"
+        )
+
+
+@pytest.mark.usefixtures("restore_logging")
+def test_configure_logging_filters_debug(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Checks that filtered debug records never reach the file handler."""
+    configure_logging(log_dir=tmp_path / "logs", force=True)
+    emitted = []
+    monkeypatch.setattr(
+        AsyncFileHandler, "emit", lambda _, record: emitted.append(record)
+    )
+
+    logging.getLogger("src.sr_sw_dev").setLevel(logging.INFO)
+    social_network = SocialNetwork()
+    social_network.add_user("Alice")
+    social_network.add_post("Alice", "Hello")
+    assert emitted == [], "Filtered debug records should not be emitted"
+
+    logging.getLogger("src.sr_sw_dev").setLevel(logging.DEBUG)
+    social_network.add_post("Alice", "Bye")
+    assert emitted, "Debug records should be emitted once enabled"
+
+
+def test_async_file_handler_write_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Checks that every record of a batch that failed to be written is reported."""
+    handler = AsyncFileHandler(str(tmp_path / "async.log"), "w")
+    failed = []
+    monkeypatch.setattr(handler.sink, "handleError", failed.append)
+    handler.sink.stream.close()
+    handler.sink.stream = None
+
+    def fail() -> None:
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(handler.sink, "_open", fail)
+
+    records = [
+        logging.makeLogRecord({"msg": f"Record {i}", "levelno": logging.WARNING})
+        for i in range(3)
+    ]
+    try:
+        # Queued at once, so that they are written in one batch
+        for record in records:
+            handler.queue.put(record)
+        handler.flush()
+    finally:
+        handler.close()
+
+    assert failed == records, "Every record of the failed batch should be reported"
+
+
+def test_async_file_handler(tmp_path: Path):
+    """Checks that records are written by the background thread, in order."""
+    log_file = tmp_path / "async.log"
+    handler = AsyncFileHandler(str(log_file), "w", batch_size=8)
+    handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+
+    logger = logging.getLogger("test_async_file_handler")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(100):
+            logger.warning("Record %d", i)
+
+        try:
+            raise ValueError("Boom")
+        except ValueError:
+            logger.exception("Failed")
+
+        handler.flush()
+        lines = log_file.read_text().splitlines()
+        assert lines[:100] == [f"WARNING - Record {i}" for i in range(100)], (
+            "Records should be written in the order they were emitted"
+        )
+        assert lines[100] == "ERROR - Failed", "Exceptions should be logged"
+        assert lines[-1] == "ValueError: Boom", "Tracebacks should be logged"
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert not handler._thread.is_alive(), "Closing should stop the thread"
@@ -0,0 +1,91 @@
+"""This module provides tests for the Metrics class."""
+
+import json
+import threading
+
+import pytest
+
+from src.sr_sw_dev.metrics import Histogram, Metrics, SamplingProfiler
+from src.sr_sw_dev.social_networking import Application, SocialNetwork
+
+
+def test_histogram():
+    """Checks that latencies are bucketed by powers of two."""
+    histogram = Histogram()
+    for nanoseconds in [100] * 90 + [5000] * 9 + [1_000_000]:
+        histogram.observe(nanoseconds)
+
+    assert histogram.count == 100, "Every latency should be counted"
+    assert histogram.total == 90 * 100 + 9 * 5000 + 1_000_000, "Latencies should sum"
+    assert histogram.quantile(0.5) == 128, "The median should be bounded by 2**7"
+    assert histogram.quantile(0.99) == 8192, "The p99 should be bounded by 2**13"
+    assert histogram.quantile(1) == 1 << 20, "The maximum should be bounded too"
+    assert Histogram().quantile(0.5) == 0, "An empty histogram has no quantiles"
+
+
+def test_metrics_social_network():
+    """Checks that the operations of a social network are measured."""
+    assert "add_post" not in vars(SocialNetwork()), (
+        "A social network without metrics should not wrap its methods"
+    )
+
+    metrics = Metrics()
+    app = Application(SocialNetwork(metrics=metrics), metrics)
+    for command in ["Alice -> Hello", "Bob -> Hi", "Alice follows Bob", "Alice wall"]:
+        app.parse_command(command)
+    with pytest.raises(ValueError, match="User Carol does not exist"):
+        app.parse_command("Carol wall")
+
+    snapshot = metrics.snapshot()
+    operations = snapshot["operations"]
+    assert operations["add_user"]["calls"] == 2, "Users should be counted"
+    assert operations["add_post"]["calls"] == 2, "Posts should be counted"
+    assert operations["follows"]["calls"] == 1, "Follows should be counted"
+    assert operations["get_user_wall"]["calls"] == 2, "Wall reads should be counted"
+    assert operations["get_user_wall"]["errors"] == 1, "Errors should be counted"
+    assert operations["parse_command"]["calls"] == 5, "Commands should be counted"
+    assert operations["parse_command"]["p50"] > 0, "Latencies should be measured"
+    assert snapshot["gauges"] == {"users": 2, "posts": 2, "follows": 1}, (
+        "Gauges should reflect the social network"
+    )
+
+    assert json.loads(metrics.to_json()) == json.loads(json.dumps(snapshot)), (
+        "The JSON export should match the snapshot"
+    )
+    text = metrics.to_text().splitlines()
+    assert 'operation_seconds_count{operation="add_post"} 2' in text, (
+        "The text export should count the calls of each operation"
+    )
+    assert 'operation_seconds_bucket{operation="add_post",le="+Inf"} 2' in text, (
+        "The text export should end histograms with the +Inf bucket"
+    )
+    assert 'operation_errors_total{operation="get_user_wall"} 1' in text, (
+        "The text export should count errors"
+    )
+    assert "follows 1" in text, "The text export should include the gauges"
+
+
+def test_sampling_profiler():
+    """Checks that the profiler samples the stacks of the other threads."""
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    thread = threading.Thread(target=spin)
+    thread.start()
+    try:
+        with SamplingProfiler(interval=0.001) as profiler:
+            for _ in range(500):
+                if any("spin" in stack for stack in profiler.stacks):
+                    break
+                stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert any(
+        line.startswith("threading:Thread._bootstrap") and "spin" in line
+        for line in profiler.report()
+    ), "Stacks should be collapsed from the outermost frame"
@@ -0,0 +1,191 @@
+"""This module provides tests for the Persistence class."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import signal
+import subprocess
+import sys
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev import paths
+from src.sr_sw_dev.persistence import WAL_MAGIC, Persistence, WriteAheadLog
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.store import PostStore
+from src.sr_sw_dev.walls import FanoutWalls
+
+
+def _populate(social_network: SocialNetwork, now: datetime):
+    """Adds a few users, posts and follows to a social network."""
+    for name in ("Alice", "Bob", "Charlie"):
+        social_network.add_user(name)
+
+    with freeze_time(now - timedelta(minutes=5)):
+        social_network.add_post("Alice", "I love the weather today")
+    with freeze_time(now - timedelta(minutes=2)):
+        social_network.add_post("Bob", "Damn! We lost! ⚽")
+    with freeze_time(now - timedelta(seconds=15)):
+        social_network.add_post("Charlie", "I'm in New York today!")
+
+    social_network.follows("Charlie", "Alice")
+    social_network.follows("Charlie", "Bob")
+    social_network.unfollows("Charlie", "Bob")
+    social_network.follows("Alice", "Charlie")
+
+
+def _assert_same(recovered: SocialNetwork, original: SocialNetwork, now: datetime):
+    """Checks that a recovered social network matches the original one."""
+    assert list(recovered.users) == list(original.users), "Users should be recovered"
+    with freeze_time(now):
+        for name in original.users:
+            assert recovered.get_user_timeline(name) == original.get_user_timeline(
+                name
+            ), f"{name}'s timeline should be recovered"
+            assert recovered.get_user_wall(name) == original.get_user_wall(name), (
+                f"{name}'s wall should be recovered"
+            )
+            assert recovered.get_following(name) == original.get_following(name), (
+                f"{name}'s followees should be recovered"
+            )
+            assert recovered.get_followers(name) == original.get_followers(name), (
+                f"{name}'s followers should be recovered"
+            )
+
+
+def test_persistence_recover_from_log(tmp_path: Path):
+    """Checks that a social network is recovered by replaying its log."""
+    now = datetime.now().replace(microsecond=0)
+    persistence = Persistence(tmp_path, group_size=2)
+    original = SocialNetwork(persistence=persistence)
+    _populate(original, now)
+    persistence.close()
+
+    recovered = SocialNetwork(persistence=Persistence(tmp_path))
+    _assert_same(recovered, original, now)
+    recovered.persistence.close()
+
+
+def test_persistence_recover_from_snapshot(tmp_path: Path):
+    """Checks that a social network is recovered from a snapshot and log tail."""
+    now = datetime.now().replace(microsecond=0)
+    persistence = Persistence(tmp_path)
+    original = SocialNetwork(persistence=persistence)
+    _populate(original, now)
+    persistence.snapshot()
+    assert not persistence.wal_path(0).exists(), "Old log should be deleted"
+
+    original.add_user("Dave")
+    original.follows("Dave", "Alice")
+    persistence.close()
+
+    for fanout in (None, FanoutWalls(capacity=2, celebrity_threshold=2)):
+        recovered = SocialNetwork(fanout, Persistence(tmp_path))
+        assert recovered.persistence.generation == 1, "Snapshot should be loaded"
+        _assert_same(recovered, original, now)
+        recovered.persistence.close()
+
+
+def test_persistence_periodic_snapshots(tmp_path: Path):
+    """Checks that snapshots are written every `snapshot_interval` records."""
+    persistence = Persistence(tmp_path, snapshot_interval=4)
+    social_network = SocialNetwork(persistence=persistence)
+    for i in range(10):
+        social_network.add_user(f"user{i}")
+    persistence.close()
+
+    assert persistence.generation == 2, "Two snapshots should have been written"
+    recovered = SocialNetwork(persistence=Persistence(tmp_path))
+    assert recovered.count_users() == 10, "All users should be recovered"
+    recovered.persistence.close()
+
+
+def test_persistence_torn_tail(tmp_path: Path):
+    """Checks that a torn record at the end of the log is discarded."""
+    persistence = Persistence(tmp_path)
+    social_network = SocialNetwork(persistence=persistence)
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    persistence.close()
+
+    path = persistence.wal_path(0)
+    data = path.read_bytes()
+    path.write_bytes(data[:-2])
+    assert len(list(WriteAheadLog.replay(path))) == 1, "Torn record should be skipped"
+
+    recovered = SocialNetwork(persistence=Persistence(tmp_path))
+    assert recovered.has_user("Alice"), "Complete records should be recovered"
+    assert not recovered.has_user("Bob"), "Torn records should be discarded"
+
+    recovered.add_user("Charlie")
+    recovered.persistence.close()
+    assert [op for op, _ in WriteAheadLog.replay(path)] == [0, 0], (
+        "New records should be appended after the last complete record"
+    )
+    assert path.read_bytes().startswith(WAL_MAGIC), "Log should keep its header"
+
+
+def test_persistence_unsupported_version(tmp_path: Path):
+    """Checks that a log written in an older format is rejected, not discarded."""
+    path = tmp_path / "wal-0.log"
+    path.write_bytes(b"SNWAL001")
+    with pytest.raises(ValueError, match="Unsupported write-ahead log version"):
+        WriteAheadLog(path)
+
+    assert path.read_bytes() == b"SNWAL001", "The log should be left untouched"
+
+
+def test_persistence_tiered_store(tmp_path: Path):
+    """Checks that snapshots include the posts sealed into segments."""
+    now = datetime.now().replace(microsecond=0)
+    persistence = Persistence(tmp_path / "data")
+    original = SocialNetwork(
+        persistence=persistence,
+        store=PostStore(tmp_path / "segments", hot_size=1, segment_size=1),
+    )
+    _populate(original, now)
+    assert original.store.segments, "Some posts should have been sealed"
+    persistence.snapshot()
+    persistence.close()
+
+    recovered = SocialNetwork(persistence=Persistence(tmp_path / "data"))
+    assert not recovered.store.segments, "An untiered store should load all posts"
+    _assert_same(recovered, original, now)
+    recovered.persistence.close()
+    original.store.close()
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_persistence_acknowledged_commands_survive_kill(tmp_path: Path, batched: bool):
+    """Checks that a process killed after acknowledging commands recovers them."""
+    execute = (
+        "print(list(app.execute_many(['Alice', 'Alice -> Hi', 'Alice'])))\n"
+        if batched
+        else "print(app.parse_command('Alice -> Hi'))\n"
+    )
+    code = (
+        "import os, signal, sys\n"
+        "from src.sr_sw_dev.persistence import Persistence\n"
+        "from src.sr_sw_dev.social_networking import Application, SocialNetwork\n"
+        "app = Application(SocialNetwork(persistence=Persistence(sys.argv[1])))\n"
+        "app.parse_command('Alice -> Hello')\n"
+        f"{execute}"
+        "sys.stdout.flush()\n"
+        "os.kill(os.getpid(), signal.SIGKILL)\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code, str(tmp_path)],
+        cwd=paths.root,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == -signal.SIGKILL, "The process should be killed"
+    assert result.stdout, "The commands should have been acknowledged"
+
+    recovered = SocialNetwork(persistence=Persistence(tmp_path))
+    assert [post.split(" (")[0] for post in recovered.get_user_timeline("Alice")] == [
+        "Hi",
+        "Hello",
+    ], "Acknowledged commands should be recovered"
+    recovered.persistence.close()
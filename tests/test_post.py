@@ -28,9 +28,21 @@ def test_post_is_recent():
 
 def test_post_eq():
     """Checks that two posts are equal if they have the same content and timestamp."""
-    post1 = Post("I love the weather today!")
-    post2 = Post("I love the weather today!")
-    assert post1 == post2
+    with freeze_time(datetime(2024, 1, 1, 12)):
+        post1 = Post("I love the weather today!")
+        post2 = Post("I love the weather today!")
+    assert post1 == post2, "Posts made in the same instant should be equal"
+
+    timestamp = datetime(2024, 1, 1, 12, 0, 0, 250_000)
+    first = Post.restore("Hello", timestamp, seq=1)
+    second = Post.restore("Hello", timestamp.replace(microsecond=500_000), seq=2)
+    assert first != second, "Posts made in the same second should not be equal"
+    assert first < second, "The order should agree with equality"
+    assert not first >= second, "The order should agree with equality"
+    assert first.displays_like(second), "Both posts should be displayed alike"
+    assert first != Post.restore("Bye", timestamp, seq=1), (
+        "Posts with different contents should not be equal"
+    )
 
 
 def test_post_lt():
@@ -43,6 +55,21 @@ def test_post_lt():
         assert post1 < post2
 
 
+def test_post_order():
+    """Checks that posts from the same instant are ordered by sequence id."""
+    timestamp = datetime(2024, 1, 1, 12, 0, 0, 250_000)
+    first = Post.restore("first", timestamp, seq=1)
+    second = Post.restore("second", timestamp, seq=2)
+    assert first < second, "Ties should be broken by sequence id"
+    assert first.timestamp == timestamp, "Timestamps should keep their microseconds"
+
+    later = Post.restore("later", timestamp.replace(microsecond=500_000), seq=0)
+    assert second < later, "Timestamps should be compared before sequence ids"
+    assert sorted([later, second, first]) == [first, second, later], (
+        "Posts should sort by timestamp, then by sequence id"
+    )
+
+
 def test_post_str():
     """Checks that a post is converted to a string correctly."""
     post = Post("I love the weather today!")
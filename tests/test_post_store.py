@@ -0,0 +1,163 @@
+"""This module provides tests for the PostStore class."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.store import PostStore, from_nanoseconds, to_nanoseconds
+
+
+def test_post_store_init():
+    """Checks that a post store is initialized correctly."""
+    store = PostStore()
+    assert store.count_posts() == 0, "PostStore should start with no posts"
+    assert store.nbytes() == store.offsets.itemsize, "PostStore should be empty"
+
+
+def test_post_store_intern():
+    """Checks that author names are interned into dense ids."""
+    store = PostStore()
+    assert store.intern("Alice") == 0, "First author should get id 0"
+    assert store.intern("Bob") == 1, "Second author should get id 1"
+    assert store.intern("Alice") == 0, "Interning twice should return the same id"
+
+
+def test_post_store_append():
+    """Checks that posts can be appended to and read from the store."""
+    store = PostStore()
+    timestamp = datetime(2025, 5, 24, 8, 59, 53, 123456)
+    alice, bob = store.intern("Alice"), store.intern("Bob")
+
+    first = store.append(alice, "I love the weather today", to_nanoseconds(timestamp))
+    second = store.append(bob, "Damn! We lost! ⚽", to_nanoseconds(timestamp))
+
+    assert store.count_posts() == 2, "PostStore should hold two posts"
+    assert store.get_author(first) == "Alice", "Author should be Alice"
+    assert store.get_content(second) == "Damn! We lost! ⚽", (
+        "Non-ASCII content should round-trip through the arena"
+    )
+    assert store.get_timestamp(first) == timestamp, "Timestamp should round-trip"
+    assert from_nanoseconds(to_nanoseconds(timestamp)) == timestamp, (
+        "Epoch nanoseconds should round-trip"
+    )
+
+
+def test_post_store_shared_by_social_network():
+    """Checks that all the users of a social network share one post store."""
+    social_network = SocialNetwork()
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    social_network.add_post("Alice", "I love the weather today")
+    social_network.add_post("Bob", "Damn! We lost!")
+
+    assert social_network.store.count_posts() == 2, "Store should hold all posts"
+    assert list(social_network.users["Bob"].post_ids) == [1], (
+        "Users should only hold the row ids of their posts"
+    )
+
+
+def test_post_store_seal(tmp_path: Path):
+    """Checks that cold posts are sealed into segments and read back."""
+    store = PostStore(tmp_path, hot_size=4, segment_size=3)
+    alice = store.intern("Alice")
+    for i in range(12):
+        store.append(alice, f"post {i} ⚽", 1_000_000 + i)
+
+    assert len(store.segments) == 2, "Two segments should have been sealed"
+    assert store.base == 6, "Only the newest posts should stay in memory"
+    assert len(list(tmp_path.glob("*.seg"))) == 2, "Segments should be on disk"
+    assert store.count_posts() == 12, "Sealed posts should still be counted"
+    for i in range(12):
+        assert store.get_content(i) == f"post {i} ⚽", f"Content {i} should match"
+        assert store.get_nanoseconds(i) == 1_000_000 + i, f"Timestamp {i} should match"
+        assert store.get_author(i) == "Alice", f"Author {i} should match"
+
+    store.close()
+
+
+def test_post_store_drop():
+    """Checks that dropped posts are freed while the others keep their row ids."""
+    store = PostStore()
+    alice = store.intern("Alice")
+    for i in range(10):
+        store.append(alice, f"post {i} ⚽", 1_000_000 + i)
+    nbytes = store.nbytes()
+
+    assert store.drop([0, 3, 4, 9]) == (4, 4 * (20 + len("post 0 ⚽".encode()))), (
+        "The rows and content of the dropped posts should be freed"
+    )
+    assert store.drop([5]) == (1, 20 + len("post 5 ⚽".encode())), (
+        "Posts should be dropped from between sparse posts too"
+    )
+    assert store.append(alice, "post 10", 1_000_010) == 10, (
+        "Row ids should keep increasing after drops"
+    )
+    assert store.count_posts() == 11, "Dropped posts should still be counted"
+    assert store.count_stored_posts() == 6, "Dropped posts should not be stored"
+    assert store.nbytes() < nbytes, "Dropped posts should free memory"
+    assert list(store.iter_post_ids(reverse=True)) == [10, 8, 7, 6, 2, 1], (
+        "Only the stored posts should be iterated"
+    )
+    for i in [1, 2, 6, 7, 8]:
+        assert store.get_content(i) == f"post {i} ⚽", f"Content {i} should match"
+        assert store.get_nanoseconds(i) == 1_000_000 + i, f"Timestamp {i} should match"
+        assert store.get_author(i) == "Alice", f"Author {i} should match"
+    assert store.get_content(10) == "post 10", "New posts should be read back"
+    for i in [0, 5, 9, 11]:
+        with pytest.raises(IndexError):
+            store.get_content(i)
+
+
+def test_post_store_drop_segments(tmp_path: Path):
+    """Checks that segments are only deleted once all their posts are dropped."""
+    store = PostStore(tmp_path, hot_size=4, segment_size=3)
+    alice = store.intern("Alice")
+    for i in range(12):
+        store.append(alice, f"post {i}", 1_000_000 + i)
+
+    assert store.drop([0, 1, 3, 7]) == (0, 0), "No segment should be emptied yet"
+    n_posts, _ = store.drop([2, 4, 5])
+    assert n_posts == 6, "Both emptied segments should be deleted"
+    assert list(tmp_path.glob("*.seg")) == [], "Their files should be deleted"
+    assert store.get_content(6) == "post 6", "Posts kept should still be read"
+
+    for i in range(12, 15):
+        store.append(alice, f"post {i}", 1_000_000 + i)
+    n_posts, _ = store.drop([6, 8])
+    assert n_posts == 3, "Posts dropped while in memory should count once sealed"
+    store.close()
+
+
+def test_post_store_tiered_social_network(tmp_path: Path):
+    """Checks that timelines and walls do not depend on the storage tier."""
+    names = ("Alice", "Bob", "Charlie")
+    now = datetime.now().replace(microsecond=0)
+    memory = SocialNetwork()
+    tiered = SocialNetwork(store=PostStore(tmp_path, hot_size=5, segment_size=4))
+    for social_network in (memory, tiered):
+        for name in names:
+            social_network.add_user(name)
+        social_network.follows("Charlie", "Alice")
+        social_network.follows("Charlie", "Bob")
+        for i in range(30):
+            with freeze_time(now - timedelta(minutes=30 - i)):
+                social_network.add_post(names[i % 3], f"post {i}")
+
+    assert tiered.store.segments, "Some posts should have been sealed"
+    with freeze_time(now):
+        for name in names:
+            assert tiered.get_user_timeline(name) == memory.get_user_timeline(name), (
+                f"{name}'s timeline should not depend on the tier"
+            )
+            assert tiered.get_user_wall(name) == memory.get_user_wall(name), (
+                f"{name}'s wall should not depend on the tier"
+            )
+            before = now - timedelta(minutes=20)
+            assert tiered.get_user_wall(name, 3, before) == memory.get_user_wall(
+                name, 3, before
+            ), f"Older pages of {name}'s wall should not depend on the tier"
+
+    tiered.store.close()
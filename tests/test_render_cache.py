@@ -0,0 +1,96 @@
+"""This module provides tests for the RenderCache class."""
+
+from datetime import datetime, timedelta
+import random
+
+from freezegun import freeze_time
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.social_networking import SocialNetwork
+
+
+def test_render_cache_lru():
+    """Checks that the least recently used views are evicted first."""
+    cache = RenderCache(capacity=2)
+    now = datetime.now()
+    for name in ("Alice", "Bob"):
+        cache.put("wall", name, prefixes=[name], timestamps=[now])
+
+    assert cache.get("wall", "Alice") is not None, "Alice's wall should be cached"
+    cache.put("wall", "Charlie", prefixes=["Charlie"], timestamps=[now])
+
+    assert cache.get("wall", "Bob") is None, "Bob's wall should have been evicted"
+    assert cache.get("wall", "Alice") is not None, "Alice's wall should be kept"
+    assert cache.stats() == {
+        "size": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "invalidations": 0,
+    }, "Counters should track hits, misses and evictions"
+
+
+def test_render_cache_ttl():
+    """Checks that views expire after their time to live."""
+    cache = RenderCache(ttl=60)
+    with freeze_time(datetime.now()) as frozen_time:
+        cache.put("timeline", "Alice", prefixes=["Hello"], timestamps=[datetime.now()])
+        assert cache.get("timeline", "Alice") is not None, "View should be fresh"
+
+        frozen_time.tick(timedelta(seconds=61))
+        assert cache.get("timeline", "Alice") is None, "View should have expired"
+        assert cache.invalidations == 1, "Expired views should be counted"
+
+
+def test_render_cache_rerenders_labels():
+    """Checks that cache hits render fresh elapsed-time labels."""
+    social_network = SocialNetwork(cache=RenderCache())
+    social_network.add_user("Alice")
+    now = datetime.now()
+    with freeze_time(now):
+        social_network.add_post("Alice", "I love the weather today")
+        assert social_network.get_user_timeline("Alice") == [
+            "I love the weather today (just now)"
+        ], "First read should render the timeline"
+
+    with freeze_time(now + timedelta(minutes=5)):
+        assert social_network.get_user_timeline("Alice") == [
+            "I love the weather today (5 minutes ago)"
+        ], "Cache hits should update the elapsed time"
+
+    assert social_network.cache.hits == 1, "Second read should hit the cache"
+
+
+def test_render_cache_invalidation():
+    """Checks that cached views never differ from uncached reads."""
+    rng = random.Random(7)  # noqa: S311
+    names = [f"user{i}" for i in range(8)]
+    uncached, cached = SocialNetwork(), SocialNetwork(cache=RenderCache(capacity=6))
+    for social_network in (uncached, cached):
+        for name in names:
+            social_network.add_user(name)
+
+    now = datetime.now()
+    for step in range(400):
+        name, other, action = rng.choice(names), rng.choice(names), rng.random()
+        with freeze_time(now + timedelta(seconds=step)):
+            for social_network in (uncached, cached):
+                if action < 0.1:
+                    social_network.follows(name, other)
+                elif action < 0.15:
+                    social_network.unfollows(name, other)
+                elif action < 0.4:
+                    social_network.add_post(name, f"post {step}")
+
+            limit = rng.choice([None, 3])
+            assert cached.get_user_wall(name, limit) == uncached.get_user_wall(
+                name, limit
+            ), f"{name}'s cached wall should be up to date"
+            assert cached.get_user_timeline(name) == uncached.get_user_timeline(name), (
+                f"{name}'s cached timeline should be up to date"
+            )
+
+    stats = cached.cache.stats()
+    assert stats["hits"] > 0, "Some reads should hit the cache"
+    assert stats["evictions"] > 0, "Some views should have been evicted"
+    assert stats["invalidations"] > 0, "Some views should have been invalidated"
@@ -0,0 +1,346 @@
+"""This module provides tests for the Retention and Compactor classes."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import threading
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.concurrency import ConcurrentSocialNetwork
+from src.sr_sw_dev.persistence import Persistence
+from src.sr_sw_dev.retention import Compaction, Compactor, Retention
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.storage import SqliteBackend
+from src.sr_sw_dev.store import PostStore
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def test_retention_errors(tmp_path: Path):
+    """Checks that invalid retention policies are refused."""
+    with pytest.raises(ValueError, match="must be positive"):
+        Retention(max_posts=0)
+    with pytest.raises(ValueError, match="must be positive"):
+        Retention(max_age=timedelta(0))
+    with pytest.raises(ValueError, match="Ring buffers require"):
+        Retention(max_age=timedelta(days=1), ring=True)
+    with pytest.raises(ValueError, match="do not support"):
+        SocialNetwork(
+            retention=Retention(max_posts=1), persistence=Persistence(tmp_path)
+        )
+    with pytest.raises(ValueError, match="require the in-memory backend"):
+        SocialNetwork(
+            retention=Retention(max_posts=1),
+            backend=SqliteBackend(tmp_path / "social.db"),
+        )
+    with pytest.raises(ValueError, match="no retention policy"):
+        SocialNetwork().compact()
+    with pytest.raises(ValueError, match="no retention policy"):
+        Compactor(SocialNetwork())
+
+
+def test_compact_max_posts():
+    """Checks that compactions keep the newest posts of each timeline."""
+    social_network = SocialNetwork(
+        cache=RenderCache(), retention=Retention(max_posts=2)
+    )
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    social_network.follows("Bob", "Alice")
+    for i in range(4):
+        social_network.add_post("Alice", f"post {i}", NOW + timedelta(seconds=i))
+    social_network.add_post("Bob", "Damn! We lost!", NOW + timedelta(seconds=4))
+
+    with freeze_time(NOW + timedelta(seconds=4)):
+        assert len(social_network.get_user_wall("Bob")) == 5, (
+            "Timelines should grow until compacted"
+        )
+        version = social_network.get_wall_version("Bob")
+
+        assert social_network.compact() == Compaction(2, 0, 0), (
+            "The two oldest posts of Alice should be trimmed"
+        )
+        assert social_network.get_user_timeline("Alice") == [
+            "post 3 (1 second ago)",
+            "post 2 (2 seconds ago)",
+        ], "Alice's newest posts should be kept"
+        assert social_network.get_user_wall("Bob", if_changed_since=version) == [
+            "Bob - Damn! We lost! (just now)",
+            "Alice - post 3 (1 second ago)",
+            "Alice - post 2 (2 seconds ago)",
+        ], "The walls of the followers should be trimmed and recomputed"
+        assert social_network.compact().trimmed == 0, (
+            "Compacting again should trim nothing"
+        )
+
+
+def test_compact_max_age():
+    """Checks that compactions trim the posts older than the maximum age."""
+    social_network = SocialNetwork(retention=Retention(max_age=timedelta(hours=1)))
+    social_network.add_user("Alice")
+    for hours in [3, 2, 1, 0]:
+        social_network.add_post("Alice", f"{hours}h", NOW - timedelta(hours=hours))
+
+    assert social_network.compact(NOW).trimmed == 2, (
+        "The posts older than an hour should be trimmed"
+    )
+    with freeze_time(NOW):
+        assert social_network.get_user_timeline("Alice") == [
+            "0h (just now)",
+            "1h (1 hour ago)",
+        ], "The posts up to an hour old should be kept"
+    assert social_network.compact(NOW + timedelta(hours=2)).trimmed == 2, (
+        "Every post should eventually be trimmed"
+    )
+    assert social_network.get_user_timeline("Alice") == [], "No post should be left"
+
+
+def test_ring_buffers():
+    """Checks that ring buffers cap the timelines on write."""
+    social_network = SocialNetwork(retention=Retention(max_posts=3, ring=True))
+    social_network.add_user("Alice")
+    with freeze_time(NOW):
+        for i in range(10):
+            social_network.add_post("Alice", f"post {i}")
+            assert len(social_network.get_user_timeline("Alice")) < 6, (
+                "Timelines should never reach twice the maximum number of posts"
+            )
+        assert social_network.get_user_timeline("Alice")[0] == "post 9 (just now)", (
+            "The newest post should be kept"
+        )
+        social_network.compact()
+        assert social_network.get_user_timeline("Alice") == [
+            f"post {i} (just now)" for i in range(9, 6, -1)
+        ], "Compactions should trim timelines down to the maximum number of posts"
+
+
+def test_ring_buffers_cost():
+    """Checks that the cost of a post does not grow with the maximum number of posts."""
+    for max_posts in [10, 1000, 10_000]:
+        social_network = SocialNetwork(
+            retention=Retention(max_posts=max_posts, ring=True)
+        )
+        social_network.add_user("Alice")
+        user = social_network.users["Alice"]
+
+        # Trimming a timeline copies the ids it keeps into a new array
+        copied, post_ids = 0, user.post_ids
+        n_posts = 5 * max_posts
+        for _ in range(n_posts):
+            social_network.add_post("Alice", "post", NOW)
+            if user.post_ids is not post_ids:
+                copied += len(user.post_ids)
+                post_ids = user.post_ids
+
+        assert copied <= n_posts, (
+            f"Posting should copy O(1) ids amortized with {max_posts} posts kept"
+        )
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_compact_reclaims_posts(indexed: bool):
+    """Checks that trimmed posts are reclaimed from the store and the index."""
+    index = InvertedIndex() if indexed else None
+    social_network = SocialNetwork(
+        index=index, retention=Retention(max_age=timedelta(hours=1))
+    )
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    for minutes in range(120, -1, -10):
+        social_network.add_post(
+            "Alice", f"weather {minutes}", NOW - timedelta(minutes=minutes)
+        )
+    social_network.add_post("Bob", "rain", NOW - timedelta(minutes=90))
+    store = social_network.store
+    nbytes = store.nbytes()
+
+    trimmed = social_network.compact(NOW).trimmed
+    assert trimmed == 7, "The posts older than an hour should be trimmed"
+    with freeze_time(NOW):
+        assert len(social_network.search("weather")) == 7, (
+            "Trimmed posts should not be found"
+        )
+        assert social_network.search("rain") == [], "Trimmed posts should not be found"
+
+    social_network.compact(NOW)
+    if index is not None:
+        assert "120" not in index.postings, "Trimmed posts should be removed"
+        assert "rain" not in index.postings, "Trimmed posts should be removed"
+    assert store.count_stored_posts() == 14, (
+        "Posts should only be reclaimed by the next compaction"
+    )
+
+    compaction = social_network.compact(NOW)
+    assert compaction.reclaimed == 7, "Every trimmed post should be reclaimed"
+    assert store.count_stored_posts() == 7, "Only retained posts should be stored"
+    assert store.nbytes() < nbytes, "Reclaimed posts should free memory"
+    with pytest.raises(IndexError):
+        store.get_content(0)
+    with pytest.raises(IndexError):
+        store.get_content(13)
+    with freeze_time(NOW):
+        assert social_network.search("weath*", limit=1) == [
+            "Alice - weather 0 (just now)"
+        ], "Retained posts should still be found"
+        assert len(social_network.get_user_wall("Alice")) == 7, (
+            "Retained posts should still be read"
+        )
+
+
+def test_ring_buffers_reclaim_posts():
+    """Checks that ring buffers bound the store even with idle authors."""
+    index = InvertedIndex()
+    social_network = SocialNetwork(
+        index=index, retention=Retention(max_posts=10, ring=True)
+    )
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    social_network.add_post("Alice", "Hello", NOW)
+    for i in range(5000):
+        social_network.add_post("Bob", f"post {i}", NOW + timedelta(seconds=i))
+        if i % 100 == 99:
+            social_network.compact(NOW)
+
+    store = social_network.store
+    assert store.count_stored_posts() <= 1 + 10 + 3 * 100, (
+        "The posts of active authors should be reclaimed despite idle authors"
+    )
+    assert len(index.postings["post"]) <= 10 + 2 * 100, (
+        "The posts of active authors should be removed from the index"
+    )
+    with freeze_time(NOW + timedelta(days=1)):
+        assert social_network.search("hello") == ["Alice - Hello (1 day ago)"], (
+            "The posts of idle authors should be kept"
+        )
+        assert social_network.get_user_timeline("Bob")[0].startswith("post 4999"), (
+            "The newest posts should be kept"
+        )
+
+
+def test_compact_waits_for_reads():
+    """Checks that compactions never drop the posts of the reads in flight."""
+    social_network = SocialNetwork(retention=Retention(max_posts=1))
+    social_network.add_user("Alice")
+    for i in range(3):
+        social_network.add_post("Alice", f"post {i}", NOW)
+
+    reads = []
+
+    def slow_read():
+        reads.append(list(social_network.users["Alice"].post_ids))
+        for _ in range(5):
+            assert social_network.compact(NOW).reclaimed == 0, (
+                "Posts should not be reclaimed while a read may reach them"
+            )
+        reads.append([social_network.store.get_content(i) for i in reads[0]])
+
+    social_network.readers.tracked(slow_read)()
+    assert reads[1] == ["post 0", "post 1", "post 2"], (
+        "The read should see every post it started with"
+    )
+    for _ in range(2):
+        compaction = social_network.compact(NOW)
+    assert compaction.reclaimed == 2, "Posts should be reclaimed once reads are done"
+
+
+def test_compact_reclaims_segments(tmp_path: Path):
+    """Checks that the segments of a tiered store are reclaimed whole."""
+    store = PostStore(tmp_path / "segments", hot_size=4, segment_size=4)
+    social_network = SocialNetwork(
+        store=store, retention=Retention(max_age=timedelta(hours=1))
+    )
+    social_network.add_user("Alice")
+    for minutes in range(200, -1, -10):
+        social_network.add_post("Alice", "post", NOW - timedelta(minutes=minutes))
+    assert len(store.segments) == 4, "Old posts should be sealed"
+
+    for _ in range(3):
+        compaction = social_network.compact(NOW)
+    assert compaction.reclaimed == 12, "The sealed posts trimmed should be reclaimed"
+    assert len(list((tmp_path / "segments").iterdir())) == 1, (
+        "Only the segment with retained posts should be kept"
+    )
+    assert len(social_network.get_user_timeline("Alice")) == 7, (
+        "Retained posts should still be read"
+    )
+
+
+def test_compactor():
+    """Checks that a background compactor bounds timelines under writes."""
+    social_network = ConcurrentSocialNetwork(
+        index=InvertedIndex(), retention=Retention(max_posts=5)
+    )
+    names = [f"user{i}" for i in range(8)]
+    for name in names:
+        social_network.add_user(name)
+
+    def write(name: str):
+        for i in range(300):
+            social_network.add_post(name, f"post {i}")
+
+    with Compactor(social_network, interval=0.001) as compactor:
+        writers = [threading.Thread(target=write, args=(name,)) for name in names]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+    compactor.compact()
+
+    stats = compactor.stats()
+    assert stats["runs"] >= 1, "The compactor should have run"
+    assert stats["trimmed"] == len(names) * 295, (
+        "Every post beyond the maximum should be trimmed"
+    )
+    for name in names:
+        assert [post[:8] for post in social_network.get_user_timeline(name)] == [
+            f"post {i}" for i in range(299, 294, -1)
+        ], f"The newest posts of {name} should be kept"
+
+
+def test_compactor_concurrent_reads():
+    """Checks that reads in flight never hit posts reclaimed by a compactor."""
+    social_network = ConcurrentSocialNetwork(
+        index=InvertedIndex(), retention=Retention(max_posts=5, ring=True)
+    )
+    names = [f"user{i}" for i in range(4)]
+    for name in names:
+        social_network.add_user(name)
+    for name in names[1:]:
+        social_network.follows(names[0], name)
+    errors = []
+    writing = threading.Event()
+    writing.set()
+
+    def write(name: str):
+        for i in range(2000):
+            social_network.add_post(name, f"post {i}")
+
+    def read():
+        try:
+            while writing.is_set():
+                social_network.get_user_wall(names[0])
+                social_network.search("post")
+        except Exception as error:
+            errors.append(error)
+
+    with Compactor(social_network, interval=0.0005) as compactor:
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        writers = [threading.Thread(target=write, args=(name,)) for name in names]
+        for thread in [*threads, *writers]:
+            thread.start()
+        for writer in writers:
+            writer.join()
+        writing.clear()
+        for thread in threads:
+            thread.join()
+    for _ in range(3):
+        compactor.compact()
+
+    assert errors == [], "Reads should never hit reclaimed posts"
+    assert compactor.reclaimed > 0, "Trimmed posts should be reclaimed"
+    assert social_network.store.count_stored_posts() == len(names) * 5, (
+        "Only the posts on the timelines should be stored"
+    )
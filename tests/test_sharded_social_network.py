@@ -0,0 +1,223 @@
+"""This module provides tests for the ShardedSocialNetwork class."""
+
+from datetime import datetime, timedelta
+import random
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev.sharding import ShardedSocialNetwork
+from src.sr_sw_dev.social_networking import Application, SocialNetwork
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def read_pages(
+    social_network: ShardedSocialNetwork | SocialNetwork, read_page: str, name: str
+) -> list[list[str]]:
+    """Reads every page of 7 posts of a timeline or wall, between two timestamps."""
+    pages, cursor = [], None
+    while True:
+        page = getattr(social_network, read_page)(
+            name,
+            7,
+            cursor,
+            since=NOW - timedelta(seconds=250),
+            until=NOW - timedelta(seconds=50),
+        )
+        pages.append(page.lines)
+        if (cursor := page.cursor) is None:
+            return pages
+
+
+def test_sharded_social_network_routing():
+    """Checks that users are spread over the shards and reachable from any."""
+    with ShardedSocialNetwork(n_shards=3) as social_network:
+        names = [f"user{i}" for i in range(30)]
+        for name in names:
+            social_network.add_user(name)
+
+        assert len({social_network.shard_of(name) for name in names}) == 3, (
+            "Users should be spread over every shard"
+        )
+        assert social_network.count_users() == 30, "Users should be counted once"
+        assert all(social_network.has_user(name) for name in names), (
+            "Every user should be found on their shard"
+        )
+        assert not social_network.has_user("Mallory"), "Unknown users should not exist"
+
+
+def test_sharded_social_network_errors():
+    """Checks that unknown users are reported like in a social network."""
+    with ShardedSocialNetwork(n_shards=2) as social_network:
+        social_network.add_user("Alice")
+        with pytest.raises(ValueError, match="User Bob does not exist"):
+            social_network.add_post("Bob", "Hello")
+        with pytest.raises(ValueError, match="User Bob does not exist"):
+            social_network.follows("Alice", "Bob")
+        with pytest.raises(ValueError, match="User Bob does not exist"):
+            social_network.add_posts([("Alice", "Hi", None), ("Bob", "Hello", None)])
+        with pytest.raises(ValueError, match="User Bob does not exist"):
+            social_network.get_user_wall("Bob")
+
+        assert social_network.get_user_timeline("Alice") == [], (
+            "A failed batch should not add any post"
+        )
+
+
+def test_sharded_social_network_matches_social_network():
+    """Checks that random operations give the same results as one social network."""
+    rng = random.Random(3)  # noqa: S311
+    names = [f"user{i}" for i in range(12)]
+    reference = SocialNetwork()
+
+    with ShardedSocialNetwork(n_shards=4) as social_network:
+        for name in names:
+            reference.add_user(name)
+            social_network.add_user(name)
+
+        for step in range(300):
+            name, other, action = rng.choice(names), rng.choice(names), rng.random()
+            if action < 0.2:
+                reference.follows(name, other)
+                social_network.follows(name, other)
+            elif action < 0.25:
+                reference.unfollows(name, other)
+                social_network.unfollows(name, other)
+            else:
+                # Posts often share a timestamp, to check that ties are merged alike
+                timestamp = NOW - timedelta(seconds=300 - step // 3)
+                reference.add_post(name, f"post {step}", timestamp)
+                social_network.add_post(name, f"post {step}", timestamp)
+
+        with freeze_time(NOW):
+            for name in names:
+                assert social_network.get_following(name) == reference.get_following(
+                    name
+                ), f"{name} should follow the same users"
+                assert social_network.get_followers(name) == reference.get_followers(
+                    name
+                ), f"{name} should have the same followers"
+                assert social_network.get_user_timeline(
+                    name
+                ) == reference.get_user_timeline(name), (
+                    f"{name}'s timeline should match"
+                )
+                for limit, before in [
+                    (None, None),
+                    (5, None),
+                    (5, NOW - timedelta(seconds=100)),
+                ]:
+                    assert social_network.get_user_wall(
+                        name, limit, before
+                    ) == reference.get_user_wall(name, limit, before), (
+                        f"{name}'s wall should match with limit={limit}"
+                    )
+
+            assert social_network.get_user_walls(names, 10) == [
+                reference.get_user_wall(name, 10) for name in names
+            ], "Batched walls should match"
+            for query in ("post", "1*", "post 2*"):
+                assert social_network.search(query, 10) == reference.search(
+                    query, 10
+                ), f"Searches for {query!r} should match"
+            assert social_network.search("post", 5, "user3") == reference.search(
+                "post", 5, "user3"
+            ), "Searches of a user should match"
+
+            assert social_network.count_follows() == reference.count_follows(), (
+                "Follow edges should be counted once"
+            )
+            for name in names:
+                assert social_network.get_user_id(name) == reference.get_user_id(
+                    name
+                ), f"{name} should have the same id"
+                assert social_network.suggest_follows(
+                    name, 3
+                ) == reference.suggest_follows(name, 3), (
+                    f"{name} should be suggested the same users"
+                )
+                for read_page in ("get_timeline_page", "get_wall_page"):
+                    assert read_pages(social_network, read_page, name) == read_pages(
+                        reference, read_page, name
+                    ), f"{name}'s pages should match with {read_page}"
+
+
+def test_sharded_social_network_application():
+    """Checks that the application runs commands against a sharded network."""
+    with ShardedSocialNetwork(n_shards=2) as social_network:
+        app = Application(social_network)
+        with freeze_time(NOW) as frozen:
+            app.parse_command("Alice -> I love the weather today")
+            frozen.tick(60)
+            app.parse_command("Bob -> Damn! We lost!")
+            app.parse_command("Alice follows Bob")
+            frozen.tick(2)
+
+            assert app.parse_command("Alice wall") == [
+                "Bob - Damn! We lost! (2 seconds ago)",
+                "Alice - I love the weather today (1 minute ago)",
+            ], "The wall should merge the posts of both shards"
+            assert app.parse_command("Bob") == ["Damn! We lost! (2 seconds ago)"], (
+                "The timeline should be read from Bob's shard"
+            )
+
+            first, more = app.parse_command("Alice wall limit=1")
+            assert first == "Bob - Damn! We lost! (2 seconds ago)", (
+                "A page of the wall should start with the newest post"
+            )
+            cursor = more.removeprefix("(more: cursor=").removesuffix(")")
+            assert app.parse_command(f"Alice wall limit=1 cursor={cursor}") == [
+                "Alice - I love the weather today (1 minute ago)"
+            ], "The next page should resume after the cursor"
+            assert app.parse_command("Alice timeline limit=5") == [
+                "I love the weather today (1 minute ago)"
+            ], "A page of the timeline should be read from Alice's shard"
+
+
+def test_sharded_social_network_versions():
+    """Checks that timelines and walls are only read again once changed."""
+    with ShardedSocialNetwork(n_shards=3) as social_network:
+        for name in ("Alice", "Bob", "Charlie"):
+            social_network.add_user(name)
+        social_network.follows("Alice", "Bob")
+        with freeze_time(NOW):
+            social_network.add_post("Bob", "Hello")
+            timeline = social_network.get_timeline_version("Bob")
+            wall = social_network.get_wall_version("Alice")
+
+            assert social_network.get_user_timeline("Bob", timeline) is None, (
+                "An unchanged timeline should not be read"
+            )
+            assert (
+                social_network.get_user_wall("Alice", if_changed_since=wall) is None
+            ), "An unchanged wall should not be read"
+
+            social_network.add_post("Charlie", "Hi")
+            assert (
+                social_network.get_user_wall("Alice", if_changed_since=wall) is None
+            ), "A post by someone not followed should not change the wall"
+
+            social_network.add_post("Bob", "Bye")
+            assert social_network.get_user_timeline("Bob", timeline) == [
+                "Bye (just now)",
+                "Hello (just now)",
+            ], "A timeline should be read again once posted to"
+            assert social_network.get_wall_version("Alice") > wall, (
+                "A post by a followee should change the wall"
+            )
+
+            wall = social_network.get_wall_version("Alice")
+            social_network.follows("Alice", "Charlie")
+            assert social_network.get_user_wall("Alice", if_changed_since=wall) == [
+                "Bob - Bye (just now)",
+                "Charlie - Hi (just now)",
+                "Bob - Hello (just now)",
+            ], "Following someone should change the wall"
+
+        with pytest.raises(ValueError, match="User Mallory does not exist"):
+            social_network.get_wall_version("Mallory")
+        with pytest.raises(ValueError, match="The page limit must be positive"):
+            social_network.get_wall_page("Alice", 0)
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            social_network.get_timeline_page("Alice", cursor="AAAA")
@@ -1,7 +1,11 @@
 """This module provides tests for the SocialNetwork class."""
 
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
 import pytest
 
+from src.sr_sw_dev.cache import RenderCache
 from src.sr_sw_dev.social_networking import SocialNetwork
 
 
@@ -81,6 +85,37 @@ def test_social_network_follows():
     assert following == expected_following, "User should follow the other user"
 
 
+def test_social_network_followers():
+    """Checks that followers can be queried without scanning all users."""
+    social_network = SocialNetwork()
+    for name in ("Alice", "Bob", "Charlie"):
+        social_network.add_user(name)
+    social_network.add_post("Bob", "Damn! We lost!")
+    social_network.follows("Alice", "Bob")
+    social_network.follows("Alice", "Bob")
+    social_network.follows("Charlie", "Bob")
+
+    assert social_network.get_followers("Bob") == ["Alice", "Charlie"], (
+        "Bob should be followed by Alice and Charlie"
+    )
+    assert social_network.is_following("Alice", "Bob"), "Alice should follow Bob"
+    assert social_network.get_user_wall("Alice") == [
+        "Bob - Damn! We lost! (just now)"
+    ], "Following twice should not duplicate posts on the wall"
+
+    social_network.unfollows("Alice", "Bob")
+    assert social_network.get_followers("Bob") == ["Charlie"], (
+        "Bob should only be followed by Charlie"
+    )
+    assert not social_network.is_following("Alice", "Bob"), (
+        "Alice should not follow Bob anymore"
+    )
+    assert social_network.get_user_wall("Alice") == [], "Alice's wall should be empty"
+
+    with pytest.raises(ValueError, match="User Dave does not exist"):
+        social_network.unfollows("Alice", "Dave")
+
+
 def test_social_network_follows_nonexistent_user():
     """Checks that following a nonexistent user raises ValueError."""
     social_network = SocialNetwork()
@@ -93,3 +128,167 @@ def test_social_network_follows_nonexistent_user():
 
     with pytest.raises(ValueError, match="User Bob does not exist"):
         social_network.get_following("Bob")
+
+
+def test_social_network_get_user_wall_paginated():
+    """Checks that a page of a wall can be read with a limit and a bound."""
+    social_network = SocialNetwork()
+    social_network.add_user("Alice")
+    social_network.add_user("Bob")
+    social_network.follows("Alice", "Bob")
+
+    now = datetime.now().replace(microsecond=0)
+    for minutes, (name, post) in enumerate(
+        [("Alice", "first"), ("Bob", "second"), ("Alice", "third"), ("Bob", "fourth")]
+    ):
+        with freeze_time(now - timedelta(minutes=4 - minutes)):
+            social_network.add_post(name, post)
+
+    with freeze_time(now):
+        wall = social_network.get_user_wall("Alice")
+        assert wall == [
+            "Bob - fourth (1 minute ago)",
+            "Alice - third (2 minutes ago)",
+            "Bob - second (3 minutes ago)",
+            "Alice - first (4 minutes ago)",
+        ], "Wall should be sorted newest-first"
+
+        wall = social_network.get_user_wall("Alice", limit=2)
+        assert wall == [
+            "Bob - fourth (1 minute ago)",
+            "Alice - third (2 minutes ago)",
+        ], "Wall should stop after the requested number of posts"
+
+        wall = social_network.get_user_wall(
+            "Alice", limit=2, before=now - timedelta(minutes=2)
+        )
+        assert wall == [
+            "Bob - second (3 minutes ago)",
+            "Alice - first (4 minutes ago)",
+        ], "Wall should only contain posts older than the given bound"
+
+
+def test_social_network_cursor_pagination():
+    """Checks that walking the pages of a wall and a timeline reads every post once."""
+    social_network = SocialNetwork()
+    for name in ["Alice", "Bob", "Charlie"]:
+        social_network.add_user(name)
+    social_network.follows("Alice", "Bob")
+    social_network.follows("Alice", "Charlie")
+
+    # Several posts share each second, to check that cursors break ties
+    now = datetime.now().replace(microsecond=0)
+    for i in range(30):
+        name = ["Alice", "Bob", "Charlie"][i % 3]
+        social_network.add_post(name, f"post {i}", now - timedelta(seconds=30 - i // 4))
+
+    with freeze_time(now):
+        for get_page, full in [
+            (social_network.get_wall_page, social_network.get_user_wall("Alice")),
+            (
+                social_network.get_timeline_page,
+                social_network.get_user_timeline("Alice"),
+            ),
+        ]:
+            lines, cursor = [], None
+            while True:
+                page = get_page("Alice", limit=4, cursor=cursor)
+                lines.extend(page.lines)
+                if page.cursor is None:
+                    break
+                cursor = page.cursor
+            assert lines == full, "Pages should add up to the whole history"
+
+        page = social_network.get_wall_page(
+            "Alice",
+            limit=100,
+            since=now - timedelta(seconds=27),
+            until=now - timedelta(seconds=25),
+        )
+        expected = [
+            line
+            for line in social_network.get_user_wall("Alice")
+            if line.endswith(("(26 seconds ago)", "(27 seconds ago)"))
+        ]
+        assert len(expected) == 8 and page.lines == expected, (
+            "Pages should only contain posts within the time range"
+        )
+        assert page.cursor is None, "The last page should not have a cursor"
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        social_network.get_wall_page("Alice", cursor="not a cursor")
+    with pytest.raises(ValueError, match="The page limit must be positive"):
+        social_network.get_timeline_page("Alice", limit=0)
+
+
+def test_social_network_wall_total_order():
+    """Checks that posts from the same instant are shown newest-posted first."""
+    social_network = SocialNetwork()
+    for name in ["Alice", "Bob", "Charlie"]:
+        social_network.add_user(name)
+    social_network.follows("Alice", "Bob")
+    social_network.follows("Alice", "Charlie")
+
+    now = datetime(2024, 1, 1, 12)
+    with freeze_time(now):
+        for name in ["Charlie", "Alice", "Bob", "Charlie"]:
+            social_network.add_post(name, f"{name.lower()} at noon")
+
+        assert social_network.get_user_wall("Alice") == [
+            "Charlie - charlie at noon (just now)",
+            "Bob - bob at noon (just now)",
+            "Alice - alice at noon (just now)",
+            "Charlie - charlie at noon (just now)",
+        ], "Posts from the same instant should be ordered by sequence id"
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_social_network_conditional_reads(cached: bool):
+    """Checks that unchanged timelines and walls are not read again."""
+    social_network = SocialNetwork(cache=RenderCache() if cached else None)
+    for name in ["Alice", "Bob", "Charlie"]:
+        social_network.add_user(name)
+    social_network.follows("Alice", "Bob")
+    social_network.add_post("Bob", "Damn! We lost!")
+
+    timeline = social_network.get_timeline_version("Bob")
+    wall = social_network.get_wall_version("Alice")
+    assert social_network.get_user_timeline("Bob", if_changed_since=timeline) is None, (
+        "An unchanged timeline should not be read"
+    )
+    assert social_network.get_user_wall("Alice", if_changed_since=wall) is None, (
+        "An unchanged wall should not be read"
+    )
+    assert social_network.get_user_wall("Alice", if_changed_since=wall - 1) == [
+        "Bob - Damn! We lost! (just now)"
+    ], "Older versions should read the wall"
+
+    social_network.add_post("Charlie", "Hello")
+    social_network.unfollows("Alice", "Charlie")
+    assert social_network.get_wall_version("Alice") == wall, (
+        "Unrelated posts and no-op unfollows should keep the version of the wall"
+    )
+
+    changes = [
+        lambda: social_network.add_post("Alice", "Hi"),
+        lambda: social_network.add_post("Bob", "Good game though."),
+        lambda: social_network.follows("Alice", "Charlie"),
+        lambda: social_network.unfollows("Alice", "Bob"),
+    ]
+    for change in changes:
+        change()
+        assert social_network.get_wall_version("Alice") > wall, (
+            "Every change to the wall should make its version newer"
+        )
+        assert social_network.get_user_wall("Alice", if_changed_since=wall) == (
+            social_network.get_user_wall("Alice")
+        ), "A changed wall should be read"
+        wall = social_network.get_wall_version("Alice")
+
+    assert social_network.get_timeline_version("Bob") > timeline, (
+        "Posting should make the version of the timeline newer"
+    )
+    assert social_network.get_user_timeline("Bob", if_changed_since=timeline) == [
+        "Good game though. (just now)",
+        "Damn! We lost! (just now)",
+    ], "A changed timeline should be read"
@@ -0,0 +1,189 @@
+"""This module provides tests for the SqliteBackend class."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import random
+import threading
+
+from freezegun import freeze_time
+import pytest
+
+from src.sr_sw_dev.cache import RenderCache
+from src.sr_sw_dev.concurrency import ConcurrentSocialNetwork
+from src.sr_sw_dev.search import InvertedIndex
+from src.sr_sw_dev.social_networking import SocialNetwork
+from src.sr_sw_dev.storage import SqliteBackend
+
+NOW = datetime(2024, 1, 1, 12)
+
+
+def test_sqlite_backend_matches_memory_backend(tmp_path: Path):
+    """Checks that random operations give the same results as in memory."""
+    rng = random.Random(5)  # noqa: S311
+    names = [f"user{i}" for i in range(10)]
+    reference = SocialNetwork()
+    social_network = SocialNetwork(
+        backend=SqliteBackend(tmp_path / "social.db", batch_size=16),
+        cache=RenderCache(),
+    )
+    for name in names:
+        reference.add_user(name)
+        social_network.add_user(name)
+
+    for step in range(400):
+        name, other, action = rng.choice(names), rng.choice(names), rng.random()
+        if action < 0.2:
+            reference.follows(name, other)
+            social_network.follows(name, other)
+        elif action < 0.25:
+            reference.unfollows(name, other)
+            social_network.unfollows(name, other)
+        else:
+            # Posts often share a timestamp, to check that ties are ordered alike
+            timestamp = NOW - timedelta(seconds=400 - step // 3)
+            reference.add_post(name, f"post {step}", timestamp)
+            social_network.add_post(name, f"post {step}", timestamp)
+
+        if step % 50 == 0:
+            assert social_network.get_user_wall(name, 5) == reference.get_user_wall(
+                name, 5
+            ), "Walls should match while posts are being batched"
+
+    with freeze_time(NOW):
+        assert social_network.count_follows() == reference.count_follows(), (
+            "Follow edges should be counted alike"
+        )
+        graph = social_network.get_follow_graph()
+        expected = reference.get_follow_graph()
+        assert (graph.names, graph.indptr, graph.indices) == (
+            expected.names,
+            expected.indptr,
+            expected.indices,
+        ), "The follow graphs should be exported alike"
+        for name in names:
+            assert social_network.get_following(name) == reference.get_following(
+                name
+            ), f"{name} should follow the same users in the same order"
+            assert social_network.get_followers(name) == reference.get_followers(
+                name
+            ), f"{name} should have the same followers in the same order"
+            assert social_network.get_user_timeline(
+                name
+            ) == reference.get_user_timeline(name), f"{name}'s timeline should match"
+            for limit, before in [
+                (None, None),
+                (5, None),
+                (5, NOW - timedelta(seconds=100)),
+            ]:
+                assert social_network.get_user_wall(
+                    name, limit, before
+                ) == reference.get_user_wall(name, limit, before), (
+                    f"{name}'s wall should match with limit={limit}"
+                )
+
+    social_network.backend.close()
+
+
+def test_sqlite_backend_reopen(tmp_path: Path):
+    """Checks that a database keeps the social network once closed."""
+    backend = SqliteBackend(tmp_path / "social.db")
+    social_network = SocialNetwork(backend=backend)
+    with freeze_time(NOW):
+        social_network.add_user("Alice")
+        social_network.add_user("Bob")
+        social_network.add_post("Alice", "I love the weather today")
+        social_network.follows("Bob", "Alice")
+        social_network.add_post("Bob", "Damn! We lost!")
+    backend.close()
+
+    backend = SqliteBackend(tmp_path / "social.db")
+    reopened = SocialNetwork(backend=backend)
+    assert reopened.count_users() == 2, "Users should be kept"
+    assert reopened.backend.count_posts() == 2, "Posts should be kept"
+    with freeze_time(NOW + timedelta(seconds=2)):
+        reopened.add_post("Alice", "Good game though.")
+        assert reopened.get_user_wall("Bob") == [
+            "Alice - Good game though. (just now)",
+            "Bob - Damn! We lost! (2 seconds ago)",
+            "Alice - I love the weather today (2 seconds ago)",
+        ], "New posts should come after the ones in the database"
+    backend.close()
+
+
+def test_sqlite_backend_concurrent_readers(tmp_path: Path):
+    """Checks that readers on pooled connections see the posts of the writer."""
+    backend = SqliteBackend(tmp_path / "social.db", batch_size=8, pool_size=2)
+    social_network = ConcurrentSocialNetwork(backend=backend)
+    names = [f"user{i}" for i in range(8)]
+    for name in names:
+        social_network.add_user(name)
+        social_network.follows(name, names[0])
+
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                for name in names:
+                    social_network.get_user_wall(name, 10)
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(200):
+        social_network.add_post(names[i % len(names)], f"post {i}")
+    for reader in readers:
+        reader.join()
+
+    assert not errors, "Concurrent reads should not fail"
+    assert len(social_network.get_user_timeline(names[0])) == 25, (
+        "Every post should be inserted"
+    )
+    backend.close()
+
+
+def test_sqlite_backend_in_memory_features(tmp_path: Path):
+    """Checks that the features built on the in-memory backend are refused."""
+    backend = SqliteBackend(tmp_path / "social.db")
+    with pytest.raises(ValueError, match="require the in-memory backend"):
+        SocialNetwork(backend=backend, index=InvertedIndex())
+
+    social_network = SocialNetwork(backend=backend)
+    social_network.add_user("Alice")
+    with pytest.raises(ValueError, match="Pages require the in-memory backend"):
+        social_network.get_timeline_page("Alice")
+    with pytest.raises(ValueError, match="Searches require the in-memory backend"):
+        social_network.search("hello")
+    backend.close()
+
+
+def test_sqlite_backend_versions(tmp_path: Path):
+    """Checks that versions change with the walls and across reopenings."""
+    backend = SqliteBackend(tmp_path / "social.db")
+    social_network = SocialNetwork(backend=backend)
+    for name in ["Alice", "Bob"]:
+        social_network.add_user(name)
+    social_network.follows("Alice", "Bob")
+    wall = social_network.get_wall_version("Alice")
+    assert social_network.get_user_wall("Alice", if_changed_since=wall) is None, (
+        "An unchanged wall should not be read"
+    )
+
+    social_network.add_post("Bob", "Damn! We lost!")
+    assert social_network.get_wall_version("Alice") > wall, (
+        "A post of a followee should make the version of the wall newer"
+    )
+    social_network.unfollows("Alice", "Bob")
+    assert social_network.get_user_wall("Alice", if_changed_since=wall) == [], (
+        "An unfollow should make the version of the wall newer"
+    )
+    wall = social_network.get_wall_version("Alice")
+    backend.close()
+
+    reopened = SocialNetwork(backend=SqliteBackend(tmp_path / "social.db"))
+    assert reopened.get_wall_version("Alice") > wall, (
+        "Versions should not be handed out again after reopening"
+    )
+    reopened.backend.close()
@@ -3,8 +3,10 @@
 from datetime import datetime, timedelta
 
 from freezegun import freeze_time
+import pytest
 
-from src.sr_sw_dev.social_networking import User
+from src.sr_sw_dev.social_networking import Post, User
+from src.sr_sw_dev.walls import WallEntry
 
 
 def test_user_init():
@@ -56,6 +58,30 @@ def test_user_following():
     assert user1.get_following() == [user2], "User should follow the other user"
 
 
+def test_user_following_is_idempotent():
+    """Checks that following twice or following oneself has no effect."""
+    user1 = User("Alice")
+    user2 = User("Bob")
+    assert user1.follows(user2), "First follow should be recorded"
+    assert not user1.follows(user2), "Second follow should be a no-op"
+    assert not user1.follows(user1), "Following oneself should be a no-op"
+    assert user1.get_following() == [user2], "User should follow Bob only once"
+    assert user2.get_followers() == [user1], "Bob should be followed by Alice"
+
+
+def test_user_unfollows():
+    """Checks that the user can unfollow another user."""
+    user1 = User("Alice")
+    user2 = User("Bob")
+    user1.follows(user2)
+    assert user1.is_following(user2), "User should follow the other user"
+
+    assert user1.unfollows(user2), "Unfollow should be recorded"
+    assert not user1.unfollows(user2), "Second unfollow should be a no-op"
+    assert not user1.is_following(user2), "User should not follow the other user"
+    assert user2.get_followers() == [], "Bob should not have followers anymore"
+
+
 def test_user_wall():
     """Checks that the user can get their wall."""
     user1 = User("Alice")
@@ -75,3 +101,23 @@ def test_user_wall():
         "Charlie - I'm in New York today! Anyone wants to have a coffee? (2 minutes ago)",
     ]
     assert wall == expected_wall, "User should have two posts on their wall"
+
+
+def test_user_wall_entries(monkeypatch: pytest.MonkeyPatch):
+    """Checks that walls are rendered without allocating signed post copies."""
+    user1 = User("Alice")
+    user1.add_post("I love the weather today")
+
+    def fail(*_args: object) -> Post:
+        raise AssertionError("Walls should not create signed copies of posts")
+
+    monkeypatch.setattr(Post, "signed_copy", fail)
+
+    entries = list(user1.iter_wall())
+    assert entries == [WallEntry("Alice", user1.posts[0])], (
+        "Wall entries should reference the author and the original post"
+    )
+    assert str(entries[0]) == "Alice - I love the weather today (just now)", (
+        "Author should only be prepended when the entry is rendered"
+    )
+    assert user1.get_wall() == ["Alice - I love the weather today (just now)"]